@@ -0,0 +1,101 @@
+# bench_extract.py
+"""
+Benchmark: CPU time per page for reading follower counts with a full BeautifulSoup
+parse (the previous approach) versus the targeted scans in scraper/extract.py.
+
+    python bench_extract.py [--pages 50] [--filler 3000]
+
+Synthetic pages mimic the real ones: a large rendered TikTok profile with the
+SIGI_STATE blob near the end, and an Instagram profile whose count sits in the meta
+description. BeautifulSoup is only needed for the comparison column.
+"""
+import argparse
+import json
+import re
+import time
+
+from scraper import extract
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+def make_tiktok_page(filler):
+    """A rendered profile: filler markup, the visible count, then the state blob."""
+    state = {"UserModule": {"users": {"someone": {"uniqueId": "someone", "stats": {"followerCount": 1234567}}}}}
+    body = "".join(f'<div class="item-{i}"><span>video {i}</span><a href="/v/{i}">link</a></div>' for i in range(filler))
+    return (f'<html><head><title>someone</title></head><body>{body}'
+            f'<strong title="Followers" data-e2e="followers-count">1.2M</strong>'
+            f'<script id="SIGI_STATE" type="application/json">{json.dumps(state)}</script></body></html>')
+
+
+def make_instagram_page(filler):
+    body = "".join(f'<div class="x{i}"><img src="/p/{i}.jpg" alt="post {i}"></div>' for i in range(filler))
+    return ('<html><head><meta name="description" content="12,345 Followers, 10 Following, 3 Posts - '
+            f'See Instagram photos and videos"></head><body>{body}</body></html>')
+
+
+def soup_tiktok(html):
+    soup = BeautifulSoup(html, "html.parser")
+    data = json.loads(soup.find("script", id="SIGI_STATE").string)
+    return next(iter(data["UserModule"]["users"].values()))["stats"]["followerCount"]
+
+
+def soup_tiktok_fallback(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.find("strong", {"title": "Followers"}).get_text(strip=True)
+
+
+def soup_instagram(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return re.search(r"(\d[\d,.]*)\s*([KkMm]?)\s*Followers", soup.find("meta", {"name": "description"})["content"]).group(0)
+
+
+def regex_tiktok(html):
+    data = json.loads(extract.script_text(html, "SIGI_STATE"))
+    return next(iter(data["UserModule"]["users"].values()))["stats"]["followerCount"]
+
+
+def regex_tiktok_fallback(html):
+    return extract.titled_text(html, "strong", "Followers")
+
+
+def regex_instagram(html):
+    return re.search(r"(\d[\d,.]*)\s*([KkMm]?)\s*Followers", extract.meta_content(html, "description")).group(0)
+
+
+def cpu_ms_per_page(func, html, pages):
+    start = time.process_time()
+    for _ in range(pages):
+        result = func(html)
+    return (time.process_time() - start) * 1000 / pages, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50, help="Pages parsed per measurement.")
+    parser.add_argument("--filler", type=int, default=3000, help="Filler elements per page (page size).")
+    args = parser.parse_args()
+
+    cases = [
+        ("tiktok SIGI_STATE", make_tiktok_page(args.filler), soup_tiktok, regex_tiktok),
+        ("tiktok <strong>", make_tiktok_page(args.filler), soup_tiktok_fallback, regex_tiktok_fallback),
+        ("instagram meta", make_instagram_page(args.filler), soup_instagram, regex_instagram),
+    ]
+    print(f"{'case':<20}{'page KB':>9}{'soup ms':>10}{'regex ms':>10}{'speedup':>9}")
+    for name, html, soup_func, regex_func in cases:
+        regex_ms, regex_result = cpu_ms_per_page(regex_func, html, args.pages)
+        if BeautifulSoup is None:
+            print(f"{name:<20}{len(html) / 1024:>9.0f}{'n/a':>10}{regex_ms:>10.3f}{'':>9}")
+            continue
+        soup_ms, soup_result = cpu_ms_per_page(soup_func, html, args.pages)
+        assert soup_result == regex_result, (name, soup_result, regex_result)
+        print(f"{name:<20}{len(html) / 1024:>9.0f}{soup_ms:>10.3f}{regex_ms:>10.3f}{soup_ms / regex_ms:>8.0f}x")
+    if BeautifulSoup is None:
+        print("beautifulsoup4 is not installed; only the regex timings were measured.")
+
+
+if __name__ == '__main__':
+    main()
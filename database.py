@@ -1,14 +1,139 @@
 # database.py
 import sqlite3
 import csv
+import io
+import json
+import time
+import threading
+from contextlib import contextmanager
 import tkinter.filedialog # Only if you use tkinter for file dialog, otherwise remove this import
 from typing import List, Tuple
 
+# zstandard is optional (it ships with the bundled build); without it .zst exports are unavailable
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 DB_PATH = "accounts.db"
 
+# Connection tuning: wait up to BUSY_TIMEOUT_MS for a lock instead of failing with
+# "database is locked", and keep up to STATEMENT_CACHE_SIZE prepared statements per
+# connection (sqlite3 reuses them whenever the same SQL text is executed again).
+BUSY_TIMEOUT_MS = 10000
+STATEMENT_CACHE_SIZE = 256
+
+# Categories that do not carry a real follower count and are therefore not snapshotted
+NON_RESULT_CATEGORIES = ("pending", "failed", "failed_platform")
+
+# Accounts with at least this many followers are "macro", the rest "micro"
+MACRO_FOLLOWERS = 100000
+
+# Snapshot retention tiers: raw rows are kept for RAW_RETENTION_DAYS, then folded into
+# one row per hour; hourly rows are kept for HOURLY_RETENTION_DAYS, then folded into
+# one row per day. Daily rows are kept forever.
+RAW_RETENTION_DAYS = 7
+HOURLY_RETENTION_DAYS = 90
+
+class ConnectionManager:
+    """
+    Long-lived SQLite connections shared by the scraper threads and the Tk thread.
+
+    All writes go through one writer connection, serialized by a lock, so there is
+    never more than one writer contending for the database file. Each thread gets
+    its own reader connection; with the WAL journal, readers never block the writer
+    and never see a half-written transaction. Connections use synchronous=NORMAL
+    (safe under WAL, one fsync per checkpoint instead of per commit) and a busy timeout.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = {}  # thread -> reader connection, so close() can reach them all
+        self._readers_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def write(self):
+        """
+        Yields the writer connection inside one transaction: committed when the block
+        exits normally, rolled back if it raises.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def reader(self):
+        """Returns the calling thread's reader connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._readers_lock:
+                # Close readers whose threads have exited (e.g. finished pool workers)
+                for thread in [t for t in self._readers if not t.is_alive()]:
+                    self._readers.pop(thread).close()
+                self._readers[threading.current_thread()] = conn
+        return conn
+
+    def close(self):
+        """Closes every connection. The manager reopens them lazily if used again."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_connection_manager():
+    """Returns the process-wide ConnectionManager for DB_PATH."""
+    global _manager
+    with _manager_lock:
+        if _manager is None or _manager.path != DB_PATH:
+            if _manager is not None:
+                _manager.close()
+            _manager = ConnectionManager(DB_PATH)
+        return _manager
+
+
+def close_db():
+    """Closes all pooled connections (called on application shutdown)."""
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+            _manager = None
+
+
 def init_db():
     # ... (existing init_db function) ...
-    conn = sqlite3.connect(DB_PATH)
+    with get_connection_manager().write() as conn:
+        _create_schema(conn)
+
+
+def _create_schema(conn):
     conn.execute("""
         CREATE TABLE IF NOT EXISTS accounts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -19,70 +144,424 @@ def init_db():
             category TEXT NOT NULL
         )
     """)
-    conn.commit()
-    conn.close()
+    # Append-only follower history. resolution is 'raw', 'hour' or 'day'; for downsampled
+    # rows ts is the start of the bucket. The primary key doubles as the per-account
+    # time-range index; the (resolution, ts) index serves the compaction scans.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS follower_snapshots (
+            link TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            followers INTEGER NOT NULL,
+            resolution TEXT NOT NULL DEFAULT 'raw',
+            PRIMARY KEY (link, resolution, ts)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_resolution_ts ON follower_snapshots(resolution, ts)")
+    # Lets the windowed table page through accounts sorted by follower count without
+    # sorting the whole table for every page (the implicit rowid breaks ties)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_followers ON accounts(followers)")
+    # Same for the other sortable columns (see SORTABLE_COLUMNS); the name index uses the
+    # collation fetch_window sorts by, so ORDER BY name COLLATE NOCASE can walk it
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_name ON accounts(name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_platform ON accounts(platform)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_category ON accounts(category)")
+    # Unix time of the last successful scrape, so recent results can be served without
+    # scraping again (see fetch_last_scraped); failed scrapes leave it unchanged
+    _add_column_if_missing(conn, "accounts", "last_scraped_at", "REAL")
+
+    # Change tracking for incremental UI refreshes: every insert/update of an account
+    # stamps it with the next value of a global counter, and every delete leaves a
+    # tombstone with that value. Triggers keep this correct for every writer.
+    _add_column_if_missing(conn, "accounts", "version", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_version ON accounts(version)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO sync_state (id, version) VALUES (1, 0)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS account_tombstones (
+            link TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tombstones_version ON account_tombstones(version)")
+
+    # Durable scrape job queue shared by worker processes (see job_queue.py). state is
+    # 'queued', 'leased', 'done' or 'dead'; a leased job belongs to worker until
+    # lease_expires, after which any worker may claim it again.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'queued',
+            priority INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            worker TEXT,
+            lease_expires REAL,
+            available_at REAL NOT NULL,
+            enqueued_at REAL NOT NULL,
+            finished_at REAL,
+            error TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON scrape_jobs(state, priority, available_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lease ON scrape_jobs(state, lease_expires)")
+    # Running workers, each counted as alive until alive_until unless it checks in again
+    # (see job_queue.worker_alive), so the app can tell whether anyone will run its jobs
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_workers (
+            worker TEXT PRIMARY KEY,
+            alive_until REAL NOT NULL
+        )
+    """)
+    # At most one unfinished job per link, so enqueueing the same account twice is a no-op
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_link ON scrape_jobs(link)
+        WHERE state IN ('queued', 'leased')
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS accounts_version_insert AFTER INSERT ON accounts BEGIN
+            UPDATE sync_state SET version = version + 1 WHERE id = 1;
+            UPDATE accounts SET version = (SELECT version FROM sync_state WHERE id = 1) WHERE id = NEW.id;
+            DELETE FROM account_tombstones WHERE link = NEW.link;
+        END
+    """)
+    # Restricted to the data columns so the version stamp itself does not re-fire it
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS accounts_version_update
+        AFTER UPDATE OF name, link, platform, followers, category ON accounts BEGIN
+            UPDATE sync_state SET version = version + 1 WHERE id = 1;
+            UPDATE accounts SET version = (SELECT version FROM sync_state WHERE id = 1) WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS accounts_version_delete AFTER DELETE ON accounts BEGIN
+            UPDATE sync_state SET version = version + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO account_tombstones (link, version)
+            VALUES (OLD.link, (SELECT version FROM sync_state WHERE id = 1));
+        END
+    """)
+
+
+def _add_column_if_missing(conn, table, column, declaration):
+    """Schema migration helper for databases created by older versions of the app."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def determine_category(followers):
+    """Category stored for a successful scrape (shared by the app and the queue workers)."""
+    return "macro" if followers >= MACRO_FOLLOWERS else "micro"
+
+
+def _snapshot_rows(accounts_data, ts=None):
+    """(link, ts, followers) rows for the scrape results in accounts_data."""
+    ts = int(ts if ts is not None else time.time())
+    return [(link, ts, followers) for _, link, _, followers, category in accounts_data
+            if category not in NON_RESULT_CATEGORIES]
+
+
+def _insert_snapshots(conn, rows):
+    conn.executemany(INSERT_SNAPSHOT_SQL, rows)
+
+
+# Statements shared by several functions are kept as constants so every call passes the
+# identical SQL text and hits the connection's prepared-statement cache.
+UPSERT_ACCOUNT_SQL = f"""
+    INSERT INTO accounts (name, link, platform, followers, category, last_scraped_at)
+    VALUES (?1, ?2, ?3, ?4, ?5,
+            CASE WHEN ?5 IN ({", ".join(f"'{c}'" for c in NON_RESULT_CATEGORIES)}) THEN NULL
+                 ELSE (julianday('now') - 2440587.5) * 86400.0 END)
+    ON CONFLICT(link) DO UPDATE SET
+        followers=excluded.followers,
+        category=excluded.category,
+        last_scraped_at=COALESCE(excluded.last_scraped_at, accounts.last_scraped_at)
+"""
+INSERT_SNAPSHOT_SQL = """
+    INSERT OR REPLACE INTO follower_snapshots (link, ts, followers, resolution)
+    VALUES (?, ?, ?, 'raw')
+"""
+SELECT_ACCOUNTS_SQL = "SELECT name, link, platform, followers, category FROM accounts"
 
 
 def upsert_account(name, link, platform, followers, category):
     """
     Insert a new account record or, if the record already exists (based on the unique link),
-    update the follower count and category.
+    update the follower count and category. Real scrape results are also appended to
+    the follower history.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("""
-        INSERT INTO accounts (name, link, platform, followers, category)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(link) DO UPDATE SET
-            followers=excluded.followers,
-            category=excluded.category
-    """, (name, link, platform, followers, category))
-    conn.commit()
-    conn.close()
+    with get_connection_manager().write() as conn:
+        conn.execute(UPSERT_ACCOUNT_SQL, (name, link, platform, followers, category))
+        _insert_snapshots(conn, _snapshot_rows([(name, link, platform, followers, category)]))
 
 def bulk_upsert_accounts(accounts_data: List[Tuple[str, str, str, int, str]]):
     """
-    Bulk insert or update multiple account records.
+    Bulk insert or update multiple account records in one transaction, appending the
+    real scrape results to the follower history.
     accounts_data is a list of tuples: (name, link, platform, followers, category)
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.executemany("""
-        INSERT INTO accounts (name, link, platform, followers, category)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(link) DO UPDATE SET
-            followers=excluded.followers,
-            category=excluded.category
-    """, accounts_data)
-    conn.commit()
-    conn.close()
+    with get_connection_manager().write() as conn:
+        conn.executemany(UPSERT_ACCOUNT_SQL, accounts_data)
+        _insert_snapshots(conn, _snapshot_rows(accounts_data))
 
 
 def delete_account(link):
     # ... (existing delete_account function) ...
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("DELETE FROM accounts WHERE link=?", (link,))
-    conn.commit()
-    conn.close()
+    with get_connection_manager().write() as conn:
+        conn.execute("DELETE FROM accounts WHERE link=?", (link,))
+        conn.execute("DELETE FROM follower_snapshots WHERE link=?", (link,))
 
 
 def fetch_all_accounts():
     # ... (existing fetch_all_accounts function) ...
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.execute("SELECT name, link, platform, followers, category FROM accounts")
-    accounts = cursor.fetchall()
-    conn.close()
-    return accounts
-
-def export_csv_to_file(file_path):
-    # ... (existing export_csv function, potentially renamed to avoid conflict if `import_csv` uses a global function) ...
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.execute("SELECT name, link, platform, followers, category FROM accounts")
-    rows = cursor.fetchall()
-    conn.close()
-
-    with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["Name", "Link", "Platform", "Followers", "Category"])
-        writer.writerows(rows)
+    return get_connection_manager().reader().execute(SELECT_ACCOUNTS_SQL).fetchall()
+
+# Stay well below SQLite's limit on bound parameters per statement
+MAX_IN_PARAMS = 500
+
+
+def fetch_account(link):
+    """
+    Return the (name, link, platform, followers, category) row for one link, or None.
+    Served by the UNIQUE(link) index instead of a table scan.
+    """
+    return get_connection_manager().reader().execute(
+        SELECT_ACCOUNTS_SQL + " WHERE link = ?", (link,)).fetchone()
+
+
+def fetch_accounts(links):
+    """
+    Return the rows for many links using batched "WHERE link IN (...)" lookups on the
+    UNIQUE(link) index. Unknown links are simply absent from the result.
+    """
+    links = list(dict.fromkeys(links)) # Drop duplicates, keep order
+    conn = get_connection_manager().reader()
+    rows = []
+    for start in range(0, len(links), MAX_IN_PARAMS):
+        chunk = links[start:start + MAX_IN_PARAMS]
+        placeholders = ",".join("?" * len(chunk))
+        rows.extend(conn.execute(f"{SELECT_ACCOUNTS_SQL} WHERE link IN ({placeholders})", chunk).fetchall())
+    return rows
+
+
+def fetch_last_scraped(links):
+    """
+    Return {link: (platform, last_scraped_at)} for the given links whose stored row is
+    a successful scrape result. Pending, failed and unknown links are absent.
+    """
+    links = list(dict.fromkeys(links))
+    conn = get_connection_manager().reader()
+    excluded = ",".join("?" * len(NON_RESULT_CATEGORIES))
+    last_scraped = {}
+    for start in range(0, len(links), MAX_IN_PARAMS):
+        chunk = links[start:start + MAX_IN_PARAMS]
+        placeholders = ",".join("?" * len(chunk))
+        last_scraped.update((link, (platform, ts)) for link, platform, ts in conn.execute(
+            f"SELECT link, platform, last_scraped_at FROM accounts WHERE link IN ({placeholders}) "
+            f"AND last_scraped_at IS NOT NULL AND category NOT IN ({excluded})",
+            chunk + list(NON_RESULT_CATEGORIES)).fetchall())
+    return last_scraped
+
+
+# Sort keys accepted by fetch_window, mapped to their ORDER BY expression. Only these
+# fixed strings are ever interpolated into the SQL. Each has a matching index (see
+# _create_schema), so a page is read in index order instead of sorting the table.
+SORTABLE_COLUMNS = {
+    "name": "name COLLATE NOCASE",
+    "link": "link",
+    "platform": "platform",
+    "followers": "followers",
+    "category": "category",
+}
+
+
+def count_accounts():
+    """Return the number of tracked accounts."""
+    return get_connection_manager().reader().execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+
+def fetch_all_links():
+    """Return the link of every tracked account (unordered), without reading the other columns."""
+    return [row[0] for row in get_connection_manager().reader().execute("SELECT link FROM accounts")]
+
+
+def fetch_window(offset, limit, order_by=None, descending=False):
+    """
+    Return up to limit (name, link, platform, followers, category) rows starting at
+    offset, ordered by order_by (a SORTABLE_COLUMNS key; insertion order when None).
+    The id tiebreaker keeps paging stable when many rows share the same sort value.
+    """
+    direction = "DESC" if descending else "ASC"
+    order = f"{SORTABLE_COLUMNS[order_by]} {direction}, id {direction}" if order_by else f"id {direction}"
+    return get_connection_manager().reader().execute(
+        f"{SELECT_ACCOUNTS_SQL} ORDER BY {order} LIMIT ? OFFSET ?", (limit, max(0, offset))).fetchall()
+
+
+def fetch_changes(since_version=None):
+    """
+    Return what changed in the accounts table after since_version, as
+    (rows, deleted_links, version). rows are (name, link, platform, followers, category)
+    tuples; version is the watermark to pass on the next call. With since_version=None
+    rows is the complete table and deleted_links is None.
+    A row changed concurrently with this call may be returned again next time, so
+    callers must apply changes idempotently.
+    """
+    conn = get_connection_manager().reader()
+    # Read the watermark first: anything committed after it is (re)sent next time
+    version = conn.execute("SELECT version FROM sync_state WHERE id = 1").fetchone()[0]
+    if since_version is None:
+        return conn.execute(SELECT_ACCOUNTS_SQL).fetchall(), None, version
+    rows = conn.execute(SELECT_ACCOUNTS_SQL + " WHERE version > ?", (since_version,)).fetchall()
+    deleted = [row[0] for row in conn.execute(
+        "SELECT link FROM account_tombstones WHERE version > ?", (since_version,))]
+    return rows, deleted, version
+
+
+def fetch_schedule_stats(links=None, since=None):
+    """
+    Per-account inputs for the priority scheduler, as
+    (link, followers, category, last_ts, first_ts, min_followers, max_followers) tuples.
+    The last four columns summarize the snapshots taken at or after since (all history
+    when None) and are None for accounts without any. links restricts the result to
+    those accounts (batched like fetch_accounts); None returns every account.
+    """
+    sql = """
+        SELECT a.link, a.followers, a.category, MAX(s.ts), MIN(s.ts), MIN(s.followers), MAX(s.followers)
+        FROM accounts a LEFT JOIN follower_snapshots s ON s.link = a.link AND s.ts >= ?
+    """
+    conn = get_connection_manager().reader()
+    since = since if since is not None else 0
+    if links is None:
+        return conn.execute(sql + " GROUP BY a.id", (since,)).fetchall()
+    links = list(dict.fromkeys(links))
+    rows = []
+    for start in range(0, len(links), MAX_IN_PARAMS):
+        chunk = links[start:start + MAX_IN_PARAMS]
+        placeholders = ",".join("?" * len(chunk))
+        rows.extend(conn.execute(f"{sql} WHERE a.link IN ({placeholders}) GROUP BY a.id", (since, *chunk)).fetchall())
+    return rows
+
+
+def record_snapshots(snapshots):
+    """
+    Append follower observations in one transaction.
+    snapshots is a list of tuples: (link, followers) or (link, followers, unix_ts).
+    """
+    now = int(time.time())
+    rows = [(snap[0], int(snap[2]) if len(snap) > 2 else now, snap[1]) for snap in snapshots]
+    with get_connection_manager().write() as conn:
+        _insert_snapshots(conn, rows)
+
+
+def fetch_snapshots(link, since=None, until=None):
+    """
+    Return the follower history of one account as (ts, followers, resolution) tuples,
+    oldest first, across all retention tiers.
+    """
+    cursor = get_connection_manager().reader().execute("""
+        SELECT ts, followers, resolution FROM follower_snapshots
+        WHERE link = ? AND ts >= ? AND ts <= ?
+        ORDER BY ts
+    """, (link, since if since is not None else 0, until if until is not None else 2**62))
+    return cursor.fetchall()
+
+
+def compact_snapshots(now=None, raw_retention_days=RAW_RETENTION_DAYS, hourly_retention_days=HOURLY_RETENTION_DAYS):
+    """
+    Downsample old history so the table stays small: raw rows older than
+    raw_retention_days become one row per account per hour, and hourly rows older
+    than hourly_retention_days become one row per account per day. Each bucket keeps
+    its latest observation. Runs in a single transaction; returns the rows removed.
+    """
+    now = int(now if now is not None else time.time())
+    tiers = (
+        ("raw", "hour", 3600, raw_retention_days),
+        ("hour", "day", 86400, hourly_retention_days),
+    )
+    removed = 0
+    with get_connection_manager().write() as conn:
+        for source, target, bucket, retention_days in tiers:
+            # Align the cutoff to a bucket boundary so no bucket is split across tiers
+            cutoff = (now - retention_days * 86400) // bucket * bucket
+            # SQLite returns the bare 'followers' column from the row holding MAX(ts)
+            conn.execute("""
+                INSERT OR REPLACE INTO follower_snapshots (link, ts, followers, resolution)
+                SELECT link, (ts / ?) * ?, followers, ?
+                FROM (SELECT link, ts, followers, MAX(ts) FROM follower_snapshots
+                      WHERE resolution = ? AND ts < ?
+                      GROUP BY link, ts / ?)
+            """, (bucket, bucket, target, source, cutoff, bucket))
+            cursor = conn.execute("DELETE FROM follower_snapshots WHERE resolution = ? AND ts < ?", (source, cutoff))
+            removed += cursor.rowcount
+    return removed
+
+
+# Exports read the table in batches of EXPORT_BATCH_ROWS, so memory use does not
+# depend on the number of accounts.
+EXPORT_BATCH_ROWS = 1000
+EXPORT_FIELDS = ("name", "link", "platform", "followers", "category")
+EXPORT_ZSTD_LEVEL = 3
+
+
+def iter_accounts(batch_size=EXPORT_BATCH_ROWS):
+    """
+    Yield all accounts as lists of up to batch_size (name, link, platform, followers,
+    category) rows, streamed from one cursor instead of loaded with fetchall().
+    """
+    cursor = get_connection_manager().reader().execute(SELECT_ACCOUNTS_SQL + " ORDER BY id")
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close() # Ends the read transaction even if the consumer stops early
+
+
+def _open_export_file(file_path):
+    """Text stream for an export file; paths ending in .zst are zstd-compressed."""
+    if not file_path.lower().endswith(".zst"):
+        return open(file_path, "w", newline="", encoding="utf-8")
+    if zstandard is None:
+        raise RuntimeError("The zstandard package is required for .zst exports.")
+    raw = open(file_path, "wb")
+    # Closing the text wrapper closes the compressor, which writes the frame end and closes raw
+    compressed = zstandard.ZstdCompressor(level=EXPORT_ZSTD_LEVEL).stream_writer(raw)
+    return io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+
+
+def export_csv_to_file(file_path, progress=None):
+    """
+    Stream every account to file_path and return the number of rows written.
+    The format follows the extension: .ndjson/.jsonl write one JSON object per line,
+    anything else writes CSV; a trailing .zst (e.g. accounts.ndjson.zst) compresses
+    the output with zstd. progress, if given, is called as progress(rows_written, total)
+    after every batch.
+    """
+    base = file_path.lower().removesuffix(".zst")
+    ndjson = base.endswith((".ndjson", ".jsonl"))
+    total = count_accounts()
+    written = 0
+    with _open_export_file(file_path) as out:
+        writer = None
+        if not ndjson:
+            writer = csv.writer(out)
+            writer.writerow(["Name", "Link", "Platform", "Followers", "Category"])
+        for rows in iter_accounts():
+            if ndjson:
+                out.writelines(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + "\n" for row in rows)
+            else:
+                writer.writerows(rows)
+            written += len(rows)
+            if progress:
+                progress(written, total)
+    return written
 
 def auto_detect_platform(link):
     # ... (existing auto_detect_platform function) ...
@@ -0,0 +1,206 @@
+# engine.py
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper.circuit import is_local_error
+from scraper.http_client import DEFAULT_HEADERS, HttpFetchError, resolve_url
+
+# aiohttp is optional: with it the HTTP tier runs natively on the event loop; without it
+# the HTTP tier is bridged through a dedicated thread pool instead.
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Maximum number of fast-path requests in flight per platform on the event loop. With a
+# rate limiter the platform's AIMD window (at most its max_limit) is the tighter bound.
+DEFAULT_PLATFORM_LIMITS = {
+    "instagram": 25,
+    "tiktok": 100,
+    "twitter": 100,
+}
+
+
+class AsyncScrapeEngine:
+    """
+    asyncio-based alternative to the Controller's ThreadPoolExecutor fan-out.
+
+    Every account becomes a coroutine on one event loop. The HTTP fast path runs
+    on the loop (aiohttp when installed), gated by a per-platform semaphore, so
+    hundreds of requests can be in flight without an OS thread each. With a rate
+    limiter, each platform's AIMD window caps that instead (a few dozen at most), and
+    a fast-path request holds its slot only while it runs. Only accounts whose fast
+    path fails are bridged to a small thread pool that runs the Selenium-based tiers
+    (``Scraper.scrape_fallback``).
+    """
+
+    def __init__(self, scrapers, categorize, platform_limits=None, browser_workers=5, http_workers=32, http_timeout=15,
+                 rate_limiter=None, single_flight=None):
+        """
+        Args:
+            scrapers (dict): Platform name -> Scraper instance.
+            categorize (callable): Maps a follower count to a category string.
+            platform_limits (dict): Platform name -> max concurrent scrapes on the loop.
+            browser_workers (int): Threads available for Selenium fallbacks.
+            http_workers (int): Threads used for the HTTP tier when aiohttp is missing.
+            http_timeout (int): Total timeout in seconds for one fast-path request.
+            rate_limiter (RateLimiterRegistry): Optional per-platform token buckets and
+                AIMD windows; each scrape waits for a slot and reports its outcome.
+            single_flight (SingleFlight): Optional; a link that is already being scraped
+                elsewhere (any tier, any engine) joins that scrape instead of starting one.
+        """
+        self.scrapers = scrapers
+        self.categorize = categorize
+        self.platform_limits = dict(DEFAULT_PLATFORM_LIMITS, **(platform_limits or {}))
+        self.browser_workers = browser_workers
+        self.http_workers = http_workers
+        self.http_timeout = http_timeout
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+
+    def run(self, accounts, on_result):
+        """
+        Scrape ``accounts`` (name, link, platform, followers, category tuples) and call
+        ``on_result(account, scraped_data)`` in the calling thread as each finishes.
+        scraped_data is (name, link, platform, followers, category), with category
+        "failed" when every tier failed, or None when no local browser was free in
+        time (the account's previous row should be kept). Blocks until all accounts are done.
+        """
+        if accounts:
+            asyncio.run(self._run_all(accounts, on_result))
+
+    async def _run_all(self, accounts, on_result):
+        semaphores = {platform: asyncio.Semaphore(limit) for platform, limit in self.platform_limits.items()}
+        browser_pool = ThreadPoolExecutor(max_workers=self.browser_workers, thread_name_prefix="browser")
+        http_pool = None if aiohttp else ThreadPoolExecutor(max_workers=self.http_workers, thread_name_prefix="http")
+        sessions = {}
+        try:
+            tasks = [asyncio.ensure_future(self._scrape(acc, semaphores, sessions, http_pool, browser_pool))
+                     for acc in accounts]
+            for task in asyncio.as_completed(tasks):
+                account, scraped_data = await task
+                try:
+                    on_result(account, scraped_data)
+                except Exception as e:
+                    print(f"AsyncScrapeEngine: Result handler failed for {account[1]}: {e}", file=sys.stderr)
+        finally:
+            for session in sessions.values():
+                await session.close()
+            browser_pool.shutdown(wait=True)
+            if http_pool:
+                http_pool.shutdown(wait=True)
+
+    async def _scrape(self, account, semaphores, sessions, http_pool, browser_pool):
+        """Scrape one account, or join a scrape of the same link already in flight anywhere."""
+        name, link, platform, _, _ = account
+        scraper = self.scrapers.get(platform)
+        if scraper is None:
+            print(f"AsyncScrapeEngine: Scraper not found for platform {platform} for link {link}. Marking as failed.", file=sys.stderr)
+            return account, (name, link, platform, 0, "failed")
+
+        future, leader = self.single_flight.begin(link) if self.single_flight else (None, True)
+        try:
+            if leader:
+                followers = await self._scrape_tiers(scraper, link, semaphores, sessions, http_pool, browser_pool)
+            else:
+                print(f"AsyncScrapeEngine: {link} is already being scraped; joining that scrape.")
+                followers = await asyncio.wrap_future(future)
+        except BaseException as e:
+            if future is not None and leader:
+                self.single_flight.finish(link, future, error=e) # Never leave joiners waiting
+            if not isinstance(e, Exception):
+                raise
+            if is_local_error(e):
+                print(f"AsyncScrapeEngine: No browser free for {link}; keeping its previous result.", file=sys.stderr)
+                return account, None
+            print(f"AsyncScrapeEngine: Scraping failed for {link} (platform: {platform}): {e}", file=sys.stderr)
+            return account, (name, link, platform, 0, "failed")
+        if future is not None and leader:
+            self.single_flight.finish(link, future, followers)
+        return account, (name, link, platform, followers, self.categorize(followers))
+
+    async def _scrape_tiers(self, scraper, link, semaphores, sessions, http_pool, browser_pool):
+        """Fast path on the loop; if it fails, the Selenium tiers in the browser pool."""
+        try:
+            followers = await self._scrape_fast_path(scraper, link, semaphores, sessions, http_pool)
+            print(f"AsyncScrapeEngine: Fast HTTP path succeeded for {link}: {followers} followers.")
+            return followers
+        except Exception as e:
+            print(f"AsyncScrapeEngine: Fast HTTP path failed for {link}: {e}. Bridging to browser pool.")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(browser_pool, self._scrape_fallback, scraper, link)
+
+    async def _scrape_fast_path(self, scraper, link, semaphores, sessions, http_pool):
+        """
+        The HTTP tier under the platform's semaphore and, with a rate limiter, one of
+        its AIMD slots. The slot is given back as soon as the request is done, so it is
+        never held while a fallback waits for a browser.
+        """
+        platform = scraper.platform
+        semaphore = semaphores.setdefault(platform, asyncio.Semaphore(self.platform_limits.get(platform, 10)))
+        limiter = self.rate_limiter.get(platform) if self.rate_limiter else None
+        if limiter:
+            await limiter.acquire_async()
+        start = time.monotonic()
+        error = None
+        try:
+            async with semaphore:
+                if http_pool is None:
+                    return await self._fetch_http(scraper, link, sessions)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(http_pool, scraper.scrape_http, link)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if limiter:
+                limiter.release(time.monotonic() - start, error)
+
+    def _scrape_fallback(self, scraper, link):
+        """
+        The fallback tiers, run in a browser pool thread. With a rate limiter, a
+        fallback that always needs a browser gets its driver pinned first and takes the
+        platform slot only once it is in hand, like Controller._scrape_link does for
+        batches; other fallbacks lease a browser only if they reach their browser tier.
+        """
+        if self.rate_limiter is None:
+            return scraper.scrape_fallback(link)
+        with scraper.batch_session():
+            if scraper.fallback_needs_browser:
+                scraper.pin_browser()
+            with self.rate_limiter.slot(scraper.platform):
+                return scraper.scrape_fallback(link)
+
+    async def _fetch_http(self, scraper, link, sessions):
+        """
+        Fetch the profile with aiohttp on a per-platform keep-alive session and extract
+        the count, through the same circuit breaker as Scraper.scrape_http.
+        """
+        breaker = scraper.breaker("http")
+        breaker.allow()
+        try:
+            followers = await self._fetch_and_extract(scraper, link, sessions)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return followers
+
+    async def _fetch_and_extract(self, scraper, link, sessions):
+        session = sessions.get(scraper.platform)
+        if session is None:
+            connector = aiohttp.TCPConnector(limit=self.platform_limits.get(scraper.platform, 10))
+            session = aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector,
+                                            timeout=aiohttp.ClientTimeout(total=self.http_timeout))
+            sessions[scraper.platform] = session
+        url = resolve_url(scraper.profile_url(link))
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise HttpFetchError(f"HTTP {response.status} from {url}")
+                html = await response.text()
+        except aiohttp.ClientError as e:
+            raise HttpFetchError(f"HTTP request to {url} failed: {e}") from e
+        return scraper.extract_from_html(html, link)
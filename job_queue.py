@@ -0,0 +1,203 @@
+# job_queue.py
+import os
+import socket
+import time
+
+from database import get_connection_manager, UPSERT_ACCOUNT_SQL, _insert_snapshots, _snapshot_rows
+
+# A claimed job belongs to its worker for LEASE_SECONDS; workers extend the lease with
+# heartbeats while they scrape. A job whose lease runs out (crashed or hung worker) is
+# put back in the queue and retried by whichever worker claims it next.
+LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30  # Failed attempt n is retried after RETRY_BASE_SECONDS * 2**(n-1)
+FINISHED_RETENTION_DAYS = 7
+
+
+def default_worker_id():
+    """host:pid, unique across the processes sharing one database."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(links, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Queue one scrape job per link. A link that already has a queued or leased job is
+    not queued twice. Returns {link: job_id}, including the ids of those existing jobs.
+    """
+    now = time.time()
+    jobs = {}
+    with get_connection_manager().write() as conn:
+        for link in dict.fromkeys(links):
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO scrape_jobs (link, priority, max_attempts, available_at, enqueued_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (link, priority, max_attempts, now, now))
+            if cursor.rowcount:
+                jobs[link] = cursor.lastrowid
+            else:
+                jobs[link] = conn.execute(
+                    "SELECT id FROM scrape_jobs WHERE link = ? AND state IN ('queued', 'leased')", (link,)).fetchone()[0]
+    return jobs
+
+
+def claim(worker_id, limit=1, lease_seconds=LEASE_SECONDS, now=None):
+    """
+    Lease up to limit runnable jobs to worker_id, highest priority and oldest first.
+    Expired leases are released before claiming. Returns [(job_id, link, attempt)].
+    """
+    now = now if now is not None else time.time()
+    if limit <= 0:
+        return []
+    with get_connection_manager().write() as conn:
+        # Take the write lock before reading, so two processes never lease the same job
+        conn.execute("BEGIN IMMEDIATE")
+        _release_expired(conn, now)
+        rows = conn.execute("""
+            SELECT id, link, attempts FROM scrape_jobs
+            WHERE state = 'queued' AND available_at <= ?
+            ORDER BY priority DESC, available_at, id
+            LIMIT ?
+        """, (now, limit)).fetchall()
+        conn.executemany("""
+            UPDATE scrape_jobs SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1
+            WHERE id = ?
+        """, [(worker_id, now + lease_seconds, job_id) for job_id, _, _ in rows])
+    return [(job_id, link, attempts + 1) for job_id, link, attempts in rows]
+
+
+def _release_expired(conn, now):
+    """Requeue jobs whose lease ran out; jobs out of attempts become dead and their accounts failed."""
+    conn.execute("""
+        UPDATE accounts SET followers = 0, category = 'failed'
+        WHERE link IN (SELECT link FROM scrape_jobs
+                       WHERE state = 'leased' AND lease_expires < ? AND attempts >= max_attempts)
+    """, (now,))
+    conn.execute("""
+        UPDATE scrape_jobs
+        SET state = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+            finished_at = CASE WHEN attempts >= max_attempts THEN ? END,
+            error = 'lease expired (worker ' || worker || ')',
+            worker = NULL, lease_expires = NULL, available_at = ?
+        WHERE state = 'leased' AND lease_expires < ?
+    """, (now, now, now))
+
+
+def heartbeat(worker_id, job_ids, lease_seconds=LEASE_SECONDS):
+    """Extend the leases worker_id still holds. Returns the ids whose lease was extended."""
+    expires = time.time() + lease_seconds
+    held = []
+    with get_connection_manager().write() as conn:
+        for job_id in job_ids:
+            cursor = conn.execute("""
+                UPDATE scrape_jobs SET lease_expires = ?
+                WHERE id = ? AND worker = ? AND state = 'leased'
+            """, (expires, job_id, worker_id))
+            if cursor.rowcount:
+                held.append(job_id)
+    return held
+
+
+def worker_alive(worker_id, ttl=LEASE_SECONDS, now=None):
+    """
+    Record that worker_id is running, for the next ttl seconds. Workers call this on
+    start and with every heartbeat, like a lease on the worker itself.
+    """
+    now = time.time() if now is None else now
+    with get_connection_manager().write() as conn:
+        conn.execute("INSERT OR REPLACE INTO scrape_workers (worker, alive_until) VALUES (?, ?)",
+                     (worker_id, now + ttl))
+
+
+def worker_stopped(worker_id):
+    """Forget a worker that shut down cleanly."""
+    with get_connection_manager().write() as conn:
+        conn.execute("DELETE FROM scrape_workers WHERE worker = ?", (worker_id,))
+
+
+def live_workers(now=None):
+    """
+    Ids of the workers whose check-in or job lease has not run out. An empty list
+    means nothing will scrape newly queued jobs.
+    """
+    now = time.time() if now is None else now
+    rows = get_connection_manager().reader().execute("""
+        SELECT worker FROM scrape_workers WHERE alive_until >= ?
+        UNION
+        SELECT worker FROM scrape_jobs WHERE state = 'leased' AND lease_expires >= ?
+    """, (now, now))
+    return sorted(worker for worker, in rows)
+
+
+def ack(job_id, worker_id, account_row=None):
+    """
+    Complete a job and, in the same transaction, store its result row
+    (name, link, platform, followers, category). Returns False, writing nothing, if
+    worker_id no longer holds the lease (it expired and the job was handed on).
+    """
+    with get_connection_manager().write() as conn:
+        cursor = conn.execute("""
+            UPDATE scrape_jobs SET state = 'done', finished_at = ?, lease_expires = NULL, error = NULL
+            WHERE id = ? AND worker = ? AND state = 'leased'
+        """, (time.time(), job_id, worker_id))
+        if not cursor.rowcount:
+            return False
+        if account_row is not None:
+            conn.execute(UPSERT_ACCOUNT_SQL, account_row)
+            _insert_snapshots(conn, _snapshot_rows([account_row]))
+    return True
+
+
+def fail(job_id, worker_id, error, retry=True, now=None):
+    """
+    Record a failed attempt. The job is requeued with exponential backoff while it has
+    attempts left (and retry is True); otherwise it becomes dead and its account is
+    marked failed. Returns the new state, or None if the lease was already lost.
+    """
+    now = now if now is not None else time.time()
+    with get_connection_manager().write() as conn:
+        row = conn.execute("""
+            SELECT link, attempts, max_attempts FROM scrape_jobs
+            WHERE id = ? AND worker = ? AND state = 'leased'
+        """, (job_id, worker_id)).fetchone()
+        if row is None:
+            return None
+        link, attempts, max_attempts = row
+        if retry and attempts < max_attempts:
+            conn.execute("""
+                UPDATE scrape_jobs SET state = 'queued', worker = NULL, lease_expires = NULL,
+                    available_at = ?, error = ?
+                WHERE id = ?
+            """, (now + RETRY_BASE_SECONDS * 2 ** (attempts - 1), str(error), job_id))
+            return "queued"
+        conn.execute("""
+            UPDATE scrape_jobs SET state = 'dead', worker = NULL, lease_expires = NULL, finished_at = ?, error = ?
+            WHERE id = ?
+        """, (now, str(error), job_id))
+        conn.execute("UPDATE accounts SET followers = 0, category = 'failed' WHERE link = ?", (link,))
+        return "dead"
+
+
+def job_states(job_ids):
+    """{job_id: state} for the given jobs."""
+    conn = get_connection_manager().reader()
+    states = {}
+    job_ids = list(job_ids)
+    for start in range(0, len(job_ids), 500):
+        chunk = job_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        states.update(conn.execute(f"SELECT id, state FROM scrape_jobs WHERE id IN ({placeholders})", chunk))
+    return states
+
+
+def queue_stats():
+    """Number of jobs per state, e.g. {'queued': 120, 'leased': 8, 'done': 5400}."""
+    return dict(get_connection_manager().reader().execute(
+        "SELECT state, COUNT(*) FROM scrape_jobs GROUP BY state"))
+
+
+def purge_finished(older_than_days=FINISHED_RETENTION_DAYS):
+    """Delete done and dead jobs that finished more than older_than_days ago. Returns the rows removed."""
+    cutoff = time.time() - older_than_days * 86400
+    with get_connection_manager().write() as conn:
+        return conn.execute("DELETE FROM scrape_jobs WHERE state IN ('done', 'dead') AND finished_at < ?",
+                            (cutoff,)).rowcount
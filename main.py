@@ -1,30 +1,91 @@
 # main.py
 import tkinter as tk
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from database import init_db, upsert_account, delete_account, fetch_all_accounts, bulk_upsert_accounts, auto_detect_platform, export_csv_to_file
+from concurrent.futures import Future, ThreadPoolExecutor
+from database import DB_PATH, init_db, upsert_account, delete_account, fetch_all_accounts, fetch_account, fetch_accounts, fetch_last_scraped, fetch_changes, count_accounts, fetch_all_links, fetch_window, bulk_upsert_accounts, auto_detect_platform, export_csv_to_file, compact_snapshots, determine_category, close_db
 from scheduler import ScrapeScheduler
 from scraper.instagram import InstagramScraper
 from scraper.tiktok import TikTokScraper
 from scraper.x_twitter import XTwitterScraper
+from scraper.driver_pool import shutdown_all_pools
+from scraper.network_profile import page_weight_stats
+from scraper.waits import wait_stats
+from scraper.circuit import circuit_stats, is_local_error, set_state_dir
+from scraper.strategies import strategy_stats
+from scraper.ratelimit import RateLimiterRegistry
+from engine import AsyncScrapeEngine
+from write_buffer import WriteBehindBuffer
+from singleflight import SingleFlight
+from priority_scheduler import PriorityScheduler
+from job_queue import enqueue, job_states, live_workers, queue_stats, purge_finished
 from ui import AppUI
 import csv
+import functools
+import os
+from contextlib import closing
+import queue
 import random
 import time
 import sys # Import sys for better error handling/feedback
 from tkinter import filedialog # Import filedialog for file dialog operations
 import threading # Import threading for _scrape_and_update_single_account
 
+# Scrape engines a run can use: the classic thread fan-out, the asyncio engine, or the
+# durable job queue served by separate worker processes (worker.py)
+ENGINES = ("threads", "asyncio", "queue")
+
+# How often a "queue" run checks on its jobs, and how long it waits for the workers
+QUEUE_POLL_SECONDS = 2
+QUEUE_WAIT_SECONDS = 30 * 60
+
+# A successful result younger than this (seconds, per platform) is served instead of
+# scraping again, unless the caller forces a scrape. Instagram is the most rate-limited.
+FRESHNESS_TTL_SECONDS = {
+    "instagram": 30 * 60,
+    "tiktok": 10 * 60,
+    "twitter": 10 * 60,
+}
+
+# Streaming CSV import: rows are parsed and written IMPORT_CHUNK_ROWS at a time and
+# scraped one chunk at a time by a single runner thread (_run_scrapes parallelizes
+# within the chunk); at most IMPORT_QUEUE_CHUNKS parsed chunks wait before reading pauses.
+IMPORT_CHUNK_ROWS = 500
+IMPORT_QUEUE_CHUNKS = 2
+
+# Accounts left without a result because no local browser was free are scraped again
+# after the run, once its drivers are back in the pool, up to this many times
+DEFERRED_RETRY_ROUNDS = 2
+
 class Controller:
-    def __init__(self, root):
+    def __init__(self, root, engine_mode="threads"):
         init_db()
+        set_state_dir(os.path.dirname(os.path.abspath(DB_PATH))) # Circuit state lives beside the database
         self.scrapers = {
             "instagram": InstagramScraper(),
             "tiktok":    TikTokScraper(),
             "twitter":   XTwitterScraper()
         }
+        # Scrape results are written in batched transactions instead of one commit per account
+        self.write_buffer = WriteBehindBuffer()
+        # Per-platform token buckets and adaptive (AIMD) concurrency windows
+        self.rate_limiter = RateLimiterRegistry()
+        # Default engine for update/import runs; each run may override it
+        self.engine_mode = engine_mode
+        # Concurrent scrapes of the same account (keyed by canonical link) share one browser run
+        self.single_flight = SingleFlight()
+        # Per-platform freshness TTLs; adjust at runtime to serve cached results longer or shorter
+        self.freshness_ttl = dict(FRESHNESS_TTL_SECONDS)
+        self.async_engine = AsyncScrapeEngine(self.scrapers, self._determine_category,
+                                              rate_limiter=self.rate_limiter, single_flight=self.single_flight)
         self.ui = AppUI(root, self)
-        # Initialize scheduler with a default interval of 60 minutes
-        self.scheduler = ScrapeScheduler(self.update_all, interval_minutes=60)
+        # Instead of re-scraping everything every 60 minutes, scrape a steady trickle of
+        # the most overdue accounts each minute (due times follow tier and volatility).
+        # Due accounts are forced: the scheduler already decided they need a scrape, and
+        # the freshness TTL would otherwise skip those whose interval is shorter than it.
+        self.priority_scheduler = PriorityScheduler(lambda links: self.update_selected(links, force=True),
+                                                    tick_seconds=60)
+        self.scheduler = ScrapeScheduler(self.priority_scheduler.tick, interval_minutes=1)
+        # Downsample old follower history (raw -> hourly -> daily) every 6 hours
+        self.scheduler.add_job(self.compact_history, interval_minutes=6 * 60, job_id='compact_snapshots')
         self.scheduler.start()
 
         # Set up cleanup for when the window is closed
@@ -34,30 +95,41 @@ class Controller:
         """
         Handle application shutdown.
         This method is called when the Tkinter window is closed.
-        It ensures the background scheduler is shut down cleanly.
-        Individual scraper drivers (like for XTwitterScraper or TikTokScraper)
-        are managed
+        It ensures the background scheduler is shut down cleanly, that the
+        pooled scraper browsers are quit and that the database connections are closed.
         """
         print("Shutting down scheduler...")
         self.scheduler.shutdown()
-        # Optionally, close any persistent scraper drivers here if they exist
-        # For example:
-        # if hasattr(self.scrapers.get("x_twitter"), 'driver') and self.scrapers["x_twitter"].driver:
-        #     self.scrapers["x_twitter"].driver.quit()
+        print("Shutting down browser pools...")
+        shutdown_all_pools()
+        print("Flushing pending results...")
+        try:
+            self.write_buffer.close()
+        except RuntimeError as e:
+            print(f"Controller: {e}", file=sys.stderr)
+            tk.messagebox.showerror("Shutdown Error", str(e))
+        close_db()
         print("Application closing.")
         self.ui.root.destroy()
         sys.exit(0) # Ensure the application exits cleanly
 
-    def add_account(self, name, link, platform):
+    def add_account(self, name, link, platform, force=False):
         """
         Adds a new account to the database and attempts to scrape it.
-        Includes strict platform validation.
+        Includes strict platform validation. Re-adding an account that was scraped
+        within its platform's freshness TTL returns the stored record unless force is set.
+        Called from a background thread (see AppUI.on_add); dialogs and the table
+        refresh are handed to the Tk thread.
+
+        Returns:
+            Future: Resolves to the account's final (name, link, platform, followers, category)
+            record once its scrape has been written, or None if the account was rejected.
         """
         print(f"Controller: Attempting to add account: Name='{name}', Link='{link}', Platform='{platform}'")
         
         # 1. Validate the selected platform itself
         if platform.lower() not in self.scrapers:
-            tk.messagebox.showerror("Platform Error", f"Unsupported platform selected: '{platform}'. Please choose from Instagram, TikTok, or Twitter.")
+            self._show_error("Platform Error", f"Unsupported platform selected: '{platform}'. Please choose from Instagram, TikTok, or Twitter.")
             print(f"Controller: Add failed - Unsupported platform selected: {platform}", file=sys.stderr)
             return
 
@@ -66,7 +138,7 @@ class Controller:
         
         # 3. Compare selected platform with detected platform
         if detected_platform and detected_platform.lower() != platform.lower():
-            tk.messagebox.showerror("Platform Mismatch", f"The link '{link}' appears to be for '{detected_platform}', but you selected '{platform}'. Please correct the platform selection.")
+            self._show_error("Platform Mismatch", f"The link '{link}' appears to be for '{detected_platform}', but you selected '{platform}'. Please correct the platform selection.")
             print(f"Controller: Add failed - Platform mismatch: Link detected as '{detected_platform}', selected as '{platform}'", file=sys.stderr)
             return
         
@@ -78,26 +150,52 @@ class Controller:
             return
 
         try:
+            if not force and link in self._fresh_links([link]):
+                print(f"Controller: {link} was scraped recently; serving the stored result.")
+                future = Future()
+                future.set_result(fetch_account(link))
+                return future
+
+            # A buffered result of an earlier scrape must not overwrite the re-added account
+            self.write_buffer.discard(link)
             # Add with initial placeholder data
             upsert_account(name, link, platform, 0, "pending")
-            self.ui.refresh() # Refresh UI to show the new 'pending' account immediately
+            self.ui.root.after(0, self.ui.refresh) # Refresh UI to show the new 'pending' account immediately
 
             # Scrape the newly added account in a separate thread
-            threading.Thread(target=self._scrape_and_update_single_account, args=(link,)).start()
+            return self.submit_scrape(link)
             
         except Exception as e:
             print(f"Controller: Error adding or initiating scrape for account {name}: {e}", file=sys.stderr)
-            tk.messagebox.showerror("Error", f"Failed to add account: {e}")
+            self._show_error("Error", f"Failed to add account: {e}")
+            return None
+
+    def _show_error(self, title, message):
+        """Shows an error dialog on the Tk thread, whichever thread reports it."""
+        self.ui.root.after(0, lambda: tk.messagebox.showerror(title, message))
 
-    def _scrape_and_update_single_account(self, link):
+    def submit_scrape(self, link):
+        """
+        Scrapes one stored account in a background thread.
+        Returns a concurrent.futures.Future that resolves to the account's record as
+        written to the database (or raises what went wrong), so callers can attach a
+        completion callback instead of polling the table.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        threading.Thread(target=self._scrape_and_update_single_account, args=(link, future), daemon=True).start()
+        return future
+
+    def _scrape_and_update_single_account(self, link, future=None):
         """
         Internal helper to scrape a single account by its link and update the DB.
-        Designed to be run in a separate thread.
+        Designed to be run in a separate thread. If a future is given it is resolved
+        with the account's final record once the result has been written.
         """
+        error = None
         try:
-            # Fetch the account details from DB to get name and platform
-            all_accounts = fetch_all_accounts()
-            account_to_scrape = next((acc for acc in all_accounts if acc[1] == link), None)
+            # Fetch the account details from DB to get name and platform (indexed point lookup)
+            account_to_scrape = fetch_account(link)
 
             if account_to_scrape:
                 name, link, platform, _, _ = account_to_scrape
@@ -108,23 +206,37 @@ class Controller:
                 if scraper:
                     print(f"Controller: Scraping {platform} account: {link}")
                     try:
-                        followers = scraper.scrape(link)
+                        # Joins a scrape of the same account already running elsewhere
+                        followers = self.single_flight.do(link, scraper.scrape, link)
                         category = self._determine_category(followers)
                         upsert_account(name, link, platform, followers, category)
                         print(f"Controller: Successfully scraped {name} ({platform}): {followers} followers, category {category}")
                     except Exception as scrape_e:
-                        print(f"Controller: Scraping failed for {link}: {scrape_e}", file=sys.stderr)
-                        upsert_account(name, link, platform, 0, "failed") # Mark as failed
+                        if is_local_error(scrape_e):
+                            # Says nothing about the account; its row stays as it was
+                            print(f"Controller: No browser free for {link}; keeping its previous result.", file=sys.stderr)
+                        else:
+                            print(f"Controller: Scraping failed for {link}: {scrape_e}", file=sys.stderr)
+                            upsert_account(name, link, platform, 0, "failed") # Mark as failed
                 else:
                     # This block should ideally not be hit if initial validation is robust.
                     print(f"Controller: Unexpected: Scraper not found for platform {platform} for link {link}. Marking as failed.", file=sys.stderr)
                     upsert_account(name, link, platform, 0, "failed") # Fallback to generic failed
             else:
                 print(f"Controller: Account with link {link} not found for scraping.", file=sys.stderr)
+                error = LookupError(f"Account with link {link} not found.")
         except Exception as e:
             print(f"Controller: Unexpected error in _scrape_and_update_single_account for {link}: {e}", file=sys.stderr)
+            error = e
         finally:
             self.ui.root.after(0, self.ui.refresh) # Always refresh UI on main thread after attempt
+            if future is not None:
+                try:
+                    if error is not None:
+                        raise error
+                    future.set_result(fetch_account(link))
+                except Exception as e:
+                    future.set_exception(e)
 
     def delete_account(self, link):
         """
@@ -132,6 +244,7 @@ class Controller:
         """
         print(f"Controller: Deleting account with link: {link}")
         try:
+            self.write_buffer.discard(link) # A buffered result would bring the account back
             delete_account(link)
             self.ui.refresh()
             print(f"Controller: Account {link} deleted successfully.")
@@ -144,59 +257,49 @@ class Controller:
         Determines the category based on the number of followers.
         Corrected to include all categories: mega, macro, mid, micro, nano.
         """
-        if followers >= 100000:
-            return "macro"
-        else:
-            return "micro"
+        return determine_category(followers)
 
-    def update_all(self):
+    def update_all(self, engine=None, force=False):
         """
         Fetches all accounts and initiates scraping for each, updating their data.
-        This is typically called by the scheduler.
+        A full sweep; the background schedule uses the PriorityScheduler's trickle instead.
+        engine: "threads" or "asyncio"; defaults to self.engine_mode.
+        force: Also scrape accounts whose last result is still fresh.
         """
         print("Controller: Initiating update for all accounts...")
-        accounts_to_update = fetch_all_accounts()
+        accounts_to_update = self._skip_fresh(fetch_all_accounts(), force)
         if not accounts_to_update:
             print("Controller: No accounts to update.")
             return
 
-        updated_count = 0
-        failed_count = 0
-        
-        # Using ThreadPoolExecutor for concurrent scraping
-        # Max 5 workers to avoid overwhelming the system or rate limits
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_account = {executor.submit(self._scrape_single_account_data, acc): acc for acc in accounts_to_update}
-            for future in as_completed(future_to_account):
-                original_account = future_to_account[future]
-                name, link, platform, _, _ = original_account
-                try:
-                    scraped_data = future.result()
-                    if scraped_data:
-                        # Unpack scraped_data which should be (name, link, platform, followers, category)
-                        # Ensure scraped_data contains all necessary fields for upsert_account
-                        upsert_account(*scraped_data)
-                        updated_count += 1
-                        print(f"Controller: Updated {name} ({platform}) with {scraped_data[3]} followers.")
-                    else:
-                        # If scrape_single_account_data returns None or indicates failure, mark as failed
-                        upsert_account(name, link, platform, 0, "failed")
-                        failed_count += 1
-                        print(f"Controller: Failed to scrape or update {name} ({platform}).")
+        counts = {"updated": 0, "failed": 0, "deferred": 0}
 
-                except Exception as e:
-                    print(f"Controller: Error processing {name} ({link}): {e}", file=sys.stderr)
-                    upsert_account(name, link, platform, 0, "failed") # Mark as failed in DB
-                    failed_count += 1
+        def handle_result(original_account, scraped_data):
+            name, link, platform, _, _ = original_account
+            if scraped_data:
+                # scraped_data is (name, link, platform, followers, category); buffered for a batched write
+                self.write_buffer.add(scraped_data)
+                counts["failed" if scraped_data[4] == "failed" else "updated"] += 1
+                print(f"Controller: Updated {name} ({platform}) with {scraped_data[3]} followers.")
+            else:
+                # No local browser was free: keep the previous row, the next run retries it
+                counts["deferred"] += 1
+                print(f"Controller: No browser free for {name} ({platform}); keeping its previous result.")
+
+        self._run_scrapes(accounts_to_update, handle_result, engine)
+        self.write_buffer.flush() # Make the results visible before the UI refresh
         
-        print(f"Controller: All accounts update finished. Updated: {updated_count}, Failed: {failed_count}.")
+        print(f"Controller: All accounts update finished. Updated: {counts['updated']}, Failed: {counts['failed']}, "
+              f"Deferred: {counts['deferred']}.")
         self.ui.root.after(0, self.ui.refresh) # Refresh UI on main thread after all updates
 
-    def update_selected(self, links_to_update):
+    def update_selected(self, links_to_update, engine=None, force=False):
         """
         Updates only the accounts specified by their links.
         This is called by the UI when 'Update Data' button is clicked.
         Includes platform validation for each selected link.
+        engine: "threads" or "asyncio"; defaults to self.engine_mode.
+        force: Also scrape accounts whose last result is still fresh ('Force Update').
         """
         print(f"Controller: Initiating update for selected accounts: {links_to_update}...")
         if not links_to_update:
@@ -204,10 +307,11 @@ class Controller:
             return
 
         accounts_to_scrape = []
-        all_current_accounts = fetch_all_accounts()
+        # One batched, indexed lookup for all selected links instead of a full table scan per link
+        accounts_by_link = {acc[1]: acc for acc in fetch_accounts(links_to_update)}
         
         for link in links_to_update:
-            account = next((acc for acc in all_current_accounts if acc[1] == link), None)
+            account = accounts_by_link.get(link)
             if account:
                 name, current_link, current_platform, _, _ = account
                 detected_platform = auto_detect_platform(current_link)
@@ -219,7 +323,7 @@ class Controller:
                     #                          f"Detected platform '{detected_platform}' does not match stored platform '{current_platform}'.")
                     print(f"Controller: Skipping update for {name} due to platform mismatch: Link detected as '{detected_platform}', stored as '{current_platform}'", file=sys.stderr)
                     # Mark as failed_platform in DB if it was previously valid, or just skip
-                    upsert_account(name, current_link, current_platform, 0, "failed_platform")
+                    self.write_buffer.add((name, current_link, current_platform, 0, "failed_platform"))
                     continue # Skip this account for scraping
                 
                 # If the stored platform is not in supported scrapers, mark as failed_platform
@@ -228,50 +332,244 @@ class Controller:
                     #                          f"Skipping update for '{name}' (Link: {current_link}). "
                     #                          f"Stored platform '{current_platform}' is not supported for scraping.")
                     print(f"Controller: Skipping update for {name} due to unsupported stored platform: {current_platform}", file=sys.stderr)
-                    upsert_account(name, current_link, current_platform, 0, "failed_platform")
+                    self.write_buffer.add((name, current_link, current_platform, 0, "failed_platform"))
                     continue # Skip this account for scraping
 
                 accounts_to_scrape.append(account)
             else:
                 print(f"Controller: Account with link {link} not found in database for selected update. Skipping.", file=sys.stderr)
 
+        accounts_to_scrape = self._skip_fresh(accounts_to_scrape, force)
         if not accounts_to_scrape:
             print("Controller: No valid accounts found for selected update after validation.")
             self.ui.root.after(0, self.ui.refresh) # Refresh UI even if no accounts to update
             return
 
-        updated_count = 0
-        failed_count = 0
+        counts = {"updated": 0, "failed": 0, "deferred": 0}
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_account = {executor.submit(self._scrape_single_account_data, acc): acc for acc in accounts_to_scrape}
-            for future in as_completed(future_to_account):
-                original_account = future_to_account[future]
-                name, link, platform, _, _ = original_account # Unpack for logging/error handling
-                try:
-                    scraped_data = future.result() # This will be (name, link, platform, followers, category) or None
-                    if scraped_data:
-                        upsert_account(*scraped_data)
-                        updated_count += 1
-                        print(f"Controller: Updated selected account {name} ({platform}) with {scraped_data[3]} followers.")
-                    else:
-                        # If scrape_single_account_data returns None, it means scraping failed
-                        upsert_account(name, link, platform, 0, "failed") # Mark as failed
-                        failed_count += 1
-                        print(f"Controller: Failed to scrape or update selected account {name} ({platform}).")
-                except Exception as e:
-                    print(f"Controller: Error processing selected account {name} ({link}): {e}", file=sys.stderr)
-                    upsert_account(name, link, platform, 0, "failed") # Mark as failed
-                    failed_count += 1
+        def handle_result(original_account, scraped_data):
+            name, link, platform, _, _ = original_account # Unpack for logging/error handling
+            if scraped_data: # This will be (name, link, platform, followers, category) or None
+                self.write_buffer.add(scraped_data)
+                counts["failed" if scraped_data[4] == "failed" else "updated"] += 1
+                print(f"Controller: Updated selected account {name} ({platform}) with {scraped_data[3]} followers.")
+            else:
+                # No local browser was free: keep the previous row, the next run retries it
+                counts["deferred"] += 1
+                print(f"Controller: No browser free for selected account {name} ({platform}); keeping its previous result.")
+
+        self._run_scrapes(accounts_to_scrape, handle_result, engine)
+        self.write_buffer.flush() # Make the results visible before the UI refresh
 
-        print(f"Controller: Selected accounts update finished. Updated: {updated_count}, Failed: {failed_count}.")
+        print(f"Controller: Selected accounts update finished. Updated: {counts['updated']}, Failed: {counts['failed']}, "
+              f"Deferred: {counts['deferred']}.")
         self.ui.root.after(0, self.ui.refresh) # Refresh UI on main thread after selected updates
 
+    def _fresh_links(self, links):
+        """The subset of links whose last successful scrape is within its platform's TTL."""
+        now = time.time()
+        return {link for link, (platform, ts) in fetch_last_scraped(links).items()
+                if now - ts < self.freshness_ttl.get(platform, 0)}
+
+    def _skip_fresh(self, accounts, force=False):
+        """Drop the accounts that were scraped recently enough to serve as they are."""
+        if force or not accounts:
+            return accounts
+        fresh = self._fresh_links([acc[1] for acc in accounts])
+        if fresh:
+            print(f"Controller: Skipping {len(fresh)} accounts scraped within their freshness TTL.")
+        return [acc for acc in accounts if acc[1] not in fresh]
+
+    def _run_scrapes(self, accounts, on_result, engine=None):
+        """
+        Scrapes ``accounts`` concurrently and calls ``on_result(account, scraped_data)``
+        in the calling thread as each one finishes. scraped_data is None if no local
+        browser was free for the account, even after DEFERRED_RETRY_ROUNDS more rounds
+        for such accounts; the caller keeps its previous row.
+        engine: "threads" (per-platform batches on a ThreadPoolExecutor), "asyncio" (AsyncScrapeEngine) or
+        "queue" (jobs for worker.py processes; see _run_queued); defaults to self.engine_mode.
+        """
+        engine = engine or self.engine_mode
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown scrape engine '{engine}'. Choose from {', '.join(ENGINES)}.")
+        print(f"Controller: Scraping {len(accounts)} accounts with the '{engine}' engine.")
+
+        if engine == "queue":
+            self._run_queued(accounts, on_result)
+            return
+
+        for round_number in range(DEFERRED_RETRY_ROUNDS + 1):
+            last_round = round_number == DEFERRED_RETRY_ROUNDS
+            deferred = []
+
+            def collect(account, scraped_data):
+                if scraped_data is None and not last_round:
+                    deferred.append(account) # Requeued for the next round
+                else:
+                    on_result(account, scraped_data)
+
+            self._run_scrape_round(accounts, collect, engine)
+            if not deferred:
+                return
+            print(f"Controller: No browser was free for {len(deferred)} accounts; scraping them again.")
+            accounts = deferred
+
+    def _run_scrape_round(self, accounts, on_result, engine):
+        """One pass of _run_scrapes over ``accounts`` with the "threads" or "asyncio" engine."""
+        if engine == "asyncio":
+            self.async_engine.run(accounts, on_result)
+            print(f"Controller: Rate limits after run: {self.rate_limits()}")
+            return
+
+        # Accounts are grouped by platform and each group is split into batches, one per
+        # slot of the platform's current AIMD window; a batch visits its profiles in one
+        # browser session (scraper.scrape_many) and streams each result back as it lands.
+        batches = self._platform_batches(accounts)
+        results = queue.Queue()
+        max_workers = max(1, min(len(batches), 32))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for platform, batch in batches:
+                executor.submit(self._scrape_batch, platform, batch, results)
+            for _ in range(len(accounts)):
+                original_account, scraped_data = results.get()
+                on_result(original_account, scraped_data)
+        print(f"Controller: Rate limits after run: {self.rate_limits()}")
+        weights = page_weight_stats()
+        if weights:
+            print(f"Controller: Browser page weight per platform: {weights}")
+        learned_waits = wait_stats()
+        if learned_waits:
+            print(f"Controller: Browser wait latencies and timeouts: {learned_waits}")
+        open_circuits = circuit_stats()
+        if open_circuits:
+            print(f"Controller: Open circuits: {open_circuits}")
+        method_stats = strategy_stats()
+        if method_stats:
+            print(f"Controller: Extraction method ranking: {method_stats}")
+
+    def _run_queued(self, accounts, on_result):
+        """
+        Queues the accounts as durable jobs and waits (up to QUEUE_WAIT_SECONDS) while
+        worker processes scrape them. The workers write the results themselves, so
+        on_result is not called; the UI is refreshed whenever jobs finish. Jobs still
+        pending after the wait stay queued for the workers.
+        With no live worker (see job_queue.live_workers) nothing is queued and the
+        accounts are scraped in this process with the "threads" engine instead.
+        """
+        if not live_workers():
+            print("Controller: No scrape worker is running (start one with 'python worker.py'); "
+                  "scraping in this process instead.", file=sys.stderr)
+            self._run_scrapes(accounts, on_result, "threads")
+            return
+        jobs = enqueue([account[1] for account in accounts])
+        print(f"Controller: Queued {len(jobs)} scrape jobs for worker processes.")
+        waiting = set(jobs.values())
+        deadline = time.monotonic() + QUEUE_WAIT_SECONDS
+        while waiting and time.monotonic() < deadline:
+            time.sleep(QUEUE_POLL_SECONDS)
+            finished = {job_id for job_id, state in job_states(waiting).items() if state in ("done", "dead")}
+            if finished:
+                waiting -= finished
+                self.ui.root.after(0, self.ui.refresh)
+        if waiting:
+            print(f"Controller: {len(waiting)} queued jobs are still pending; is a worker running?", file=sys.stderr)
+        print(f"Controller: Job queue: {queue_stats()}")
+
+    def rate_limits(self):
+        """
+        Returns the live per-platform limits: current AIMD concurrency limit, scrapes in
+        flight, error-rate and latency EWMAs, and tokens left in the rate bucket.
+        """
+        return self.rate_limiter.snapshot()
+
+    def _platform_batches(self, accounts):
+        """
+        Groups accounts by platform and deals each group round-robin into as many
+        batches as the platform's concurrency window currently allows. Most scrapes
+        finish over HTTP, so the browser pool does not cap the batch count; batches that
+        need a browser wait for one up to the pool's acquire timeout.
+        Returns a list of (platform, accounts) pairs.
+        """
+        by_platform = {}
+        for account in accounts:
+            by_platform.setdefault(account[2], []).append(account)
+        batches = []
+        for platform, group in by_platform.items():
+            count = max(1, min(len(group), self.rate_limiter.get(platform).window.limit))
+            batches.extend((platform, group[i::count]) for i in range(count))
+        return batches
+
+    def _scrape_batch(self, platform, batch, results):
+        """
+        Scrapes one platform's batch of accounts in a single browser session and puts
+        (account, scraped_data) on ``results`` as each one finishes. Runs in a thread
+        pool; every account gets exactly one result, None if it could not be processed
+        here (no local browser free in time, or the batch itself broke).
+        """
+        scraper = self.scrapers.get(platform)
+        if scraper is None:
+            for account in batch:
+                results.put((account, self._scrape_single_account_data(account)))
+            return
+        remaining = list(batch)
+        scrape = functools.partial(self._scrape_link, scraper, platform, in_batch=True)
+        try:
+            # closing() ends the batch session (returning its pinned driver) even if
+            # this loop stops early
+            with closing(scraper.scrape_many([account[1] for account in batch], scrape=scrape)) as scraped:
+                for account, (link, followers, error) in zip(batch, scraped):
+                    name = account[0]
+                    if error is None:
+                        scraped_data = (name, link, platform, followers, self._determine_category(followers))
+                    elif is_local_error(error):
+                        print(f"Controller: No browser free for {link} (platform: {platform}): {error}", file=sys.stderr)
+                        scraped_data = None # Says nothing about the account; keep its row and retry
+                    else:
+                        print(f"Controller: Scraping failed for {link} (platform: {platform}): {error}", file=sys.stderr)
+                        scraped_data = (name, link, platform, 0, "failed") # Return with failed status
+                    remaining.pop(0)
+                    results.put((account, scraped_data))
+        except Exception as e:
+            print(f"Controller: Error processing a batch of {len(batch)} {platform} accounts: {e}", file=sys.stderr)
+            for account in remaining:
+                results.put((account, None))
+
+    def _scrape_link(self, scraper, platform, link, in_batch=False):
+        """
+        Scrape one link under the platform's rate limits, joining a scrape of it already
+        in flight. Inside a batch (``in_batch``) the HTTP fast path and the fallback tiers
+        take separate slots. A fallback that always needs a browser pins the batch's
+        driver in between, so a slot is never held while waiting for one; other
+        fallbacks (Instagram tries Instaloader first) lease a browser only if they get there.
+        """
+        def scrape():
+            # Each slot waits for the platform's rate bucket and concurrency window, and
+            # feeds latency and errors back into its adaptive limit
+            if not in_batch:
+                with self.rate_limiter.slot(platform):
+                    return scraper.scrape(link)
+            try:
+                # The error must leave the slot so AIMD sees throttling and network failures
+                with self.rate_limiter.slot(platform):
+                    return scraper.scrape_http(link)
+            except Exception as e:
+                print(f"Controller: Fast HTTP path failed for {link}: {e}. Falling back to the batch's browser.")
+            if scraper.fallback_needs_browser:
+                scraper.pin_browser()
+            with self.rate_limiter.slot(platform):
+                return scraper.scrape_fallback(link)
+
+        # A scrape of this account already in flight (another run, or add_account)
+        # is joined instead of started again; joining takes no rate-limit slot. A batch
+        # hands its pinned driver back first: the running scrape may be waiting for it.
+        return self.single_flight.do(link, scrape, on_join=scraper.release_browser if in_batch else None)
+
     def _scrape_single_account_data(self, account_data):
         """
         Helper method to scrape a single account and return its processed data.
         Designed to be run in a thread pool.
-        Returns (name, link, platform, followers, category) or None on failure.
+        Returns (name, link, platform, followers, category), with category "failed" if
+        the scrape failed, or None if no local browser was free in time.
         This method assumes platform is already validated by the calling function.
         """
         name, link, platform, _, _ = account_data
@@ -279,10 +577,13 @@ class Controller:
         scraper = self.scrapers.get(platform)
         if scraper:
             try:
-                followers = scraper.scrape(link)
+                followers = self._scrape_link(scraper, platform, link)
                 category = self._determine_category(followers)
                 return (name, link, platform, followers, category)
             except Exception as e:
+                if is_local_error(e):
+                    print(f"Controller: No browser free for {link} (platform: {platform}): {e}", file=sys.stderr)
+                    return None
                 print(f"Controller: Scraping failed for {link} (platform: {platform}): {e}", file=sys.stderr)
                 return (name, link, platform, 0, "failed") # Return with failed status
         else:
@@ -290,13 +591,53 @@ class Controller:
             print(f"Controller: Unexpected: Scraper not found for platform {platform} for link {link}. Marking as failed.", file=sys.stderr)
             return (name, link, platform, 0, "failed") # Fallback to generic failed
 
-    def import_csv(self, file_path):
+    def import_csv(self, file_path, engine=None):
         """
         Imports accounts from a CSV file, adds them to the database,
         and initiates scraping for each imported account.
+
+        The file is streamed in chunks of IMPORT_CHUNK_ROWS rows. Each chunk is checked
+        against the database with one batched lookup (links that are already tracked are
+        skipped), written as "pending" in one transaction and handed straight to the
+        scrape runner, so early rows are scraped while later ones are still being read.
+        The runner scrapes one chunk at a time, so only one run's batches compete for
+        the browser pools. At most IMPORT_QUEUE_CHUNKS chunks wait for it; reading
+        pauses beyond that, which keeps memory bounded for arbitrarily large files.
+        engine: "threads" or "asyncio"; defaults to self.engine_mode.
         """
         print(f"Controller: Importing CSV from {file_path}")
-        imported_accounts_data = []
+        counts = {"queued": 0, "skipped": 0, "scraped": 0, "failed": 0, "deferred": 0}
+        counts_lock = threading.Lock()
+
+        def handle_result(original_account, scraped_result):
+            original_name, original_link, original_platform, _, _ = original_account
+            if scraped_result: # This will be (name, link, platform, followers, category) or (name, link, platform, 0, "failed")
+                self.write_buffer.add(scraped_result) # Buffered; written in batches
+                print(f"Controller: Finished import scrape for {original_name} ({original_platform}).")
+                outcome = "failed" if scraped_result[4] == "failed" else "scraped"
+            else:
+                # No local browser was free: the account stays "pending" for the next run
+                print(f"Controller: No browser free for imported account {original_name} ({original_link}); left pending.")
+                outcome = "deferred"
+            with counts_lock:
+                counts[outcome] += 1
+
+        chunks = queue.Queue(maxsize=IMPORT_QUEUE_CHUNKS)
+
+        def run_chunks():
+            while True:
+                chunk = chunks.get()
+                if chunk is None: # Sentinel: the file has been read completely
+                    return
+                try:
+                    self._run_scrapes(chunk, handle_result, engine)
+                except Exception as e:
+                    print(f"Controller: Error scraping an import chunk of {len(chunk)} accounts: {e}", file=sys.stderr)
+                    for name, link, platform, _, _ in chunk:
+                        self.write_buffer.add((name, link, platform, 0, "failed"))
+                self.ui.root.after(0, self.ui.refresh)
+
+        runner = None
         try:
             with open(file_path, newline='', encoding="utf-8") as f:
                 reader = csv.reader(f)
@@ -315,69 +656,22 @@ class Controller:
                     tk.messagebox.showerror("Import CSV Error", "CSV must contain 'Name' and 'Link' columns.")
                     return
 
-                for i, row in enumerate(reader):
-                    try:
-                        name = row[name_idx].strip()
-                        link = row[link_idx].strip()
-                        
-                        platform = None
-                        if platform_idx is not None and len(row) > platform_idx:
-                            platform = row[platform_idx].strip().lower()
-
-                        if not name or not link:
-                            print(f"Controller: Skipping row {i+2}: Name or Link is empty. Row: {row}")
-                            continue
-
-                        # Validate platform for imported accounts
-                        if platform not in self.scrapers: # If platform from CSV is not directly supported
-                            auto_detected_platform = auto_detect_platform(link)
-                            if auto_detected_platform in self.scrapers: # If auto-detected is supported
-                                platform = auto_detected_platform
-                            else: # Neither provided nor auto-detected is supported
-                                print(f"Controller: Skipping row {i+2}: Could not determine supported platform for link '{link}'. Row: {row}")
-                                upsert_account(name, link, "unknown", 0, "failed_platform") # Add as unsupported
-                                continue
-                        
-                        # Add to a temporary list. Actual scraping will happen in a pool.
-                        imported_accounts_data.append((name, link, platform))
-                        # Immediately add to DB with pending status to show in UI
-                        upsert_account(name, link, platform, 0, "pending")
-                        print(f"Controller: Queued for import: {name} ({link}) on {platform}")
-
-                    except IndexError as ie:
-                        print(f"Controller: Row {i+2} is malformed or has too few columns: {row}. Error: {ie}", file=sys.stderr)
-                        continue # Skip malformed rows
-                    except Exception as row_e:
-                        print(f"Controller: Error processing row {i+2}: {row_e}. Row: {row}", file=sys.stderr)
-                        continue
-
-            self.ui.refresh() # Refresh UI to show all newly added "pending" accounts
-
-            if not imported_accounts_data:
+                runner = threading.Thread(target=run_chunks, name="import", daemon=True)
+                runner.start()
+
+                for chunk in self._read_import_chunks(reader, name_idx, link_idx, platform_idx):
+                    pending, skipped = self._stage_import_chunk(chunk)
+                    counts["queued"] += len(pending)
+                    counts["skipped"] += skipped
+                    self.ui.root.after(0, self.ui.refresh) # Show the chunk's "pending" accounts
+                    if pending:
+                        print(f"Controller: Queued {len(pending)} imported accounts for scraping ({counts['queued']} so far).")
+                        chunks.put(pending) # Blocks while the runner is busy (backpressure)
+
+            if counts["skipped"]:
+                print(f"Controller: Skipped {counts['skipped']} links that are already tracked.")
+            if not counts["queued"]:
                 tk.messagebox.showinfo("Import CSV", "No valid accounts found to import from the CSV.")
-                return
-
-            # Now, initiate scraping for all imported accounts concurrently
-            print(f"Controller: Starting concurrent scraping for {len(imported_accounts_data)} imported accounts...")
-            
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                # Submit scraping tasks for each imported account
-                future_to_account = {executor.submit(self._scrape_single_account_data, (name, link, platform, 0, "pending")): (name, link, platform) for name, link, platform in imported_accounts_data}
-                
-                for future in as_completed(future_to_account):
-                    original_name, original_link, original_platform = future_to_account[future]
-                    try:
-                        scraped_result = future.result() # This will be (name, link, platform, followers, category) or (name, link, platform, 0, "failed")
-                        if scraped_result:
-                            upsert_account(*scraped_result) # Update DB with scraped data
-                            print(f"Controller: Finished import scrape for {original_name} ({original_platform}).")
-                        else:
-                            print(f"Controller: Scraping for imported account {original_name} ({original_link}) failed.")
-                    except Exception as e:
-                        print(f"Controller: Error during concurrent scrape for imported account {original_name} ({original_link}): {e}", file=sys.stderr)
-                        upsert_account(original_name, original_link, original_platform, 0, "failed") # Mark as failed
-
-            tk.messagebox.showinfo("Import Complete", f"CSV import and scraping process finished.")
 
         except FileNotFoundError:
             tk.messagebox.showerror("Import CSV Error", "File not found.")
@@ -385,26 +679,131 @@ class Controller:
             print(f"Controller: General error during CSV import: {e}", file=sys.stderr)
             tk.messagebox.showerror("Import CSV Error", f"An error occurred during CSV import: {e}")
         finally:
+            # Let the runner finish what was already queued before reporting completion
+            if runner is not None:
+                chunks.put(None)
+                runner.join()
+            self.write_buffer.flush() # Make the results visible before the UI refresh
             self.ui.root.after(0, self.ui.refresh) # Ensure UI refreshes after all operations
 
+        if counts["queued"]:
+            print(f"Controller: CSV import finished. Scraped: {counts['scraped']}, Failed: {counts['failed']}, "
+                  f"Deferred: {counts['deferred']}, Skipped: {counts['skipped']}.")
+            tk.messagebox.showinfo("Import Complete", f"CSV import and scraping process finished.")
+
+    def _read_import_chunks(self, reader, name_idx, link_idx, platform_idx):
+        """
+        Parses CSV rows into lists of (name, link, platform) of up to IMPORT_CHUNK_ROWS
+        entries. platform is None when no supported platform could be determined.
+        """
+        chunk = []
+        for i, row in enumerate(reader):
+            try:
+                name = row[name_idx].strip()
+                link = row[link_idx].strip()
+
+                platform = None
+                if platform_idx is not None and len(row) > platform_idx:
+                    platform = row[platform_idx].strip().lower()
+
+                if not name or not link:
+                    print(f"Controller: Skipping row {i+2}: Name or Link is empty. Row: {row}")
+                    continue
+
+                # Validate platform for imported accounts
+                if platform not in self.scrapers: # If platform from CSV is not directly supported
+                    auto_detected_platform = auto_detect_platform(link)
+                    if auto_detected_platform in self.scrapers: # If auto-detected is supported
+                        platform = auto_detected_platform
+                    else: # Neither provided nor auto-detected is supported
+                        print(f"Controller: Row {i+2}: Could not determine supported platform for link '{link}'. Row: {row}")
+                        platform = None
+
+                chunk.append((name, link, platform))
+            except IndexError as ie:
+                print(f"Controller: Row {i+2} is malformed or has too few columns: {row}. Error: {ie}", file=sys.stderr)
+                continue # Skip malformed rows
+            except Exception as row_e:
+                print(f"Controller: Error processing row {i+2}: {row_e}. Row: {row}", file=sys.stderr)
+                continue
+
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _stage_import_chunk(self, chunk):
+        """
+        Writes one parsed chunk to the database in a single transaction: new links as
+        "pending", links without a supported platform as "failed_platform". Links that
+        repeat within the chunk or are already in the database (including earlier chunks
+        of the same file) are skipped.
+        Returns (pending accounts to scrape, number of skipped rows).
+        """
+        unique = {link: (name, link, platform) for name, link, platform in chunk}
+        existing = {row[1] for row in fetch_accounts(list(unique))}
+        rows, pending = [], []
+        for name, link, platform in unique.values():
+            if link in existing:
+                continue
+            if platform is None:
+                rows.append((name, link, "unknown", 0, "failed_platform")) # Add as unsupported
+            else:
+                account = (name, link, platform, 0, "pending")
+                rows.append(account)
+                pending.append(account)
+        if rows:
+            bulk_upsert_accounts(rows)
+        return pending, len(chunk) - len(rows)
+
     def export_csv(self):
         """
-        Exports all current accounts in the database to a CSV file.
+        Exports all current accounts in the database to a CSV file (or NDJSON,
+        optionally zstd-compressed, depending on the chosen extension).
+        The export streams the table in a background thread while the overlay shows progress.
         """
         print("Controller: Exporting data to CSV...")
+        export_path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                 filetypes=[("CSV files", "*.csv"),
+                                                            ("Compressed CSV", "*.csv.zst"),
+                                                            ("NDJSON files", "*.ndjson"),
+                                                            ("Compressed NDJSON", "*.ndjson.zst")],
+                                                 title="Export Accounts")
+        if not export_path:
+            print("Controller: CSV export cancelled.")
+            return
+
+        def on_progress(done, total):
+            self.ui.root.after(0, self.ui.set_overlay_text, f"Exporting... {done:,} / {total:,} rows")
+
+        def task():
+            try:
+                written = export_csv_to_file(export_path, progress=on_progress)
+                print(f"Controller: Exported {written} accounts to {export_path}")
+                self.ui.root.after(0, lambda: tk.messagebox.showinfo("Export Complete", f"Data exported to {export_path}"))
+            except Exception as e:
+                print(f"Error exporting CSV file: {e}", file=sys.stderr)
+                self.ui.root.after(0, lambda msg=str(e): tk.messagebox.showerror("Export Error", f"Error exporting CSV file: {msg}"))
+            finally:
+                self.ui.root.after(0, self.ui.hide_overlay)
+
+        self.ui.show_overlay("Exporting...")
+        threading.Thread(target=task, name="export", daemon=True).start()
+
+    def compact_history(self):
+        """
+        Background job: folds old follower snapshots into hourly and daily rows
+        so the database stays small after long periods of frequent polling.
+        Also drops finished scrape jobs past their retention.
+        """
         try:
-            export_path = filedialog.asksaveasfilename(defaultextension=".csv",
-                                                     filetypes=[("CSV files", "*.csv")],
-                                                     title="Export Accounts")
-            if export_path:
-                export_csv_to_file(export_path)
-                tk.messagebox.showinfo("Export Complete", f"Data exported to {export_path}")
-                self.ui.refresh() # Refresh UI (though not strictly necessary after export)
-            else:
-                print("Controller: CSV export cancelled.")
+            removed = compact_snapshots()
+            print(f"Controller: Follower history compacted ({removed} rows downsampled).")
+            purged = purge_finished()
+            print(f"Controller: Purged {purged} finished scrape jobs.")
         except Exception as e:
-            tk.messagebox.showerror("Export Error", f"Error exporting CSV file: {e}")
-            print(f"Error exporting CSV file: {e}", file=sys.stderr)
+            print(f"Controller: Error compacting follower history: {e}", file=sys.stderr)
 
     def fetch_all(self):
         """
@@ -412,6 +811,38 @@ class Controller:
         """
         return fetch_all_accounts()
 
+    def fetch_account(self, link):
+        """
+        Fetches one account record by link, or None if it does not exist.
+        """
+        return fetch_account(link)
+
+    def fetch_changes(self, since_version=None):
+        """
+        Fetches the account records changed or deleted since since_version, as
+        (rows, deleted_links, version). See database.fetch_changes.
+        """
+        return fetch_changes(since_version)
+
+    def count_accounts(self):
+        """
+        Returns the number of tracked accounts.
+        """
+        return count_accounts()
+
+    def fetch_all_links(self):
+        """
+        Returns the links of all tracked accounts (for "select all" in the windowed table).
+        """
+        return fetch_all_links()
+
+    def fetch_window(self, offset, limit, order_by=None, descending=False):
+        """
+        Fetches one sorted page of account records for the windowed table.
+        See database.fetch_window.
+        """
+        return fetch_window(offset, limit, order_by, descending)
+
     def sort_by(self, tree, col):
         """
         Sorts the Treeview table by the specified column.
@@ -27,6 +27,21 @@ class ScrapeScheduler:
         self.scheduler.add_listener(self._scheduler_event_listener,
                                     EVENT_SCHEDULER_STARTED | EVENT_SCHEDULER_SHUTDOWN)
 
+    def add_job(self, job_func, interval_minutes, job_id):
+        """
+        Registers an additional recurring job on the same background scheduler,
+        e.g. housekeeping that should run alongside the scrape job.
+
+        Args:
+            job_func (callable): The function to be executed by the scheduler.
+            interval_minutes (int): The interval in minutes at which the job_func should run.
+            job_id (str): Unique id of the job; re-adding an id replaces the job.
+        """
+        self.scheduler.add_job(job_func, 'interval',
+                               minutes=interval_minutes,
+                               id=job_id,
+                               replace_existing=True)
+
     def _scheduler_event_listener(self, event):
         """
         Internal listener for APScheduler events to update the _is_running flag.
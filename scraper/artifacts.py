@@ -0,0 +1,138 @@
+# scraper/artifacts.py
+"""
+Failure screenshots for the browser scrapers.
+
+capture() grabs the PNG bytes from the browser (no disk I/O on the scraping thread)
+and hands them to a single background writer, so the worker and its browser are
+released straight away. Shots are sampled per (directory, kind, exception type):
+during an outage only the first few failures of a class and then one in
+SAMPLE_EVERY are kept. After every write the directory is trimmed to its quota:
+files older than MAX_AGE_DAYS go first, then the oldest until it fits in MAX_DIR_BYTES.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+MAX_DIR_BYTES = 100 * 1024 * 1024  # Per screenshot directory
+MAX_AGE_DAYS = 7
+SAMPLE_WINDOW_SECONDS = 10 * 60    # Sampling counts per error class restart after this
+SAMPLE_FIRST = 3                   # Shots always kept per error class and window
+SAMPLE_EVERY = 50                  # After those, one shot in this many
+QUEUE_SIZE = 32                    # Pending writes; shots are dropped rather than block a scraper
+
+_samples = {}  # (directory, kind, error type) -> [window start, failures seen]
+_counts = {"captured": 0, "sampled_out": 0, "dropped": 0, "written": 0, "removed": 0}
+_lock = threading.Lock()
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_writer = None
+
+
+def _should_capture(key):
+    now = time.monotonic()
+    with _lock:
+        window = _samples.get(key)
+        if window is None or now - window[0] > SAMPLE_WINDOW_SECONDS:
+            window = _samples[key] = [now, 0]
+        window[1] += 1
+        seen = window[1]
+    return seen <= SAMPLE_FIRST or (seen - SAMPLE_FIRST) % SAMPLE_EVERY == 0
+
+
+def _count(outcome, n=1):
+    with _lock:
+        _counts[outcome] += n
+
+
+def capture(driver, directory, name, kind, error=None):
+    """
+    Queue a screenshot of driver's page as directory/name_kind_timestamp.png if this
+    failure is sampled in. Never raises.
+
+    Args:
+        name (str): Account the failure belongs to (the username).
+        kind (str): Failure site, e.g. "load_error" or "scrape_fail".
+        error (Exception): The failure; its type is part of the sampling class.
+
+    Returns the path the shot will be written to, or None if it was not taken.
+    """
+    if driver is None:
+        return None
+    if not _should_capture((directory, kind, type(error).__name__ if error else None)):
+        _count("sampled_out")
+        return None
+    try:
+        png = driver.get_screenshot_as_png()
+    except Exception as e:
+        print(f"Artifacts: Could not take screenshot for {name} ({kind}): {e}", file=sys.stderr)
+        return None
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    path = os.path.join(directory, f"{name}_{kind}_{timestamp}.png")
+    _start_writer()
+    try:
+        _queue.put_nowait((path, png))
+    except queue.Full:
+        _count("dropped")
+        return None
+    _count("captured")
+    return path
+
+
+def _start_writer():
+    global _writer
+    with _lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_loop, name="artifact-writer", daemon=True)
+            _writer.start()
+
+
+def _write_loop():
+    while True:
+        path, png = _queue.get()
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(png)
+            _count("written")
+            print(f"Artifacts: Screenshot saved: {path}")
+            _count("removed", enforce_quota(directory))
+        except Exception as e:
+            print(f"Artifacts: Failed to write {path}: {e}", file=sys.stderr)
+        finally:
+            _queue.task_done()
+
+
+def enforce_quota(directory, max_bytes=MAX_DIR_BYTES, max_age_days=MAX_AGE_DAYS):
+    """Delete old .png files in directory until it is within quota; returns how many were deleted."""
+    try:
+        entries = [e for e in os.scandir(directory) if e.is_file() and e.name.endswith(".png")]
+    except FileNotFoundError:
+        return 0
+    files = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries))  # Oldest first
+    cutoff = time.time() - max_age_days * 86400
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def flush():
+    """Block until every queued screenshot has been written."""
+    _queue.join()
+
+
+def artifact_stats():
+    """Counts of screenshots captured, sampled out, dropped, written and removed by the quota."""
+    with _lock:
+        return dict(_counts)
@@ -1,10 +1,144 @@
 #base.py
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from . import strategies
+from .circuit import get_breaker
+from .driver_pool import ACQUIRE_TIMEOUT_SECONDS, PinnedSession
+from .http_client import fetch_text
+
+# Batch sessions opened by scrape_many(), per thread: id(scraper) -> PinnedSession
+_batch = threading.local()
 
 class Scraper(ABC):
     """Abstract base class for platform scrapers."""
 
+    # Key used for this platform's pooled HTTP session; subclasses override it.
+    platform = "generic"
+    # Browser pool of subclasses with a browser tier (see driver_pool.py)
+    driver_pool = None
+    # Whether scrape_fallback() always opens a browser. Engines then pin a driver before
+    # taking a rate-limit slot; scrapers whose fallback starts with a browserless tier
+    # set this to False so no browser is leased unless that tier fails.
+    fallback_needs_browser = True
+
     @abstractmethod
     def scrape(self, link: str) -> int:
         """Return the follower count for the given link."""
         pass
+
+    def profile_url(self, link: str) -> str:
+        """Return the URL whose server-sent markup carries the follower count."""
+        return link
+
+    @abstractmethod
+    def extract_from_html(self, html: str, link: str) -> int:
+        """Extract the follower count from server-sent markup, or raise ValueError."""
+        pass
+
+    def scrape_fallback(self, link: str) -> int:
+        """
+        Every tier after the HTTP fast path (browser, Instaloader, ...). Engines that
+        run the HTTP tier themselves call this when it fails. Defaults to scrape().
+        """
+        return self.scrape(link)
+
+    def scrape_many(self, links, scrape=None):
+        """
+        Scrape many links of this platform in one browser session and yield
+        ``(link, followers, error)`` for each, in order, as soon as it completes.
+        ``error`` is None on success; otherwise followers is None.
+
+        Each link still takes the normal path (HTTP fast path first), but the first
+        one that needs a browser pins a driver, and the rest of the batch reuses it
+        instead of leasing one per profile. The driver goes back to the pool when the
+        generator is exhausted or closed.
+
+        Args:
+            links (iterable): Profile links of this platform.
+            scrape (callable): Called with each link instead of self.scrape, e.g. to
+                wrap it in rate limiting; it runs inside the batch session.
+        """
+        scrape = scrape or self.scrape
+        with self.batch_session():
+            for link in links:
+                try:
+                    followers = scrape(link)
+                except Exception as e:
+                    yield link, None, e
+                else:
+                    yield link, followers, None
+
+    @contextmanager
+    def batch_session(self):
+        """Pin one browser of this scraper's pool to the calling thread for the duration."""
+        sessions = _sessions()
+        if self.driver_pool is None or id(self) in sessions:
+            yield # No browser tier, or already inside a batch on this thread
+            return
+        session = sessions[id(self)] = PinnedSession(self.driver_pool)
+        try:
+            yield
+        finally:
+            del sessions[id(self)]
+            session.close()
+
+    def pin_browser(self, timeout=ACQUIRE_TIMEOUT_SECONDS):
+        """
+        Make sure the thread's batch session holds a driver, leasing one now if needed
+        (no-op outside a batch). Raises TimeoutError if none frees up within ``timeout``.
+        """
+        session = _sessions().get(id(self))
+        if session is not None:
+            session.acquire(timeout)
+
+    def release_browser(self):
+        """
+        Hand the thread's pinned driver back to the pool without ending the batch
+        session (no-op outside a batch); the next pin_browser() leases one again.
+        """
+        session = _sessions().get(id(self))
+        if session is not None:
+            session.close()
+
+    def browser_pool(self):
+        """Where the browser tier leases drivers: the thread's batch session, if any, else the pool."""
+        return _sessions().get(id(self)) or self.driver_pool
+
+    def run_strategies(self, stage: str, methods):
+        """
+        Try this platform's extraction methods for one stage best-first, learning
+        from every outcome which ones currently work (see strategies.py).
+
+        Args:
+            stage (str): What is being extracted from, e.g. "browser".
+            methods (list): (name, callable) pairs in preferred order; each callable
+                returns the follower count, or None / raises if it found none.
+
+        Returns (name, count), or (None, None) if no method found a count.
+        """
+        return strategies.run(f"{self.platform}.{stage}", methods)
+
+    def breaker(self, tier: str):
+        """The shared circuit breaker for one of this platform's tiers ("http", "browser", ...)."""
+        return get_breaker(f"{self.platform}.{tier}")
+
+    def scrape_http(self, link: str) -> int:
+        """
+        Browserless fast path: fetch the profile with a pooled keep-alive session and
+        extract the count from the raw response. Raises on any failure (including
+        CircuitOpenError while the tier's circuit is open) so the caller can fall back
+        to the browser.
+        """
+        return self.breaker("http").call(self._fetch_and_extract, link)
+
+    def _fetch_and_extract(self, link: str) -> int:
+        html = fetch_text(self.platform, self.profile_url(link))
+        return self.extract_from_html(html, link)
+
+
+def _sessions():
+    if not hasattr(_batch, "sessions"):
+        _batch.sessions = {}
+    return _batch.sessions
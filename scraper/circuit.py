@@ -0,0 +1,255 @@
+# scraper/circuit.py
+"""
+Circuit breakers for the scraping tiers (HTTP fast path, Instaloader, browsers).
+
+Each breaker, named "<platform>.<tier>", counts consecutive failures per error class.
+When a class reaches its threshold the circuit opens and calls fail immediately with
+CircuitOpenError instead of launching another request or browser into an outage.
+After the open period one caller is let through as a probe (half-open): success
+closes the circuit, failure opens it again for twice as long (up to
+MAX_OPEN_SECONDS). Errors that concern one account rather than the platform
+(profile not found, private profile, HTTP 404, a malformed link) and running out of
+local browsers are neutral: they neither count toward opening nor close it. A page
+without a follower count is not neutral: when every profile comes back that way the
+platform is showing a login wall or has changed its layout.
+
+Open circuits are saved to STATE_FILE next to the database (see set_state_dir()), so
+a restart does not hammer a platform that was blocking us a minute ago.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+from .ratelimit import is_throttle_error
+
+STATE_FILE = "circuit_state.json"
+# Where the state is kept; set_state_dir() moves it next to the database
+_state_path = STATE_FILE
+
+# Error class -> (consecutive failures that open the circuit, seconds it stays open)
+ERROR_CLASSES = {
+    "throttle": (2, 10 * 60),
+    "network":  (3, 2 * 60),
+    "error":    (8, 5 * 60),
+}
+# Per-breaker overrides of ERROR_CLASSES. A rate-limited Instaloader context is rotated
+# out by its pool, so the tier only stops (for 30 minutes, its old cooldown) once
+# fresh contexts get rate limited as well.
+BREAKER_OVERRIDES = {
+    "instagram.instaloader": {"throttle": (3, 30 * 60)},
+}
+MAX_OPEN_SECONDS = 60 * 60
+PROBE_TIMEOUT_SECONDS = 5 * 60  # A probe that never reports back frees the slot after this
+
+# Exception type names and message fragments of failures specific to one account. Missing
+# counts ("could not locate", "no follower count") are deliberately not listed: they are
+# what a login wall or a layout change looks like, so they count as errors.
+ACCOUNT_ERROR_NAMES = ("ProfileNotExistsException", "PrivateProfileNotFollowedException")
+ACCOUNT_MARKERS = ("http 404", "invalid instagram url", "invalid link or username")
+# Message fragments of failures on our side (see driver_pool.ACQUIRE_TIMEOUT_SECONDS)
+LOCAL_MARKERS = ("no driver available", "no context available")
+# Error classes that neither count toward opening a circuit nor close it
+NEUTRAL_CLASSES = ("account", "local")
+NETWORK_ERROR_NAMES = ("TimeoutException", "TimeoutError", "ConnectionError", "ClientConnectionError")
+NETWORK_MARKERS = ("timed out", "timeout", "connection", "http 500", "http 502", "http 503", "http 504")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a tier whose circuit is open."""
+
+
+def classify(exc):
+    """Error class of an exception for the breakers: a key of ERROR_CLASSES or of NEUTRAL_CLASSES."""
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    text = str(exc).lower()
+    if any(marker in text for marker in LOCAL_MARKERS):
+        return "local"
+    if names & set(ACCOUNT_ERROR_NAMES) or any(marker in text for marker in ACCOUNT_MARKERS):
+        return "account"
+    if is_throttle_error(exc):
+        return "throttle"
+    if names & set(NETWORK_ERROR_NAMES) or any(marker in text for marker in NETWORK_MARKERS):
+        return "network"
+    return "error"
+
+
+def is_local_error(exc):
+    """
+    True if a scrape failed on our side (no local browser free in time) and says
+    nothing about the account; callers keep its previous result and try again later.
+    """
+    return exc is not None and classify(exc) == "local"
+
+
+class CircuitBreaker:
+    """Thread-safe closed / open / half-open breaker for one scraping tier."""
+
+    def __init__(self, name, error_classes=None):
+        self.name = name
+        self.error_classes = dict(ERROR_CLASSES, **(error_classes or {}))
+        self.state = "closed"
+        self.open_until = 0.0     # Wall-clock time, so it survives restarts
+        self.reason = None        # Error class that opened the circuit
+        self.reopens = 0          # Consecutive failed probes; doubles the open period
+        self._failures = {}       # Error class -> consecutive failures while closed
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Raise CircuitOpenError unless a call may go ahead now. In the half-open state
+        only one caller at a time is let through; it must report back with
+        record_success() or record_failure().
+        """
+        with self._lock:
+            if self.state == "closed":
+                return
+            now = time.time()
+            if self.state == "open" and now >= self.open_until:
+                self.state = "half_open"
+                self._probe_started = None
+            if self.state == "half_open":
+                if self._probe_started is None or now - self._probe_started > PROBE_TIMEOUT_SECONDS:
+                    self._probe_started = now
+                    print(f"CircuitBreaker[{self.name}]: Half-open; letting one probe through.")
+                    return
+                raise CircuitOpenError(f"Circuit '{self.name}' is half-open and its probe is still running.")
+            raise CircuitOpenError(f"Circuit '{self.name}' is open for another {self.open_until - now:.0f} s ({self.reason}).")
+
+    def record_success(self):
+        with self._lock:
+            if self.state == "open":
+                return # A call that started before the circuit opened proves nothing
+            self._failures.clear()
+            if self.state == "closed":
+                return
+            self.state, self.reason, self.reopens, self._probe_started = "closed", None, 0, None
+        print(f"CircuitBreaker[{self.name}]: Probe succeeded; circuit closed.")
+        _save(self)
+
+    def record_failure(self, exc):
+        """Count a failed call; opens the circuit when its error class reaches the threshold."""
+        error_class = classify(exc)
+        if error_class in NEUTRAL_CLASSES:
+            self._record_neutral()
+            return
+        threshold, open_seconds = self.error_classes[error_class]
+        with self._lock:
+            if self.state == "open":
+                return
+            if self.state == "half_open":
+                self.reopens += 1
+            else:
+                self._failures[error_class] = self._failures.get(error_class, 0) + 1
+                if self._failures[error_class] < threshold:
+                    return
+            open_seconds = min(MAX_OPEN_SECONDS, open_seconds * 2 ** self.reopens)
+            self.state, self.reason, self._probe_started = "open", error_class, None
+            self.open_until = time.time() + open_seconds
+            self._failures.clear()
+        print(f"CircuitBreaker[{self.name}]: Opened for {open_seconds} s after {error_class} errors: {exc}", file=sys.stderr)
+        _save(self)
+
+    def _record_neutral(self):
+        # Proves nothing either way; a half-open circuit just lets the next caller probe
+        with self._lock:
+            if self.state == "half_open":
+                self._probe_started = None
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker: fail fast while open, record the outcome otherwise."""
+        self.allow()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "open_for": max(0, round(self.open_until - time.time())) if self.state == "open" else 0,
+                "failures": dict(self._failures),
+            }
+
+    def _to_json(self):
+        with self._lock:
+            return {"state": self.state, "open_until": self.open_until, "reason": self.reason, "reopens": self.reopens}
+
+    def _restore(self, saved):
+        with self._lock:
+            if saved.get("state") in ("open", "half_open"):
+                # A probe that was running when the process stopped is simply retried
+                self.state = "open"
+                self.open_until = float(saved.get("open_until", 0))
+                self.reason = saved.get("reason")
+                self.reopens = int(saved.get("reopens", 0))
+
+
+def set_state_dir(directory):
+    """Keep the breaker state file in ``directory`` (the database's) instead of the working directory."""
+    global _state_path
+    _state_path = os.path.join(directory, STATE_FILE)
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+_STATE_LOCK = threading.Lock()
+
+
+def _load_state():
+    try:
+        with open(_state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"CircuitBreaker: Ignoring unreadable {_state_path}: {e}", file=sys.stderr)
+        return {}
+
+
+def _save(breaker):
+    """Merge one breaker's state into the state file (other processes may own other entries)."""
+    with _STATE_LOCK:
+        state = _load_state()
+        entry = breaker._to_json()
+        if entry["state"] == "closed":
+            state.pop(breaker.name, None)
+        else:
+            state[breaker.name] = entry
+        tmp_path = f"{_state_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, _state_path)
+        except OSError as e:
+            print(f"CircuitBreaker: Could not save {_state_path}: {e}", file=sys.stderr)
+
+
+def get_breaker(name):
+    """
+    Return the process-wide breaker registered under ``name`` ("<platform>.<tier>"),
+    creating it on first use with any state saved by a previous run.
+    """
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker(name, BREAKER_OVERRIDES.get(name))
+            saved = _load_state().get(name)
+            if saved:
+                breaker._restore(saved)
+        return breaker
+
+
+def circuit_stats(include_closed=False):
+    """Snapshots of the registered breakers (by default only those not closed)."""
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    stats = {b.name: b.snapshot() for b in breakers}
+    return {name: s for name, s in stats.items() if include_closed or s["state"] != "closed"}
@@ -0,0 +1,251 @@
+# scraper/driver_pool.py
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# How long a scrape waits for a browser before giving up with TimeoutError. Every
+# scraper passes it, so a scrape that other callers have joined (see singleflight.py)
+# cannot keep them waiting on a starved pool forever.
+ACQUIRE_TIMEOUT_SECONDS = 120
+
+# Registry of every pool created through get_pool(), so the application can shut
+# all browsers down in one call on exit.
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class DriverPool:
+    """
+    A bounded pool of reusable headless browser sessions.
+
+    Drivers are created lazily by ``factory`` up to ``max_size`` and handed out with
+    ``acquire()`` / ``release()`` (or the ``lease()`` context manager). An idle driver
+    is health-checked before it is handed out again, and a driver is recycled (quit and
+    replaced on next demand) after ``max_pages`` uses or when the caller reports it as
+    broken, e.g. after a WebDriverException.
+    """
+
+    def __init__(self, factory, max_size=3, max_pages=50, name="driver"):
+        """
+        Args:
+            factory (callable): Zero-argument callable returning a new WebDriver.
+            max_size (int): Maximum number of live drivers owned by this pool.
+            max_pages (int): Number of uses after which a driver is recycled.
+            name (str): Label used in log messages.
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.name = name
+        self._idle = []       # Drivers ready to be checked out (LIFO keeps warm ones hot)
+        self._pages = {}      # id(driver) -> number of uses so far
+        self._live = 0        # Drivers created and not yet quit (idle + checked out)
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Check a healthy driver out of the pool, creating one if the pool is below
+        its size limit, or blocking until another caller returns one.
+        Raises TimeoutError if no driver became available within ``timeout`` seconds.
+        Health checks and driver startup run outside the pool lock, so a slow browser
+        never blocks other callers.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            driver = self._checkout(timeout, deadline)
+            if driver is None:
+                break # A slot was reserved; create a new driver below
+            if self._is_healthy(driver):
+                return driver
+            print(f"DriverPool[{self.name}]: Idle driver failed health check. Recycling.")
+            with self._cond:
+                self._forget_locked(driver)
+            self._quit(driver)
+
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._pages[id(driver)] = 0
+        print(f"DriverPool[{self.name}]: Started new driver ({self._live}/{self.max_size} live).")
+        return driver
+
+    def _checkout(self, timeout, deadline):
+        """
+        Pop an idle driver, or reserve a slot for a new one (returns None), waiting
+        until ``deadline`` (time.monotonic(); None waits forever) if neither is possible.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"DriverPool[{self.name}]: pool is closed.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.max_size:
+                    self._live += 1  # Reserve the slot before creating outside the lock
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(f"DriverPool[{self.name}]: no driver available after {timeout} seconds.")
+
+    def release(self, driver, broken=False, uses=1):
+        """
+        Return a driver to the pool. Broken drivers, drivers that reached
+        ``max_pages`` uses and drivers returned after close() are quit instead.
+        ``uses`` is the number of pages the driver served while checked out.
+        """
+        if driver is None:
+            return
+        with self._cond:
+            pages = self._pages.get(id(driver), 0) + uses
+            self._pages[id(driver)] = pages
+            recycle = broken or self._closed or pages >= self.max_pages
+            if recycle:
+                reason = "broken" if broken else ("pool closed" if self._closed else f"{pages} pages served")
+                self._forget_locked(driver)
+            else:
+                self._idle.append(driver)
+                self._cond.notify()
+        if recycle:
+            print(f"DriverPool[{self.name}]: Recycling driver ({reason}).")
+            self._quit(driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Context manager around acquire()/release(). The driver is marked broken if
+        the body raises a WebDriver-level error (anything carrying a ``msg`` from
+        selenium) so that a crashed session is never handed out again.
+        """
+        driver = self.acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception as e:
+            broken = _looks_like_driver_crash(e)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def close(self):
+        """Quit all idle drivers. Checked-out drivers are quit when they are released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for driver in idle:
+                self._forget_locked(driver)
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
+
+    def stats(self):
+        """Return a snapshot of the pool's occupancy for logging or inspection."""
+        with self._cond:
+            return {"name": self.name, "live": self._live, "idle": len(self._idle), "max_size": self.max_size}
+
+    def _forget_locked(self, driver):
+        """Free a driver's slot (it must be quit afterwards). Caller must hold self._cond."""
+        self._pages.pop(id(driver), None)
+        self._live -= 1
+        self._cond.notify()
+
+    def _quit(self, driver):
+        """Shut a driver's browser down. Called without the lock; quitting can take seconds."""
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"DriverPool[{self.name}]: Error quitting driver: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _is_healthy(driver):
+        """A driver is healthy if its session still answers a trivial command."""
+        try:
+            driver.current_url
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+
+class PinnedSession:
+    """
+    Keeps one driver of a pool checked out across many scrapes, so a batch of
+    profiles is visited in a single browser session (cookies, warmed caches, accepted
+    consent) instead of handing the browser back after every profile.
+
+    Offers the pool's acquire() / release() so scraping code can use either. A release
+    keeps the driver pinned; it only goes back to the pool when reported broken (the
+    next acquire() then leases a fresh one), when it has served the pool's
+    ``max_pages``, or on close().
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.max_pages = pool.max_pages
+        self.driver = None
+        self._uses = 0
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT_SECONDS):
+        """
+        Return the pinned driver, leasing one from the pool first if none is pinned.
+        A pinned driver whose browser died since its last scrape is recycled and replaced.
+        """
+        if self.driver is not None and not DriverPool._is_healthy(self.driver):
+            print(f"PinnedSession[{self.pool.name}]: Pinned driver failed health check. Recycling.")
+            self._unpin(True)
+        if self.driver is None:
+            self.driver = self.pool.acquire(timeout)
+            self._uses = 0
+        return self.driver
+
+    def release(self, driver, broken=False):
+        if driver is None:
+            return
+        if driver is not self.driver:
+            self.pool.release(driver, broken=broken)
+            return
+        self._uses += 1
+        if broken or self._uses >= self.max_pages:
+            self._unpin(broken)
+
+    def close(self):
+        """Hand the pinned driver (if any) back to the pool."""
+        if self.driver is not None:
+            self._unpin(False)
+
+    def _unpin(self, broken):
+        driver, self.driver = self.driver, None
+        self.pool.release(driver, broken=broken, uses=max(1, self._uses))
+
+
+def _looks_like_driver_crash(exc):
+    """Return True for selenium WebDriverException and its subclasses (except timeouts)."""
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return "WebDriverException" in names and "TimeoutException" not in names
+
+
+def get_pool(name, factory, max_size=3, max_pages=50):
+    """
+    Return the process-wide pool registered under ``name``, creating it on first use.
+    All scrapers draw their browsers from pools obtained here.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(name)
+        if pool is None or pool._closed:
+            pool = DriverPool(factory, max_size=max_size, max_pages=max_pages, name=name)
+            _POOLS[name] = pool
+        return pool
+
+
+def shutdown_all_pools():
+    """Close every registered pool. Called once on application shutdown."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
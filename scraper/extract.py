@@ -0,0 +1,99 @@
+# scraper/extract.py
+"""
+Targeted extraction from raw profile HTML.
+
+The scrapers only ever need one <script id=...> blob, one meta description or one
+"N Followers" string from a page, so instead of building a full DOM with
+BeautifulSoup these helpers scan the HTML with precompiled regular expressions.
+See bench_extract.py for the CPU time this saves per page.
+"""
+import html as html_lib
+import re
+
+# <script ... id="NAME" ...>BODY</script>; patterns are compiled once per id
+_SCRIPT_TEMPLATE = r"""<script\b[^>]*?\bid\s*=\s*["']?{}["']?[^>]*>(.*?)</script\s*>"""
+# Any <meta> tag whose name= or property= is NAME, attributes in any order
+_META_TEMPLATE = r"""<meta\b[^>]*?\b(?:name|property)\s*=\s*["']{}["'][^>]*>"""
+_CONTENT_ATTR = re.compile(r"""\bcontent\s*=\s*(["'])(.*?)\1""", re.S | re.I)
+# <TAG ... title="TITLE" ...>TEXT</TAG>
+_TITLED_TEMPLATE = r"""<{0}\b[^>]*?\btitle\s*=\s*["']{1}["'][^>]*>(.*?)</{0}\s*>"""
+_TAGS = re.compile(r"<[^>]+>")
+# A follower count inside a text node: ">... 1,234 followers" or ">12.5K Followers".
+# The lookbehind keeps the match from starting in the middle of a number.
+FOLLOWERS_TEXT = re.compile(r">[^<]*?(?<![\d.,])(\d[\d.,]*[KkMm]?)\s*followers?", re.I)
+_COUNT = re.compile(r"(\d[\d,.]*)\s*([KkMm]?)")
+
+_compiled = {}
+
+
+def _pattern(template, *parts):
+    """Compile (once) a template filled with escaped parts."""
+    key = (template, parts)
+    pattern = _compiled.get(key)
+    if pattern is None:
+        pattern = _compiled[key] = re.compile(template.format(*(re.escape(p) for p in parts)), re.S | re.I)
+    return pattern
+
+
+def script_text(html, script_id):
+    """Body of the <script id=script_id> tag, or None if the page has none."""
+    match = _pattern(_SCRIPT_TEMPLATE, script_id).search(html)
+    return match.group(1) if match and match.group(1).strip() else None
+
+
+def meta_content(html, name):
+    """Unescaped content of <meta name=name> (or property=name), or None."""
+    for tag in _pattern(_META_TEMPLATE, name).finditer(html):
+        content = _CONTENT_ATTR.search(tag.group(0))
+        if content:
+            return html_lib.unescape(content.group(2))
+    return None
+
+
+def titled_text(html, tag, title):
+    """Visible text of the first <tag title=title> element, or None."""
+    match = _pattern(_TITLED_TEMPLATE, tag, title).search(html)
+    if not match:
+        return None
+    return html_lib.unescape(_TAGS.sub("", match.group(1))).strip()
+
+
+def followers_in_text(html):
+    """The count from the first text node reading like "1,234 followers", as a string, or None."""
+    match = FOLLOWERS_TEXT.search(html)
+    return match.group(1) if match else None
+
+
+def parse_count(text):
+    """
+    Convert a displayed count to an int: "12,345" -> 12345, "1.234.567" -> 1234567,
+    "1.2M" -> 1200000, "12,5K" -> 12500. Raises ValueError if text holds no number.
+    """
+    match = _COUNT.search(text.strip())
+    if not match:
+        raise ValueError(f"No count in '{text}'.")
+    suffix = match.group(2).upper()
+    number = _decimal(match.group(1).rstrip(",."), scaled=bool(suffix))
+    multiplier = {"K": 1_000, "M": 1_000_000}.get(suffix, 1)
+    return int(float(number) * multiplier)
+
+
+def _decimal(number, scaled=False):
+    """
+    Normalize the thousands and decimal separators of a displayed number to "1234.5".
+    With both "," and "." present the last one is the decimal point. A lone separator
+    is a thousands separator when it repeats or, on an unscaled count, is followed by
+    exactly three digits ("1,234,567", "1.234"); otherwise it is a decimal point
+    ("1.5", "12,5", and "1.234" in "1.234M").
+    """
+    if "," in number and "." in number:
+        decimal = max(",", ".", key=number.rfind)
+        thousands = "." if decimal == "," else ","
+        return number.replace(thousands, "").replace(decimal, ".")
+    for sep in ",.":
+        if sep in number:
+            head, _, tail = number.rpartition(sep)
+            if number.count(sep) > 1 or len(tail) == 3 and not scaled:
+                return number.replace(sep, "")
+            return f"{head}.{tail}"
+    return number
@@ -0,0 +1,88 @@
+# scraper/http_client.py
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Browser-like headers so profile pages are served the same markup a real visitor gets
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# When set, every request is sent to this server instead of the real platform, with the
+# original host kept as the first path segment: https://www.tiktok.com/@nasa becomes
+# <base>/www.tiktok.com/@nasa. Used to test the fast path against saved pages.
+_base_url_override = os.environ.get("SCRAPER_HTTP_BASE_URL") or None
+
+_local = threading.local()
+
+
+class HttpFetchError(Exception):
+    """Raised when the fast HTTP path cannot fetch a usable page."""
+
+
+def set_base_url(base_url):
+    """Redirect all fast-path requests to a stand-in server (None restores the real hosts)."""
+    global _base_url_override
+    _base_url_override = base_url.rstrip("/") if base_url else None
+
+
+def resolve_url(url):
+    """Apply the stand-in server override, if any, to a platform URL."""
+    if not _base_url_override:
+        return url
+    parts = urlsplit(url)
+    rewritten = f"{_base_url_override}/{parts.netloc}{parts.path or '/'}"
+    if parts.query:
+        rewritten += f"?{parts.query}"
+    return rewritten
+
+
+def get_session(platform):
+    """
+    Return this thread's keep-alive session for ``platform``.
+    Sessions are per thread (requests.Session is not safe to share between threads)
+    and per platform (so cookies from one site never leak into another); each one
+    keeps a small pool of persistent connections to the platform's hosts.
+    """
+    sessions = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    session = sessions.get(platform)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        sessions[platform] = session
+    return session
+
+
+def fetch_text(platform, url, timeout=10):
+    """
+    GET ``url`` on the platform's pooled session and return the decoded body.
+    Raises HttpFetchError for transport errors and non-200 responses.
+    """
+    target = resolve_url(url)
+    try:
+        response = get_session(platform).get(target, timeout=timeout)
+    except requests.RequestException as e:
+        raise HttpFetchError(f"HTTP request to {target} failed: {e}") from e
+    if response.status_code != 200:
+        raise HttpFetchError(f"HTTP {response.status_code} from {target}")
+    return response.text
+
+
+def close_sessions():
+    """Close the calling thread's sessions (idle connections are released)."""
+    sessions = getattr(_local, "sessions", None) or {}
+    for session in sessions.values():
+        session.close()
+    sessions.clear()
@@ -4,41 +4,72 @@ import time
 import os
 import sys
 import undetected_chromedriver as uc
-from datetime import datetime
 from selenium.webdriver.common.by import By
 from undetected_chromedriver.options import ChromeOptions
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
-from bs4 import BeautifulSoup
 
 import instaloader
 from instaloader import exceptions as InstaloaderExceptions # Alias for easier access
 
 from .base import Scraper
+from .circuit import CircuitOpenError
+from . import artifacts, extract, waits
+from .driver_pool import ACQUIRE_TIMEOUT_SECONDS, get_pool
+from .instaloader_pool import InstaloaderPool
+from .network_profile import apply_profile, record_page
 
 # Define the folder for failed screenshots (for headless browser fallback)
 FAILED_SCREENSHOTS_DIR = "instagram_failed"
 os.makedirs(FAILED_SCREENSHOTS_DIR, exist_ok=True)
 
+# "12,345 Followers" / "1.2M Followers" at the start of the profile meta description
+META_FOLLOWERS = re.compile(r"(\d[\d,.]*)\s*([KkMm]?)\s*Followers")
+
+# Elements that show the follower count in the rendered profile
+FOLLOWERS_XPATH = ("//span[contains(translate(text(), 'F', 'f'), 'followers')] | "
+                   "//div[contains(translate(text(), 'F', 'f'), 'followers')] | "
+                   "//a[contains(@href, '/followers/')]/span")
+
 class InstagramScraper(Scraper):
     """
-    Scrapes Instagram follower counts using Instaloader first.
+    Scrapes Instagram follower counts with a browserless HTTP request first, then Instaloader.
     If Instaloader hits rate limits or fails, it falls back to a headless browser (undetected-chromedriver).
-    Includes a cooldown mechanism for Instaloader to allow rate limits to reset.
+    Instaloader lookups lease a paced context from a pool, and a context that gets
+    rate limited is rotated out. Every tier runs behind a shared circuit breaker (see
+    circuit.py); Instaloader is skipped for 30 minutes once fresh contexts keep
+    getting rate limited too.
     Note: Unauthenticated Instagram scraping is highly challenging and prone to frequent failures.
     """
 
-    def __init__(self):
-        # Initialize Instaloader without login. It will operate in public mode.
-        self._initialize_instaloader()
-        self._last_instaloader_failure_time = None # Tracks when Instaloader last hit a rate limit
-        self._instaloader_cooldown_minutes = 30 # Cooldown period in minutes for Instaloader
+    platform = "instagram"
+    fallback_needs_browser = False # Instaloader comes first
+
+    def __init__(self, max_browsers=2, max_pages_per_browser=50, max_instaloaders=3):
+        # Independent Instaloader contexts without login (public mode), one per thread at a time
+        self.instaloader_pool = InstaloaderPool(self._create_instaloader, max_size=max_instaloaders)
+        # Browsers for the fallback path are shared and reused across accounts
+        self.driver_pool = get_pool("instagram", self._create_driver,
+                                    max_size=max_browsers, max_pages=max_pages_per_browser)
+
+    def _create_driver(self):
+        """Factory used by the driver pool to start a new undetected Chrome."""
+        options = ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36")
+        options.add_argument("--window-size=1920,1080")
+        options.page_load_strategy = 'eager'
 
-    def _initialize_instaloader(self):
-        """Initializes or re-initializes the Instaloader instance."""
-        print("InstagramScraper: Initializing new Instaloader instance.")
-        self.loader = instaloader.Instaloader(
+        driver = uc.Chrome(options=options, use_subprocess=True)
+        driver.set_page_load_timeout(30)
+        apply_profile(driver, self.platform) # Skip images, video, fonts and trackers
+        return driver
+
+    def _create_instaloader(self):
+        """Factory used by the Instaloader pool to create a new, independent instance."""
+        return instaloader.Instaloader(
             # Configure Instaloader to minimize resource usage for public scraping
             download_pictures=False,
             download_videos=False,
@@ -49,14 +80,50 @@ class InstagramScraper(Scraper):
             post_metadata_txt_pattern=""
         )
 
+    def profile_url(self, link: str) -> str:
+        """Canonical public profile URL; its meta description carries the follower count."""
+        username_match = re.search(r"instagram\.com/([^/?#&]+)", link)
+        if not username_match:
+            raise ValueError(f"Invalid Instagram URL: {link}")
+        return f"https://www.instagram.com/{username_match.group(1)}/"
+
+    def extract_from_html(self, html: str, link: str) -> int:
+        """Read the follower count from the meta description of server-sent profile HTML."""
+        followers = self._follower_count_from_meta(html)
+        if followers is None:
+            raise ValueError(f"No follower count in meta description for {link} (likely a login wall).")
+        return followers
+
+    @staticmethod
+    def _follower_count_from_meta(html):
+        """
+        Parse the '<n> Followers, <m> Following, ...' meta description.
+        Handles plain ("12,345") and abbreviated ("1.2M") counts. Returns None if absent.
+        """
+        content = extract.meta_content(html, "description")
+        if not content:
+            return None
+        match = META_FOLLOWERS.search(content)
+        if not match:
+            return None
+        return extract.parse_count(match.group(0))
+
+    def _follower_count_from_element(self, driver):
+        """The count in the rendered followers element, waiting for it to appear; None if absent."""
+        follower_element = waits.wait_for(driver, self.platform, "followers",
+                                          waits.element_present(By.XPATH, FOLLOWERS_XPATH))
+        match = re.search(r"(\d[\d,.]*[KkMm]?)\s*followers", follower_element.text, re.IGNORECASE)
+        return extract.parse_count(match.group(1)) if match else None
+
     def _scrape_with_instaloader(self, username: str) -> int:
         """
         Attempts to scrape follower count using Instaloader (unauthenticated).
         Raises InstaloaderExceptions on failure, which can trigger fallback.
         """
         print(f"InstagramScraper: Attempting Instaloader scrape for {username}...")
-        profile = instaloader.Profile.from_username(self.loader.context, username)
-        followers = profile.followers
+        with self.instaloader_pool.lease(ACQUIRE_TIMEOUT_SECONDS) as loader:
+            profile = instaloader.Profile.from_username(loader.context, username)
+            followers = profile.followers
         print(f"InstagramScraper: Instaloader successful for {username}: {followers} followers.")
         return followers
 
@@ -67,140 +134,79 @@ class InstagramScraper(Scraper):
         """
         print(f"InstagramScraper: Falling back to headless browser for {target_username} at {link}...")
         
-        driver = None
         MAX_BROWSER_RETRIES = 1 # Fewer retries for browser as it's slower
 
         for attempt in range(MAX_BROWSER_RETRIES + 1):
+            driver = None # Leased from the pool (or the batch session) for this attempt only
+            broken = False # Set when the browser session itself failed and must be recycled
+            pool = self.browser_pool()
             try:
-                # IMPORTANT FIX: Create new ChromeOptions for each attempt
-                options = ChromeOptions()
-                options.add_argument("--headless")
-                options.add_argument("--disable-gpu")
-                options.add_argument("--no-sandbox")
-                options.add_argument("--disable-dev-shm-usage")
-                options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36")
-                options.add_argument("--window-size=1920,1080")
-                options.page_load_strategy = 'eager'
-
-                driver = uc.Chrome(options=options, use_subprocess=True)
-                driver.set_page_load_timeout(30)
+                driver = pool.acquire(ACQUIRE_TIMEOUT_SECONDS)
                 print(f"Browser Attempt {attempt + 1}: Navigating to Instagram link: {link}")
                 
                 driver.get(link)
                 
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                print(f"Browser: Page body loaded for {link}. Giving a short additional wait.")
-                time.sleep(3)
+                # Continue as soon as the count (meta tag or element) or a login redirect is there
+                waits.wait_for(driver, self.platform, "ready", waits.any_of(
+                    waits.url_contains("accounts/login"),
+                    waits.element_present(By.CSS_SELECTOR, "meta[name='description'][content*='Followers']"),
+                    waits.element_present(By.XPATH, FOLLOWERS_XPATH),
+                ))
+                print(f"Browser: Page ready for {link}.")
+                record_page(driver, self.platform)
 
                 if "accounts.instagram.com/accounts/login" in driver.current_url:
                     raise Exception(f"Browser: Redirected to Instagram login page for {target_username}. Cannot scrape without login.")
 
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-
-                # Attempt 1: Look for follower count in meta tags
-                meta_description = soup.find("meta", {"name": "description"})
-                if meta_description and meta_description.get("content"):
-                    content = meta_description["content"]
-                    match = re.search(r"([\d,]+\s*Followers)", content)
-                    if match:
-                        followers_str = match.group(1).replace(",", "").replace(" Followers", "")
-                        followers = int(followers_str)
-                        print(f"Browser: Found follower count via meta description for {target_username}: {followers}.")
-                        return followers
-                
-                print(f"Browser: Meta description method failed for {target_username}. Trying element search.")
-
-                # Attempt 2: Search for specific elements that might contain follower count
-                try:
-                    follower_element = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, 
-                            "//span[contains(translate(text(), 'F', 'f'), 'followers')] | "
-                            "//div[contains(translate(text(), 'F', 'f'), 'followers')] | "
-                            "//a[contains(@href, '/followers/')]/span"
-                        ))
-                    )
-                    text = follower_element.text
-                    match = re.search(r"(\d[\d,.]*[KkMm]?)\s*followers", text, re.IGNORECASE)
-                    if match:
-                        followers_str = match.group(1).replace(",", "")
-                        if followers_str.endswith('K'):
-                            followers = int(float(followers_str[:-1]) * 1000)
-                        elif followers_str.endswith('M'):
-                            followers = int(float(followers_str[:-1]) * 1000000)
-                        else:
-                            followers = int(followers_str)
-                        print(f"Browser: Found follower count via element search for {target_username}: {followers}.")
-                        return followers
-                except TimeoutException:
-                    print(f"Browser: Element search timed out for {target_username}. No direct element found.")
-                except Exception as e:
-                    print(f"Browser: Error during element search for {target_username}: {e}", file=sys.stderr)
+                # The meta description and the followers element, tried in whichever
+                # order currently works best
+                method, followers = self.run_strategies("browser", [
+                    ("meta", lambda: self._follower_count_from_meta(driver.page_source)),
+                    ("element", lambda: self._follower_count_from_element(driver)),
+                ])
+                if followers is not None:
+                    print(f"Browser: Found follower count via {method} for {target_username}: {followers}.")
+                    return followers
 
                 # If both methods fail for the current attempt
                 if attempt == MAX_BROWSER_RETRIES:
-                    # Attempt to save screenshot BEFORE raising exception or quitting driver
-                    if driver:
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        screenshot_path = os.path.join(FAILED_SCREENSHOTS_DIR, f"{target_username}_browser_scrape_fail_{timestamp}.png")
-                        try:
-                            driver.save_screenshot(screenshot_path)
-                            print(f"Browser: Screenshot saved to: {screenshot_path}")
-                        except Exception as se:
-                            print(f"Browser: Failed to save screenshot on scrape failure for {target_username}: {se}", file=sys.stderr)
+                    # Grab the screenshot BEFORE raising; it is written in the background
+                    artifacts.capture(driver, FAILED_SCREENSHOTS_DIR, target_username, "browser_scrape_fail")
                     raise Exception(f"Browser: Could not locate Instagram follower count for {target_username} after {MAX_BROWSER_RETRIES + 1} attempts.")
                 else:
                     print(f"Browser: Scraping failed for {target_username} on attempt {attempt + 1}. Retrying...")
-                    # Driver will be quit in finally block for retries
-                    time.sleep(2)
+                    # Driver is returned to the pool in the finally block
+                    waits.retry_delay(attempt)
                     continue
 
             except WebDriverException as we:
                 print(f"Browser: WebDriver error during scrape for {target_username}: {we}", file=sys.stderr)
-                # Attempt to save screenshot immediately on WebDriver error
-                if driver:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    screenshot_path = os.path.join(FAILED_SCREENSHOTS_DIR, f"{target_username}_browser_webdriver_error_{timestamp}.png")
-                    try:
-                        driver.save_screenshot(screenshot_path)
-                        print(f"Browser: Screenshot saved to: {screenshot_path}")
-                    except Exception as se:
-                        print(f"Browser: Failed to save screenshot on WebDriver error for {target_username}: {se}", file=sys.stderr)
+                broken = not isinstance(we, TimeoutException) # A crashed session must not be reused
+                # Screenshot on WebDriver error (sampled, written in the background)
+                artifacts.capture(driver, FAILED_SCREENSHOTS_DIR, target_username, "browser_webdriver_error", we)
                 
                 if attempt == MAX_BROWSER_RETRIES:
                     raise # Re-raise the original WebDriverException
                 else:
                     print(f"Browser: Retrying after WebDriver error for {target_username}...")
-                    # Driver will be quit in finally block for retries
-                    time.sleep(2)
+                    # Driver is returned to (or recycled by) the pool in the finally block
+                    waits.retry_delay(attempt)
                     continue
             except Exception as overall_e:
                 print(f"Browser: An unhandled error occurred during browser scraping for {target_username}: {overall_e}", file=sys.stderr)
-                # Attempt to save screenshot immediately on unhandled error
-                if driver:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    screenshot_path = os.path.join(FAILED_SCREENSHOTS_DIR, f"{target_username}_browser_unhandled_error_{timestamp}.png")
-                    try:
-                        driver.save_screenshot(screenshot_path)
-                        print(f"Browser: Screenshot saved to: {screenshot_path}")
-                    except Exception as se:
-                        print(f"Browser: Failed to save screenshot on unhandled error for {target_username}: {se}", file=sys.stderr)
+                # Screenshot on unhandled error (sampled, written in the background)
+                artifacts.capture(driver, FAILED_SCREENSHOTS_DIR, target_username, "browser_unhandled_error", overall_e)
 
                 if attempt == MAX_BROWSER_RETRIES:
                     raise # Re-raise the original unhandled exception
                 else:
                     print(f"Browser: Retrying after unhandled error for {target_username}...")
-                    # Driver will be quit in finally block for retries
-                    time.sleep(2)
+                    # Driver is returned to the pool in the finally block
+                    waits.retry_delay(attempt)
                     continue
             finally:
-                if driver:
-                    try:
-                        driver.quit()
-                        print(f"Browser: Driver quit successfully for {target_username}.")
-                    except Exception as e:
-                        print(f"Browser: Error quitting driver for {target_username}: {e}", file=sys.stderr)
+                # Hand the browser back for the next account instead of quitting it
+                pool.release(driver, broken=broken)
         
         # This line should ideally not be reached if exceptions are handled correctly
         raise Exception(f"Browser: Unexpected error: scraper finished without returning a count or raising an exception for {target_username}.")
@@ -208,54 +214,59 @@ class InstagramScraper(Scraper):
 
     def scrape(self, link: str) -> int:
         """
-        Attempts to scrape Instagram follower count using Instaloader first.
-        Falls back to a headless browser if Instaloader fails (e.g., due to rate limits).
+        Attempts to scrape Instagram follower count with the browserless HTTP fast path,
+        then Instaloader. Falls back to a headless browser if both fail (e.g., due to
+        rate limits or a login wall).
         """
-        start_time = time.time()
         username_match = re.search(r"instagram\.com/([^/?#&]+)", link)
         target_username = username_match.group(1) if username_match else "unknown_user"
         
         if not target_username:
             raise ValueError(f"Invalid Instagram URL: {link}")
 
-        # Check if Instaloader is on cooldown
-        if (self._last_instaloader_failure_time is not None and
-            (time.time() - self._last_instaloader_failure_time) / 60 < self._instaloader_cooldown_minutes):
-            
-            remaining_cooldown = int(self._instaloader_cooldown_minutes - (time.time() - self._last_instaloader_failure_time) / 60)
-            print(f"InstagramScraper: Instaloader is on cooldown for {remaining_cooldown} more minutes. Skipping Instaloader and falling back to browser.")
-            # Directly proceed to browser scraping
-        else:
-            # If cooldown has passed, re-initialize Instaloader for a fresh context
-            if self._last_instaloader_failure_time is not None:
-                print("InstagramScraper: Instaloader cooldown period ended. Re-initializing Instaloader.")
-                self._initialize_instaloader()
-                self._last_instaloader_failure_time = None # Reset failure time
+        try:
+            followers = self.scrape_http(link)
+            print(f"InstagramScraper: Fast HTTP path succeeded for {target_username}: {followers} followers.")
+            return followers
+        except Exception as e:
+            print(f"InstagramScraper: Fast HTTP path failed for {target_username}: {e}. Trying Instaloader.")
+        return self.scrape_fallback(link)
 
-            try:
-                # Attempt with Instaloader first
-                followers = self._scrape_with_instaloader(target_username)
-                return followers
-            except InstaloaderExceptions.QueryReturnedBadRequestException as e:
-                print(f"InstagramScraper: Instaloader hit rate limit or bad request for {target_username}: {e}. Setting cooldown and falling back to browser.")
-                self._last_instaloader_failure_time = time.time() # Record failure time
-                # Fall through to browser scraping
-            except InstaloaderExceptions.ProfileNotExistsException:
-                print(f"InstagramScraper: Instaloader: Profile '{target_username}' does not exist. Falling back to browser (though it might also fail).")
-                # Fall through to browser scraping
-            except InstaloaderExceptions.PrivateProfileNotFollowedException:
-                print(f"InstagramScraper: Instaloader: Profile '{target_username}' is private. Falling back to browser (will likely fail for private profiles).")
-                # Fall through to browser scraping
-            except InstaloaderExceptions.InstaloaderException as e:
-                print(f"InstagramScraper: Instaloader experienced an unexpected error for {target_username}: {e}. Falling back to browser.")
-                # Fall through to browser scraping
-            except Exception as e:
-                print(f"InstagramScraper: An unexpected non-Instaloader error occurred with Instaloader for {target_username}: {e}. Falling back to browser.")
-                # Fall through to browser scraping
+    def scrape_fallback(self, link: str) -> int:
+        """
+        The tiers after the HTTP fast path: Instaloader (unless its circuit is open),
+        then the headless browser (likewise).
+        """
+        start_time = time.time()
+        username_match = re.search(r"instagram\.com/([^/?#&]+)", link)
+        target_username = username_match.group(1) if username_match else "unknown_user"
+
+        try:
+            # Attempt with Instaloader first
+            followers = self.breaker("instaloader").call(self._scrape_with_instaloader, target_username)
+            return followers
+        except CircuitOpenError as e:
+            print(f"InstagramScraper: {e} Skipping Instaloader and falling back to browser.")
+        except InstaloaderExceptions.QueryReturnedBadRequestException as e:
+            print(f"InstagramScraper: Instaloader hit rate limit or bad request for {target_username}: {e}. Falling back to browser.")
+            # The pool has rotated that context out; the next lookup gets a fresh one
+            # Fall through to browser scraping
+        except InstaloaderExceptions.ProfileNotExistsException:
+            print(f"InstagramScraper: Instaloader: Profile '{target_username}' does not exist. Falling back to browser (though it might also fail).")
+            # Fall through to browser scraping
+        except InstaloaderExceptions.PrivateProfileNotFollowedException:
+            print(f"InstagramScraper: Instaloader: Profile '{target_username}' is private. Falling back to browser (will likely fail for private profiles).")
+            # Fall through to browser scraping
+        except InstaloaderExceptions.InstaloaderException as e:
+            print(f"InstagramScraper: Instaloader experienced an unexpected error for {target_username}: {e}. Falling back to browser.")
+            # Fall through to browser scraping
+        except Exception as e:
+            print(f"InstagramScraper: An unexpected non-Instaloader error occurred with Instaloader for {target_username}: {e}. Falling back to browser.")
+            # Fall through to browser scraping
 
-        # If Instaloader failed or was on cooldown, then try with headless browser
+        # If Instaloader failed or its circuit is open, then try with headless browser
         try:
-            followers = self._scrape_with_headless_browser(link, target_username)
+            followers = self.breaker("browser").call(self._scrape_with_headless_browser, link, target_username)
             return followers
         except Exception as e:
             end_time = time.time()
@@ -0,0 +1,131 @@
+# scraper/instaloader_pool.py
+import threading
+import time
+from contextlib import contextmanager
+
+from .ratelimit import TokenBucket, is_throttle_error
+
+# Requests per second across all contexts (the platform budget), and per context
+POOL_RATE = 0.5
+POOL_BURST = 3
+CONTEXT_RATE = 0.2
+CONTEXT_BURST = 1
+MAX_REQUESTS_PER_CONTEXT = 200  # Rotate a context out proactively after this many lookups
+
+
+class InstaloaderPool:
+    """
+    A bounded pool of independent Instaloader instances (each with its own session
+    and cookies). A leased instance belongs to one thread until it is released, so
+    no two threads ever share an Instaloader context.
+
+    Every lease is paced twice: by the pool's token bucket, which keeps the total rate
+    under the platform's budget, and by the leased context's own bucket, so one
+    session never bursts. A context that gets a rate-limit response is rotated out
+    (dropped and replaced by a fresh one on the next lease), as is one that has served
+    ``max_requests`` lookups.
+    """
+
+    def __init__(self, factory, max_size=3, rate=POOL_RATE, burst=POOL_BURST,
+                 context_rate=CONTEXT_RATE, context_burst=CONTEXT_BURST, max_requests=MAX_REQUESTS_PER_CONTEXT):
+        """
+        Args:
+            factory (callable): Returns a new Instaloader instance.
+            max_size (int): Maximum number of contexts alive at once.
+            rate (float): Requests per second across the whole pool.
+            burst (int): Requests the pool may issue back to back.
+            context_rate (float): Requests per second for a single context.
+            context_burst (int): Requests a single context may issue back to back.
+            max_requests (int): Lookups served before a context is rotated out.
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.context_rate = context_rate
+        self.context_burst = context_burst
+        self.max_requests = max_requests
+        self._bucket = TokenBucket(rate, burst)
+        self._idle = []
+        self._live = 0
+        self._contexts = {}  # id(loader) -> {"bucket": TokenBucket, "requests": n}
+        self._cond = threading.Condition()
+        self.counts = {"created": 0, "rotated": 0, "throttled": 0}
+
+    def acquire(self, timeout=None):
+        """
+        Lease an idle context, creating one if the pool has room; blocks otherwise,
+        for at most ``timeout`` seconds in total (None waits forever).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.max_size:
+                    self._live += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(f"InstaloaderPool: no context available after {timeout} seconds.")
+
+        try:
+            loader = self.factory()
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._contexts[id(loader)] = {"bucket": TokenBucket(self.context_rate, self.context_burst), "requests": 0}
+            self.counts["created"] += 1
+        print(f"InstaloaderPool: Started new context ({self._live}/{self.max_size} live).")
+        return loader
+
+    def release(self, loader, rotate=False):
+        """Return a context to the pool, or drop it if it must be rotated out."""
+        if loader is None:
+            return
+        with self._cond:
+            state = self._contexts[id(loader)]
+            if rotate or state["requests"] >= self.max_requests:
+                reason = "rate limited" if rotate else f"{state['requests']} requests served"
+                print(f"InstaloaderPool: Rotating context out ({reason}).")
+                del self._contexts[id(loader)]
+                self._live -= 1
+                self.counts["rotated"] += 1
+            else:
+                self._idle.append(loader)
+            self._cond.notify()
+
+    def pace(self, loader):
+        """Wait until both the pool and this context may send another request."""
+        with self._cond:
+            state = self._contexts[id(loader)]
+            state["requests"] += 1
+            context_bucket = state["bucket"]
+        self._bucket.acquire()
+        context_bucket.acquire()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Context manager yielding a paced Instaloader instance for one lookup. If the
+        body raises a rate-limit error the context is rotated out.
+        """
+        loader = self.acquire(timeout)
+        rotate = False
+        try:
+            self.pace(loader)
+            yield loader
+        except Exception as e:
+            rotate = is_throttle_error(e)
+            if rotate:
+                with self._cond:
+                    self.counts["throttled"] += 1
+            raise
+        finally:
+            self.release(loader, rotate=rotate)
+
+    def stats(self):
+        """Return a snapshot of the pool's occupancy and rotations for logging or inspection."""
+        with self._cond:
+            return dict(self.counts, live=self._live, idle=len(self._idle), max_size=self.max_size)
@@ -0,0 +1,186 @@
+# scraper/network_profile.py
+"""
+Network blocking profiles for the scraper browsers.
+
+Every scraper reads a single number, so images, video, fonts and trackers are
+blocked at the Chrome DevTools Protocol level (Network.setBlockedURLs) as soon as a
+browser is created. Each platform blocks a set of resource classes plus its own
+media hosts; its allow-list puts back patterns the page turned out to need.
+
+Page weight is recorded per platform from the Resource Timing API, and
+measure_savings() loads a page with and without the profile to report the bytes
+saved:
+
+    python -m scraper.network_profile twitter https://x.com/someone
+"""
+import os
+import sys
+import threading
+
+# URL patterns (Network.setBlockedURLs wildcards) per resource class
+RESOURCE_PATTERNS = {
+    "image": ("*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico", "*.bmp"),
+    "media": ("*.mp4", "*.webm", "*.m4s", "*.m3u8", "*.mp3", "*.m4a"),
+    "font": ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"),
+    "tracker": ("*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+                "*connect.facebook.net*", "*sentry.io*", "*hotjar.com*"),
+}
+
+# Per platform: resource classes to block, extra patterns (media CDNs, telemetry),
+# and an allow-list of patterns removed from the final block list (for when a page
+# change makes it depend on something a class would block, e.g. allow=("*.woff2",)).
+PLATFORM_PROFILES = {
+    "instagram": {
+        "block": ("image", "media", "font", "tracker"),
+        "extra": ("*scontent*.cdninstagram.com*", "*scontent*.fbcdn.net*", "*graph.instagram.com/logging*"),
+        "allow": (),
+    },
+    "tiktok": {
+        "block": ("image", "media", "font", "tracker"),
+        "extra": ("*tiktokcdn*.com/*~tplv*", "*v16-webapp*.tiktok.com*", "*mon.tiktokv.com*", "*mcs.tiktokw.us*"),
+        "allow": (),
+    },
+    "twitter": {
+        "block": ("image", "media", "font", "tracker"),
+        "extra": ("*pbs.twimg.com/media/*", "*pbs.twimg.com/profile_banners/*", "*video.twimg.com*",
+                  "*api.x.com/1.1/jot/*"),
+        "allow": (),
+    },
+}
+
+# Set SCRAPER_BLOCK_RESOURCES=0 to load pages in full (e.g. while debugging a scraper)
+ENABLED = os.environ.get("SCRAPER_BLOCK_RESOURCES", "1") != "0"
+
+# Total bytes and resource count of the page as reported by the Resource Timing API.
+# Cross-origin resources without Timing-Allow-Origin report 0, so this is a lower bound.
+_PAGE_WEIGHT_JS = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+let bytes = 0;
+for (const e of entries) { bytes += Math.max(e.transferSize || 0, e.encodedBodySize || 0); }
+return [bytes, entries.length];
+"""
+
+_stats = {}  # platform -> {"pages": n, "bytes": total, "resources": total}
+_stats_lock = threading.Lock()
+
+
+def blocked_urls(platform):
+    """The URL patterns blocked for a platform."""
+    profile = PLATFORM_PROFILES.get(platform, {"block": ("image", "media", "font", "tracker"), "extra": (), "allow": ()})
+    patterns = [p for cls in profile["block"] for p in RESOURCE_PATTERNS[cls]] + list(profile["extra"])
+    allowed = set(profile["allow"])
+    return [p for p in dict.fromkeys(patterns) if p not in allowed]
+
+
+def set_profile(platform, block=None, extra=None, allow=None):
+    """Override parts of a platform's profile; applies to browsers created afterwards."""
+    profile = PLATFORM_PROFILES.setdefault(platform, {"block": (), "extra": (), "allow": ()})
+    if block is not None:
+        unknown = set(block) - set(RESOURCE_PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown resource classes: {', '.join(sorted(unknown))}")
+        profile["block"] = tuple(block)
+    if extra is not None:
+        profile["extra"] = tuple(extra)
+    if allow is not None:
+        profile["allow"] = tuple(allow)
+
+
+def apply_profile(driver, platform, enabled=None):
+    """
+    Install the platform's block list on a Chrome session via CDP. Failures are
+    logged, not raised: a browser without blocking still scrapes correctly.
+    Returns the number of patterns installed.
+    """
+    enabled = ENABLED if enabled is None else enabled
+    urls = blocked_urls(platform) if enabled else []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+    except Exception as e:
+        print(f"NetworkProfile[{platform}]: Could not apply blocking profile: {e}", file=sys.stderr)
+        return 0
+    return len(urls)
+
+
+def page_weight(driver):
+    """(bytes, resources) transferred for the page currently loaded in driver."""
+    bytes_, count = driver.execute_script(_PAGE_WEIGHT_JS)
+    return int(bytes_), int(count)
+
+
+def record_page(driver, platform):
+    """Add the current page's weight to the platform's running totals (best effort)."""
+    try:
+        bytes_, count = page_weight(driver)
+    except Exception:
+        return
+    with _stats_lock:
+        stats = _stats.setdefault(platform, {"pages": 0, "bytes": 0, "resources": 0})
+        stats["pages"] += 1
+        stats["bytes"] += bytes_
+        stats["resources"] += count
+
+
+def page_weight_stats():
+    """Per platform: pages recorded, and average KB and resources per page."""
+    with _stats_lock:
+        return {
+            platform: {
+                "pages": s["pages"],
+                "avg_kb": round(s["bytes"] / s["pages"] / 1024, 1),
+                "avg_resources": round(s["resources"] / s["pages"], 1),
+            }
+            for platform, s in _stats.items() if s["pages"]
+        }
+
+
+def measure_savings(driver, platform, url):
+    """
+    Load url once without and once with the platform's profile (cache disabled) and
+    return {"full_bytes", "blocked_bytes", "saved_bytes", "full_resources", "blocked_resources"}.
+    Leaves the profile applied.
+    """
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+    try:
+        apply_profile(driver, platform, enabled=False)
+        driver.get(url)
+        full_bytes, full_count = page_weight(driver)
+        apply_profile(driver, platform, enabled=True)
+        driver.get(url)
+        blocked_bytes, blocked_count = page_weight(driver)
+    finally:
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+    return {
+        "full_bytes": full_bytes,
+        "blocked_bytes": blocked_bytes,
+        "saved_bytes": full_bytes - blocked_bytes,
+        "full_resources": full_count,
+        "blocked_resources": blocked_count,
+    }
+
+
+def main(argv=None):
+    import argparse
+    from . import InstagramScraper, TikTokScraper, XTwitterScraper
+
+    parser = argparse.ArgumentParser(description="Measure bytes saved by a platform's blocking profile.")
+    parser.add_argument("platform", choices=sorted(PLATFORM_PROFILES))
+    parser.add_argument("url", help="Profile URL to load.")
+    args = parser.parse_args(argv)
+
+    scraper = {"instagram": InstagramScraper, "tiktok": TikTokScraper, "twitter": XTwitterScraper}[args.platform]()
+    driver = scraper.driver_pool.acquire()
+    try:
+        result = measure_savings(driver, args.platform, args.url)
+    finally:
+        scraper.driver_pool.release(driver)
+        scraper.driver_pool.close()
+    saved_pct = 100 * result["saved_bytes"] / result["full_bytes"] if result["full_bytes"] else 0
+    print(f"{args.platform}: {result['full_bytes'] / 1024:.0f} KB in {result['full_resources']} resources without blocking, "
+          f"{result['blocked_bytes'] / 1024:.0f} KB in {result['blocked_resources']} with it "
+          f"({result['saved_bytes'] / 1024:.0f} KB, {saved_pct:.0f}% saved).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+# scraper/ratelimit.py
+import asyncio
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-platform defaults: request rate (tokens/second), burst size, and the AIMD
+# concurrency window (initial, min, max) plus the latency above which a scrape
+# counts as a congestion signal. Instagram starts low because it trips
+# QueryReturnedBadRequestException quickly; TikTok and X tolerate far more.
+DEFAULT_PLATFORM_LIMITS = {
+    "instagram": {"rate": 0.5, "burst": 3,  "initial": 2, "min_limit": 1, "max_limit": 6,  "latency_target": 20.0},
+    "tiktok":    {"rate": 5.0, "burst": 10, "initial": 5, "min_limit": 1, "max_limit": 32, "latency_target": 15.0},
+    "twitter":   {"rate": 5.0, "burst": 10, "initial": 5, "min_limit": 1, "max_limit": 32, "latency_target": 15.0},
+}
+FALLBACK_LIMITS = {"rate": 1.0, "burst": 2, "initial": 2, "min_limit": 1, "max_limit": 8, "latency_target": 20.0}
+
+# Substrings that mark an error as the platform pushing back rather than a plain failure
+THROTTLE_MARKERS = ("429", "too many requests", "rate limit", "queryreturnedbadrequest", "please wait a few minutes")
+
+
+def is_throttle_error(exc):
+    """Heuristically decide whether an exception means the platform is throttling us."""
+    if exc is None:
+        return False
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. ``reserve()`` takes a token immediately (the balance may
+    go negative) and returns how long the caller must wait before using it, so the same
+    bucket serves blocking threads (time.sleep) and coroutines (asyncio.sleep).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return the number of seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    @property
+    def available(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit with additive-increase / multiplicative-decrease control.
+
+    Every successful, fast completion grows the window by 1/limit (about +1 per full
+    window of work); an error, a throttle response or a latency above
+    ``latency_target`` shrinks it by ``backoff``. Decreases are applied at most once
+    per ``decrease_cooldown`` seconds so one burst of failures is one signal.
+    """
+
+    def __init__(self, initial, minimum, maximum, latency_target, backoff=0.5, decrease_cooldown=5.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.decrease_cooldown = decrease_cooldown
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._error_rate = 0.0      # EWMA of failures
+        self._latency = None        # EWMA of latency in seconds
+        self._cond = threading.Condition()
+        self._async_waiters = collections.deque()  # (loop, future) of coroutines in acquire_async()
+
+    @property
+    def limit(self):
+        return max(self.minimum, int(self._limit))
+
+    def try_acquire(self):
+        """Take a concurrency slot if one is free. Returns True on success."""
+        with self._cond:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """Block until a concurrency slot is free."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_flight < self.limit, timeout):
+                raise TimeoutError("AIMDLimiter: no slot available.")
+            self._in_flight += 1
+
+    async def acquire_async(self):
+        """
+        Coroutine version of acquire(). Waiting coroutines sleep on a future that
+        release() resolves (thread-safely, on the coroutine's own loop) when a slot
+        frees up, so any number of them can wait without polling.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._cond:
+                    try:
+                        self._async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        self._wake_async_locked() # Already woken; pass the wake-up on
+                raise
+
+    def _wake_async_locked(self):
+        """Wake as many async waiters as there are free slots. Caller must hold self._cond."""
+        free = self.limit - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(_resolve, waiter)
+            free -= 1
+
+    def release(self, latency, failed=False, throttled=False):
+        """Free a slot and feed the outcome back into the window."""
+        with self._cond:
+            self._in_flight -= 1
+            self._error_rate = 0.9 * self._error_rate + 0.1 * (1.0 if failed or throttled else 0.0)
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+
+            congested = throttled or failed or latency > self.latency_target
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._limit = max(float(self.minimum), self._limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self.maximum), self._limit + 1.0 / max(1.0, self._limit))
+            self._cond.notify_all()
+            self._wake_async_locked()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "error_rate": round(self._error_rate, 3),
+                "latency_ewma": round(self._latency, 2) if self._latency is not None else None,
+            }
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class PlatformLimiter:
+    """Token bucket (request rate) plus AIMD window (concurrency) for one platform."""
+
+    def __init__(self, platform, rate, burst, initial, min_limit, max_limit, latency_target):
+        self.platform = platform
+        self.bucket = TokenBucket(rate, burst)
+        self.window = AIMDLimiter(initial, min_limit, max_limit, latency_target)
+
+    def acquire(self):
+        self.window.acquire()
+        self.bucket.acquire()
+
+    async def acquire_async(self):
+        """Coroutine version of acquire() for the asyncio engine."""
+        await self.window.acquire_async()
+        delay = self.bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def release(self, latency, error=None):
+        throttled = is_throttle_error(error)
+        self.window.release(latency, failed=error is not None and not throttled, throttled=throttled)
+
+    def snapshot(self):
+        state = self.window.snapshot()
+        state["tokens"] = round(self.bucket.available, 2)
+        state["rate"] = self.bucket.rate
+        return state
+
+
+class RateLimiterRegistry:
+    """Holds one PlatformLimiter per platform, created on first use from the defaults."""
+
+    def __init__(self, overrides=None):
+        self._config = {p: dict(cfg) for p, cfg in DEFAULT_PLATFORM_LIMITS.items()}
+        for platform, cfg in (overrides or {}).items():
+            self._config.setdefault(platform, dict(FALLBACK_LIMITS)).update(cfg)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, platform):
+        with self._lock:
+            limiter = self._limiters.get(platform)
+            if limiter is None:
+                limiter = PlatformLimiter(platform, **self._config.get(platform, FALLBACK_LIMITS))
+                self._limiters[platform] = limiter
+            return limiter
+
+    @contextmanager
+    def slot(self, platform):
+        """
+        Context manager for one scrape: waits for a token and a concurrency slot, then
+        reports latency and any raised error back to the platform's AIMD window.
+        """
+        limiter = self.get(platform)
+        limiter.acquire()
+        start = time.monotonic()
+        error = None
+        try:
+            yield limiter
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            limiter.release(time.monotonic() - start, error)
+
+    def max_concurrency(self):
+        """Upper bound on total concurrent scrapes across the configured platforms."""
+        return sum(cfg["max_limit"] for cfg in self._config.values())
+
+    def snapshot(self):
+        """Live limits per platform, for logging or inspection from the UI/REPL."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {platform: limiter.snapshot() for platform, limiter in limiters.items()}
@@ -0,0 +1,110 @@
+# scraper/strategies.py
+"""
+Adaptive ordering of a scraper's extraction methods.
+
+A scraper hands run() its methods for one stage (e.g. the TikTok browser page) as
+(name, callable) pairs in their preferred order. Each callable returns the follower
+count, or None / raises if it found nothing. run() tries them best-first and records
+every outcome, so when a site layout change kills a method its success rate decays,
+the methods that still work move ahead of it, and once it has failed often enough it
+is skipped altogether, apart from an occasional probe that lets it recover.
+
+Methods are ranked by success rate (EWMA, in steps of 0.1) and then by latency
+(EWMA, seconds, failures included). A method not tried yet counts as always
+successful but slower than any method that has been tried, so the declared order
+holds until there is evidence against it.
+"""
+import sys
+import threading
+import time
+
+from .driver_pool import _looks_like_driver_crash
+
+EWMA_ALPHA = 0.2      # Weight of the newest outcome
+MIN_TRIALS = 10       # Outcomes needed before a method can be skipped
+SKIP_BELOW = 0.05     # Success rate under which a method is skipped
+PROBE_EVERY = 25      # Skipped methods are still tried (last) once in this many runs
+
+
+class StrategyRanker:
+    """Thread-safe success and latency statistics per (stage, method)."""
+
+    def __init__(self):
+        self._stats = {}  # (stage, method) -> {"trials", "success", "latency"}
+        self._runs = {}   # stage -> runs so far
+        self._lock = threading.Lock()
+
+    def order(self, stage, names):
+        """The methods to try for one run of stage, best first (skipped ones left out)."""
+        with self._lock:
+            runs = self._runs[stage] = self._runs.get(stage, 0) + 1
+            stats = [self._stats.get((stage, name)) for name in names]
+        ranked = sorted(
+            range(len(names)),
+            key=lambda i: (-round(stats[i]["success"], 1), stats[i]["latency"], i) if stats[i]
+                          else (-1.0, float("inf"), i))
+        active = [names[i] for i in ranked if not self._skipped(stats[i])]
+        skipped = [names[i] for i in ranked if self._skipped(stats[i])]
+        if not active:
+            return [names[i] for i in ranked]
+        if runs % PROBE_EVERY == 0:
+            return active + skipped
+        return active
+
+    @staticmethod
+    def _skipped(stats):
+        return stats is not None and stats["trials"] >= MIN_TRIALS and stats["success"] < SKIP_BELOW
+
+    def record(self, stage, name, success, seconds):
+        with self._lock:
+            stats = self._stats.get((stage, name))
+            if stats is None:
+                self._stats[(stage, name)] = {"trials": 1, "success": float(success), "latency": seconds}
+                return
+            stats["trials"] += 1
+            stats["success"] += EWMA_ALPHA * (float(success) - stats["success"])
+            stats["latency"] += EWMA_ALPHA * (seconds - stats["latency"])
+
+    def snapshot(self):
+        """{"stage": {"method": {"trials", "success", "latency"}}} for logging."""
+        with self._lock:
+            result = {}
+            for (stage, name), stats in self._stats.items():
+                result.setdefault(stage, {})[name] = {
+                    "trials": stats["trials"],
+                    "success": round(stats["success"], 2),
+                    "latency": round(stats["latency"], 2),
+                    "skipped": self._skipped(stats),
+                }
+            return result
+
+
+_ranker = StrategyRanker()
+
+
+def run(stage, strategies):
+    """
+    Try strategies ((name, callable) pairs in preferred order) best-first until one
+    returns a count. Returns (name, count), or (None, None) if every method tried
+    came up empty. A crashed browser session is re-raised without being recorded:
+    it says nothing about the methods, and the caller must recycle the driver.
+    """
+    funcs = dict(strategies)
+    for name in _ranker.order(stage, [name for name, _ in strategies]):
+        start = time.monotonic()
+        try:
+            value = funcs[name]()
+        except Exception as e:
+            if _looks_like_driver_crash(e):
+                raise
+            print(f"Strategies[{stage}]: Method '{name}' failed: {e}", file=sys.stderr)
+            value = None
+        _ranker.record(stage, name, value is not None, time.monotonic() - start)
+        if value is not None:
+            return name, value
+    return None, None
+
+
+def strategy_stats():
+    """Per stage and method: trials, success rate, latency and whether it is being skipped."""
+    return _ranker.snapshot()
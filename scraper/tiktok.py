@@ -1,35 +1,41 @@
 # scraper/tiktok.py
 import re, json
 import time
-import os # Import the os module for path operations
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By # Import By
 
 from .base import Scraper
+from . import artifacts, extract, waits
+from .driver_pool import ACQUIRE_TIMEOUT_SECONDS, get_pool
+from .network_profile import apply_profile, record_page
 
 # Define the folder for failed screenshots
 FAILED_SCREENSHOTS_DIR = "tiktok_failed"
 
+# Elements that show the follower count when the page carries no state blob
+FOLLOWERS_XPATH = ("//strong[@title='Followers'] | "
+                   "//div[contains(translate(text(), 'F', 'f'), 'followers')] | "
+                   "//span[contains(translate(text(), 'F', 'f'), 'followers')] | "
+                   "//p[contains(translate(text(), 'F', 'f'), 'followers')]")
+
 class TikTokScraper(Scraper):
-    """Headless-browser scraper for TikTok follower counts with enhanced robustness."""
+    """
+    Scraper for TikTok follower counts: a browserless HTTP fast path first,
+    then a headless browser with enhanced robustness.
+    """
 
-    def scrape(self, link: str) -> int:
-        start_time = time.time() # Start timing the scrape operation
+    platform = "tiktok"
 
-        # Extract username early for consistent naming, even if scrape fails
-        username_match = re.search(r"tiktok\.com/@([^/?#&]+)", link)
-        target_username = username_match.group(1) if username_match else "unknown_user"
-        
-        # Ensure the failed screenshots directory exists
-        if not os.path.exists(FAILED_SCREENSHOTS_DIR):
-            os.makedirs(FAILED_SCREENSHOTS_DIR)
-            print(f"Created directory: {FAILED_SCREENSHOTS_DIR}")
+    def __init__(self, max_browsers=3, max_pages_per_browser=50):
+        self._driver_path = None # Resolved once by ChromeDriverManager, then reused
+        self.driver_pool = get_pool("tiktok", self._create_driver,
+                                    max_size=max_browsers, max_pages=max_pages_per_browser)
 
+    def _create_driver(self):
+        """Factory used by the driver pool to start a new headless Chrome."""
         options = webdriver.ChromeOptions()
         options.add_argument("--headless")
         options.add_argument("--disable-gpu") # Recommended for headless
@@ -40,179 +46,182 @@ class TikTokScraper(Scraper):
         options.add_argument("--window-size=1920,1080") # Add window size for consistent rendering
         options.page_load_strategy = 'eager' # Set page load strategy to eager for faster loading
 
-        driver = None # Initialize driver to None
+        if self._driver_path is None:
+            self._driver_path = ChromeDriverManager().install()
+        driver = webdriver.Chrome(service=Service(self._driver_path), options=options)
+        apply_profile(driver, self.platform) # Skip images, video, fonts and trackers
+        return driver
+
+    def profile_url(self, link: str) -> str:
+        """The profile page itself carries the state blob in its server-sent HTML."""
+        return link
+
+    def extract_from_html(self, html: str, link: str) -> int:
+        """Read the follower count from the state blob in server-sent profile HTML."""
+        username_match = re.search(r"tiktok\.com/@([^/?#&]+)", link)
+        target_username = username_match.group(1) if username_match else "unknown_user"
+        followers = self._follower_count_from_state(html, target_username, link)
+        if followers is None:
+            raise ValueError(f"No follower count in server-sent state for {link}.")
+        return followers
+
+    def _follower_count_from_state(self, html, target_username, link):
+        """
+        Return the follower count from the SIGI_STATE blob or its successor,
+        __UNIVERSAL_DATA_FOR_REHYDRATION__, or None if neither yields one.
+        """
+        script = extract.script_text(html, "SIGI_STATE")
+        if script:
+            try:
+                data = json.loads(script)
+                # print(f"DEBUG: SIGI_STATE data for {link}: {json.dumps(data, indent=2)}") # Uncomment for debugging
+                
+                user_module = data.get("UserModule", {})
+                users = user_module.get("users", {})
+                
+                if target_username != "unknown_user":
+                    # Try to find the user by uniqueId or nickname
+                    for user_key, user_data in users.items():
+                        if user_data.get("uniqueId") == target_username or user_data.get("nickname") == target_username:
+                            if "stats" in user_data and "followerCount" in user_data["stats"]:
+                                return user_data["stats"]["followerCount"]
+                    print(f"Target username '{target_username}' not found in SIGI_STATE users for {link}. Trying first user.")
+                
+                # Fallback if specific user not found by iterating, try to get the first one if it exists
+                first_user_key = next(iter(users), None)
+                if first_user_key and "stats" in users[first_user_key] and "followerCount" in users[first_user_key]["stats"]:
+                    print(f"Found follower count in SIGI_STATE for {link} via first_user_key.")
+                    return users[first_user_key]["stats"]["followerCount"]
+
+            except (json.JSONDecodeError, KeyError, AttributeError) as e:
+                print(f"Error parsing SIGI_STATE JSON for {link}: {e}")
+
+        script = extract.script_text(html, "__UNIVERSAL_DATA_FOR_REHYDRATION__")
+        if script:
+            try:
+                data = json.loads(script)
+                user_detail = data.get("__DEFAULT_SCOPE__", {}).get("webapp.user-detail", {})
+                stats = user_detail.get("userInfo", {}).get("stats", {})
+                if "followerCount" in stats:
+                    return stats["followerCount"]
+            except (json.JSONDecodeError, KeyError, AttributeError) as e:
+                print(f"Error parsing rehydration JSON for {link}: {e}")
+        return None
+
+    def _follower_count_from_strong(self, driver):
+        """The visible <strong title="Followers"> count, waiting for it to render; None if absent."""
+        # Scroll so lazily rendered profile content loads, then wait for the followers element
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        waits.wait_for(driver, self.platform, "followers", waits.element_present(By.XPATH, FOLLOWERS_XPATH))
+        text = extract.titled_text(driver.page_source, "strong", "Followers")
+        return extract.parse_count(text) if text else None
+
+    @staticmethod
+    def _follower_count_from_text(driver):
+        """The first "1,234 followers"-like text on the rendered page; None if absent."""
+        num_str = extract.followers_in_text(driver.page_source)
+        return extract.parse_count(num_str) if num_str else None
+
+    def scrape(self, link: str) -> int:
+        """
+        Try the browserless HTTP fast path first and fall back to the headless
+        browser only when it cannot produce a count.
+        """
+        try:
+            followers = self.scrape_http(link)
+            print(f"TikTokScraper: Fast HTTP path succeeded for {link}: {followers} followers.")
+            return followers
+        except Exception as e:
+            print(f"TikTokScraper: Fast HTTP path failed for {link}: {e}. Falling back to browser.")
+        return self.scrape_fallback(link)
+
+    def scrape_fallback(self, link: str) -> int:
+        """The headless-browser tier, failing fast while its circuit is open."""
+        return self.breaker("browser").call(self._scrape_with_headless_browser, link)
+
+    def _scrape_with_headless_browser(self, link: str) -> int:
+        start_time = time.time() # Start timing the scrape operation
+
+        # Extract username early for consistent naming, even if scrape fails
+        username_match = re.search(r"tiktok\.com/@([^/?#&]+)", link)
+        target_username = username_match.group(1) if username_match else "unknown_user"
+        
         MAX_RETRIES = 2 # Number of times to retry scraping a link
         
         for attempt in range(MAX_RETRIES + 1):
+            driver = None # Leased from the pool (or the batch session) for this attempt only
+            broken = False # Set when the browser session itself failed and must be recycled
+            pool = self.browser_pool()
             try:
-                driver = webdriver.Chrome(
-                    service=Service(ChromeDriverManager().install()),
-                    options=options
-                )
+                driver = pool.acquire(ACQUIRE_TIMEOUT_SECONDS)
                 print(f"Attempt {attempt + 1}: Navigating to TikTok link: {link}")
                 
                 try:
                     driver.get(link)
-                    # Add a small initial wait to allow page to start loading
-                    time.sleep(2) # Reduced initial sleep for faster execution
-                    
-                    # Wait for the body element to be present as a general indicator of page load
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    print(f"Page body loaded for {link}.")
-
-                    # Scroll down to ensure dynamic content loads
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1) # Give a moment for content to load after scroll
-                    print(f"Scrolled down page for {link}.")
+                    # Continue as soon as the state blob or the followers element is there
+                    waits.wait_for(driver, self.platform, "ready", waits.any_of(
+                        waits.script_present("SIGI_STATE", "__UNIVERSAL_DATA_FOR_REHYDRATION__"),
+                        waits.element_present(By.XPATH, FOLLOWERS_XPATH),
+                    ))
+                    print(f"Page ready for {link}.")
+                    record_page(driver, self.platform)
 
                 except Exception as e:
                     print(f"Error navigating to or loading page for {link} on attempt {attempt + 1}: {e}")
-                    if driver:
-                        # Save screenshot on load error, named by username and attempt
-                        screenshot_path = os.path.join(FAILED_SCREENSHOTS_DIR, f"{target_username}_load_error_attempt_{attempt+1}.png")
-                        driver.save_screenshot(screenshot_path)
-                        print(f"Screenshot saved: {screenshot_path}")
-                        driver.quit() # Ensure driver is closed before retrying
+                    # Screenshot on load error (sampled, written in the background)
+                    artifacts.capture(driver, FAILED_SCREENSHOTS_DIR, target_username, "load_error", e)
+                    # Recycle crashed sessions before retrying; a page that never got ready is not a crash
+                    broken = isinstance(e, WebDriverException) and not isinstance(e, TimeoutException)
                     if attempt < MAX_RETRIES:
                         print(f"Retrying {link} after a delay...")
-                        time.sleep(1) # Reduced wait before retrying
+                        waits.retry_delay(attempt)
                         continue # Go to the next attempt
                     else:
                         raise Exception(f"Failed to load page for {link} after {MAX_RETRIES + 1} attempts.")
 
-                # Parse the rendered HTML
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-
-                # 1) Try the SIGI_STATE JSON blob
-                script = soup.find("script", id="SIGI_STATE")
-                if script and script.string:
-                    try:
-                        data = json.loads(script.string)
-                        # print(f"DEBUG: SIGI_STATE data for {link}: {json.dumps(data, indent=2)}") # Uncomment for debugging
-                        
-                        user_module = data.get("UserModule", {})
-                        users = user_module.get("users", {})
-                        
-                        if target_username != "unknown_user":
-                            # Try to find the user by uniqueId or nickname
-                            for user_key, user_data in users.items():
-                                if user_data.get("uniqueId") == target_username or user_data.get("nickname") == target_username:
-                                    if "stats" in user_data and "followerCount" in user_data["stats"]:
-                                        end_time = time.time() # End timing
-                                        duration = end_time - start_time
-                                        print(f"Successfully scraped follower count for {link} (matched {target_username}) in {duration:.2f} seconds.")
-                                        return user_data["stats"]["followerCount"]
-                            print(f"Target username '{target_username}' not found in SIGI_STATE users for {link}. Trying first user.")
-                        
-                        # Fallback if specific user not found by iterating, try to get the first one if it exists
-                        first_user_key = next(iter(users), None)
-                        if first_user_key and "stats" in users[first_user_key] and "followerCount" in users[first_user_key]["stats"]:
-                            end_time = time.time() # End timing
-                            duration = end_time - start_time
-                            print(f"Found follower count in SIGI_STATE for {link} via first_user_key in {duration:.2f} seconds.")
-                            return users[first_user_key]["stats"]["followerCount"]
-
-                    except (json.JSONDecodeError, KeyError, AttributeError) as e:
-                        print(f"Error parsing SIGI_STATE JSON for {link}: {e}")
-                        # Fall through to fallback if SIGI_STATE parsing fails or if data not found
-
-                print(f"SIGI_STATE method failed or data not found for {link}. Attempting fallback.")
-
-                # 2) Fallback: visible <strong title="Followers"> or similar elements
-                try:
-                    # Wait for a div that typically contains follower information
-                    WebDriverWait(driver, 15).until( 
-                        EC.presence_of_element_located((By.XPATH, 
-                            "//strong[@title='Followers'] | "
-                            "//div[contains(translate(text(), 'F', 'f'), 'followers')] | "
-                            "//span[contains(translate(text(), 'F', 'f'), 'followers')] | "
-                            "//p[contains(translate(text(), 'F', 'f'), 'followers')]"
-                        ))
-                    )
-                    soup_fallback = BeautifulSoup(driver.page_source, "html.parser") # Re-parse after waiting for elements
-
-                    strong = soup_fallback.find("strong", {"title": "Followers"})
-                    if strong:
-                        text = strong.get_text(strip=True).upper()
-                        print(f"Found strong tag text for {link}: {text}")
-                        if text.endswith("M"):
-                            end_time = time.time() # End timing
-                            duration = end_time - start_time
-                            print(f"Scraped follower count via strong tag for {link} in {duration:.2f} seconds.")
-                            return int(float(text[:-1]) * 1_000_000)
-                        elif text.endswith("K"):
-                            end_time = time.time() # End timing
-                            duration = end_time - start_time
-                            print(f"Scraped follower count via strong tag for {link} in {duration:.2f} seconds.")
-                            return int(float(text[:-1]) * 1_000)
-                        else:
-                            end_time = time.time() # End timing
-                            duration = end_time - start_time
-                            print(f"Scraped follower count via strong tag for {link} in {duration:.2f} seconds.")
-                            return int(text.replace(",", ""))
-                    
-                    # Broader search for follower count text
-                    follower_elements = soup_fallback.find_all(text=re.compile(r"(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d)?[KkMm]?)\s*followers?", re.IGNORECASE))
-                    for elem in follower_elements:
-                        match = re.search(r"(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d)?[KkMm]?)\s*followers?", elem, re.IGNORECASE)
-                        if match:
-                            num_str = match.group(1).replace(',', '')
-                            print(f"Found follower count via regex fallback for {link}: {num_str}")
-                            end_time = time.time() # End timing
-                            duration = end_time - start_time
-                            print(f"Scraped follower count via regex fallback for {link} in {duration:.2f} seconds.")
-                            if num_str.endswith("M"):
-                                return int(float(num_str[:-1]) * 1_000_000)
-                            elif num_str.endswith("K"):
-                                return int(float(num_str[:-1]) * 1_000)
-                            else:
-                                return int(float(num_str)) 
-
-                except Exception as e:
-                    print(f"Error during TikTok fallback scraping for {link}: {e}")
+                # The SIGI_STATE blob, the <strong title="Followers"> element and a text
+                # regex, tried in whichever order currently works best
+                method, followers = self.run_strategies("browser", [
+                    ("state", lambda: self._follower_count_from_state(driver.page_source, target_username, link)),
+                    ("strong", lambda: self._follower_count_from_strong(driver)),
+                    ("text", lambda: self._follower_count_from_text(driver)),
+                ])
+                if followers is not None:
+                    end_time = time.time() # End timing
+                    duration = end_time - start_time
+                    print(f"Successfully scraped follower count for {link} via {method} in {duration:.2f} seconds.")
+                    return followers
 
-                # If both methods fail for the current attempt
+                # If every method fails for the current attempt
                 if attempt == MAX_RETRIES:
-                    if driver:
-                        # Save screenshot on final scrape failure, named by username
-                        screenshot_path = os.path.join(FAILED_SCREENSHOTS_DIR, f"{target_username}_scrape_fail.png")
-                        driver.save_screenshot(screenshot_path)
-                        print(f"Screenshot saved: {screenshot_path}")
+                    # Screenshot on final scrape failure
+                    artifacts.capture(driver, FAILED_SCREENSHOTS_DIR, target_username, "scrape_fail")
                     end_time = time.time() # End timing
                     duration = end_time - start_time
                     print(f"Failed to locate TikTok follower count for {link} after {MAX_RETRIES + 1} attempts. Total time: {duration:.2f} seconds.")
                     raise Exception(f"Could not locate TikTok follower count for {link} using any method after {MAX_RETRIES + 1} attempts.")
                 else:
                     print(f"Scraping failed for {link} on attempt {attempt + 1}. Retrying...")
-                    # Close driver before retrying
-                    if driver:
-                        driver.quit()
-                    time.sleep(1) 
+                    waits.retry_delay(attempt)
                     continue 
 
             except Exception as overall_e:
                 print(f"An unhandled error occurred during TikTok scraping for {link}: {overall_e}")
+                broken = broken or isinstance(overall_e, WebDriverException)
                 if attempt == MAX_RETRIES:
-                    if driver:
-                        # Save screenshot on unhandled error, named by username
-                        screenshot_path = os.path.join(FAILED_SCREENSHOTS_DIR, f"{target_username}_unhandled_error.png")
-                        driver.save_screenshot(screenshot_path)
-                        print(f"Screenshot saved: {screenshot_path}")
+                    # Screenshot on unhandled error
+                    artifacts.capture(driver, FAILED_SCREENSHOTS_DIR, target_username, "unhandled_error", overall_e)
                     end_time = time.time() # End timing
                     duration = end_time - start_time
                     print(f"Unhandled error during scrape for {link} after {MAX_RETRIES + 1} attempts. Total time: {duration:.2f} seconds.")
                     raise 
                 else:
                     print(f"Scraping failed for {link} on attempt {attempt + 1}. Retrying...")
-                    if driver:
-                        driver.quit()
-                    time.sleep(1) 
+                    waits.retry_delay(attempt)
                     continue 
             finally:
-                if driver:
-                    driver.quit()
+                # Hand the browser back for the next account instead of quitting it
+                pool.release(driver, broken=broken)
         
         end_time = time.time() # End timing for unexpected path
         duration = end_time - start_time
@@ -0,0 +1,152 @@
+# scraper/waits.py
+"""
+Readiness waits for the browser scrapers.
+
+Instead of sleeping a fixed number of seconds after driver.get(), the scrapers poll
+for the thing they are about to extract (a state blob, a meta tag, the followers
+element) and continue the moment it is there. How long to keep polling is learned
+per platform and stage: the timeout is a multiple of the recent p95 latency of that
+wait, clamped to [MIN_TIMEOUT, MAX_TIMEOUT], with a fixed default until enough
+samples have been seen.
+"""
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+POLL_SECONDS = 0.2      # How often a condition is re-checked
+LATENCY_WINDOW = 200    # Recent wait latencies kept per (platform, stage)
+MIN_SAMPLES = 20        # Below this the default timeout is used
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_FACTOR = 2.0    # Headroom over the percentile
+MIN_TIMEOUT = 3.0
+MAX_TIMEOUT = 30.0
+DEFAULT_TIMEOUT = 15.0
+RETRY_BASE_SECONDS = 0.5  # First pause between attempts; doubles per attempt, with jitter
+RETRY_MAX_SECONDS = 4.0
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of wait latencies per (platform, stage)."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, platform, stage, seconds):
+        with self._lock:
+            samples = self._samples.setdefault((platform, stage), deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def percentile(self, platform, stage, pct):
+        """The pct-th percentile (nearest rank) of recent latencies, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples.get((platform, stage), ()))
+        if not samples:
+            return None
+        rank = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def timeout(self, platform, stage, default=DEFAULT_TIMEOUT):
+        """Seconds to wait at this stage before giving up."""
+        with self._lock:
+            count = len(self._samples.get((platform, stage), ()))
+        if count < MIN_SAMPLES:
+            return default
+        learned = self.percentile(platform, stage, TIMEOUT_PERCENTILE) * TIMEOUT_FACTOR
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, learned))
+
+    def snapshot(self):
+        """{"platform.stage": {"samples", "p50", "p95", "timeout"}} for logging."""
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            f"{platform}.{stage}": {
+                "samples": len(self._samples[(platform, stage)]),
+                "p50": round(self.percentile(platform, stage, 50), 2),
+                "p95": round(self.percentile(platform, stage, 95), 2),
+                "timeout": round(self.timeout(platform, stage), 1),
+            }
+            for platform, stage in keys
+        }
+
+
+_tracker = LatencyTracker()
+
+
+def wait_for(driver, platform, stage, condition, default_timeout=DEFAULT_TIMEOUT):
+    """
+    Poll condition(driver) until it returns something truthy and return that value.
+
+    Args:
+        platform (str): Platform name the latency is tracked under.
+        stage (str): What is being waited for, e.g. "ready" or "followers".
+        condition (callable): Takes the driver; see the helpers below.
+        default_timeout (float): Timeout used until enough latencies are recorded.
+
+    Raises selenium's TimeoutException when the learned timeout runs out. Timed-out
+    waits are recorded too, so a platform that slows down raises its own timeout.
+    """
+    timeout = _tracker.timeout(platform, stage, default_timeout)
+    start = time.monotonic()
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+    finally:
+        _tracker.record(platform, stage, time.monotonic() - start)
+
+
+def retry_delay(attempt):
+    """Pause before retry number attempt + 1: a short jittered exponential backoff."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)
+    time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def wait_stats():
+    """Recent latency percentiles and current timeouts per platform and stage."""
+    return _tracker.snapshot()
+
+
+# Conditions: each takes the driver and returns something truthy once ready.
+
+def element_present(by, selector):
+    """The first element matching the locator."""
+    def condition(driver):
+        elements = driver.find_elements(by, selector)
+        return elements[0] if elements else False
+    return condition
+
+
+def script_present(*script_ids):
+    """The id of the first non-empty <script id=...> among script_ids."""
+    js = ("return arguments[0].find(id => { const el = document.getElementById(id); "
+          "return el && el.textContent.length > 0; }) || null;")
+    return lambda driver: driver.execute_script(js, list(script_ids)) or False
+
+
+def url_contains(fragment):
+    return lambda driver: fragment in driver.current_url
+
+
+def body_text_matches(pattern):
+    """The regex match against the visible body text."""
+    regex = re.compile(pattern, re.I) if isinstance(pattern, str) else pattern
+    def condition(driver):
+        elements = driver.find_elements(By.TAG_NAME, "body")
+        return (regex.search(elements[0].text) if elements else None) or False
+    return condition
+
+
+def any_of(*conditions):
+    """(index, value) of the first condition that is met, checked in order."""
+    def condition(driver):
+        for i, cond in enumerate(conditions):
+            value = cond(driver)
+            if value:
+                return i, value
+        return False
+    return condition
@@ -1,18 +1,25 @@
 import sys
 import ssl
 import re
-import time
 import undetected_chromedriver as uc
 import os
-from datetime import datetime # Import datetime for timestamp
 
 from selenium.webdriver.common.by import By
 # IMPORTANT: Use ChromeOptions from undetected_chromedriver, not selenium.webdriver.chrome.options
 from undetected_chromedriver.options import ChromeOptions
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
 
+from .base import Scraper
+from . import artifacts, waits
+from .driver_pool import ACQUIRE_TIMEOUT_SECONDS, get_pool
+from .network_profile import apply_profile, record_page
+
+# The follower count in the profile header, and a more general link to the followers list
+FOLLOWERS_SELECTOR = "div[data-testid='UserProfileHeader_Items'] a[href*='/followers'] span"
+FOLLOWERS_LINK_SELECTOR = "a[href$='/followers'] span"
+# A number (with optional commas/decimals and K/M suffix) followed by "Follower" or "Followers"
+FOLLOWERS_TEXT = re.compile(r"([\d,\.]+(?:[KkMm])?)\s*Follower[s]?", re.IGNORECASE)
+
 # Define a directory for debug screenshots and ensure it exists
 DEBUG_DIR = "x_failed"
 os.makedirs(DEBUG_DIR, exist_ok=True)
@@ -76,16 +83,8 @@ def extract_username(link: str) -> str:
         # If it's just a handle, remove the leading '@'
         return link.lstrip('@')
 
-def get_follower_count(username: str) -> int:
-    """
-    Opens the X (formerly Twitter) profile for the given username using undetected-chromedriver
-    and extracts the follower count. It first tries to wait for the element that normally displays
-    the follower count. If that fails (as may be the case with small accounts), it scans the entire
-    page text for a pattern matching the number of followers.
-    """
-    url = f"https://x.com/{username}"
-    print(f"XTwitterScraper: Starting scrape for {username} at {url}")
-    
+def _create_driver():
+    """Factory used by the driver pool to start a new undetected Chrome for X."""
     # Use undetected_chromedriver's ChromeOptions
     options = ChromeOptions()
     # Set a modern user agent to mimic a real browser
@@ -96,103 +95,137 @@ def get_follower_count(username: str) -> int:
     options.add_argument("--no-sandbox") # Recommended for headless environments
     options.headless = True # Ensure headless mode is true
 
-    driver = None # Initialize driver to None for proper cleanup in finally block
-    try:
-        # Initialize undetected_chromedriver
-        driver = uc.Chrome(options=options, use_subprocess=True)
-        driver.set_page_load_timeout(30) # Increased timeout for page load
-        
-        print(f"XTwitterScraper: Navigating to {url}")
-        driver.get(url)
-        
-        # Wait for the body element to be present as a general indicator of page load
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        print(f"XTwitterScraper: Page body loaded for {username}. Giving a short additional wait.")
-        time.sleep(2) # A short additional wait after initial load for dynamic content
+    driver = uc.Chrome(options=options, use_subprocess=True)
+    driver.set_page_load_timeout(30) # Increased timeout for page load
+    apply_profile(driver, "twitter") # Skip images, video, fonts and trackers
+    return driver
 
-        # Attempt 1: Use an explicit wait to find the known element for followers.
-        # This selector targets the span containing the follower count within the profile header.
-        try:
-            elem = WebDriverWait(driver, 10).until( # Shorter wait for specific element
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "div[data-testid='UserProfileHeader_Items'] a[href*='/followers'] span")
-                )
-            )
-            text = elem.text.strip()
-            if text:
-                print(f"XTwitterScraper: Found follower count via CSS selector 1 for {username}: {text}")
-                return parse_number(text)
-        except TimeoutException:
-            print(f"XTwitterScraper: CSS selector 1 timed out for {username}. Trying next method.")
-            pass # Continue to next attempt
-
-        # Attempt 2: Use an alternative CSS selector (more general link to followers).
-        try:
-            elem = driver.find_element(By.CSS_SELECTOR, "a[href$='/followers'] span")
-            text = elem.text.strip()
-            if text:
-                print(f"XTwitterScraper: Found follower count via CSS selector 2 for {username}: {text}")
-                return parse_number(text)
-        except Exception:
-            print(f"XTwitterScraper: CSS selector 2 failed for {username}. Trying regex fallback.")
-            pass # Continue to next attempt
-
-        # Attempt 3: Fallback via regex on the entire page text.
-        # This is useful for smaller accounts or when the DOM structure changes.
-        body_text = driver.find_element(By.TAG_NAME, "body").text
-        # Updated regex: allows optional whitespace and also matches singular "Follower"
-        # It looks for a number (with optional commas/decimals and K/M suffix) followed by "Follower" or "Followers".
-        m = re.search(r"([\d,\.]+(?:[KkMm])?)\s*Follower[s]?", body_text, flags=re.IGNORECASE)
-        if m:
-            follower_count_str = m.group(1)
-            print(f"XTwitterScraper: Found follower count via regex fallback for {username}: {follower_count_str}")
-            return parse_number(follower_count_str)
-        else:
-            raise Exception("Could not locate follower count via explicit wait or regex fallback.")
-
-    except WebDriverException as we:
-        print(f"XTwitterScraper: WebDriver error during scrape for {username}: {we}", file=sys.stderr)
-        # Capture a timestamp for the screenshot file name
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if driver: # Only attempt to save screenshot if driver was successfully initialized
-            screenshot_path = os.path.join(DEBUG_DIR, f"{username}_failure_{timestamp}.png")
-            try:
-                driver.save_screenshot(screenshot_path)
-                print(f"XTwitterScraper: Error occurred for {username}. Screenshot saved to: {screenshot_path}")
-            except Exception as se:
-                print(f"XTwitterScraper: Failed to save screenshot for {username}: {se}")
-        raise # Re-raise the original exception
-    except Exception as e:
-        print(f"XTwitterScraper: An unexpected error occurred during scrape for {username}: {e}", file=sys.stderr)
-        # Capture a timestamp for the screenshot file name
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if driver: # Only attempt to save screenshot if driver was successfully initialized
-            screenshot_path = os.path.join(DEBUG_DIR, f"{username}_failure_{timestamp}.png")
-            try:
-                driver.save_screenshot(screenshot_path)
-                print(f"XTwitterScraper: Error occurred for {username}. Screenshot saved to: {screenshot_path}")
-            except Exception as se:
-                print(f"XTwitterScraper: Failed to save screenshot for {username}: {se}")
-        raise # Re-raise the original exception
-    finally:
-        if driver:
-            try:
-                driver.quit()
-                print(f"XTwitterScraper: Driver quit successfully for {username}.")
-            except Exception as e:
-                print(f"XTwitterScraper: Error quitting driver for {username}: {e}", file=sys.stderr)
+def _count_from_selector(driver, selector):
+    """The count in the first element matching a CSS selector, or None."""
+    elements = driver.find_elements(By.CSS_SELECTOR, selector)
+    text = elements[0].text.strip() if elements else ""
+    return parse_number(text) if text else None
+
+def _count_from_body_text(driver):
+    """The first "<number> Followers" in the visible page text, or None."""
+    m = FOLLOWERS_TEXT.search(driver.find_element(By.TAG_NAME, "body").text)
+    return parse_number(m.group(1)) if m else None
+
+def get_driver_pool(max_browsers=3, max_pages_per_browser=50):
+    """Return the shared browser pool used for X scraping."""
+    return get_pool("x_twitter", _create_driver, max_size=max_browsers, max_pages=max_pages_per_browser)
+
+# Server-rendered profile payload; its embedded user object carries "followers_count".
+PROFILE_PAYLOAD_URL = "https://syndication.twitter.com/srv/timeline-profile/screen-name/{username}"
 
-class XTwitterScraper:
+class XTwitterScraper(Scraper):
     """
-    Scrapes follower counts from X (formerly Twitter) using undetected-chromedriver.
+    Scrapes follower counts from X (formerly Twitter): the server-rendered profile payload
+    over plain HTTP first, then undetected-chromedriver.
     """
+
+    platform = "twitter"
+
+    def __init__(self, max_browsers=3, max_pages_per_browser=50):
+        self.driver_pool = get_driver_pool(max_browsers, max_pages_per_browser)
+
+    def profile_url(self, link: str) -> str:
+        username = extract_username(link)
+        if not username:
+            raise ValueError(f"Invalid link or username: '{link}'")
+        return PROFILE_PAYLOAD_URL.format(username=username)
+
+    def extract_from_html(self, html: str, link: str) -> int:
+        """
+        Read "followers_count" from the profile owner's user object in the payload.
+        The payload also embeds other users (retweets, mentions), so the count nearest
+        to the owner's "screen_name" is used.
+        """
+        username = extract_username(link)
+        counts = [(m.start(), int(m.group(1))) for m in re.finditer(r'"followers_count"\s*:\s*(\d+)', html)]
+        owners = [m.start() for m in re.finditer(r'"screen_name"\s*:\s*"' + re.escape(username) + '"', html, re.IGNORECASE)]
+        if not counts or not owners:
+            raise ValueError(f"No followers_count for {username} in profile payload for {link}.")
+        _, followers = min(counts, key=lambda c: min(abs(c[0] - o) for o in owners))
+        return followers
+
     def scrape(self, link: str) -> int:
         username = extract_username(link)
         if not username:
             raise ValueError(f"Invalid link or username: '{link}'")
-        return get_follower_count(username)
+        try:
+            followers = self.scrape_http(link)
+            print(f"XTwitterScraper: Fast HTTP path succeeded for {username}: {followers} followers.")
+            return followers
+        except Exception as e:
+            print(f"XTwitterScraper: Fast HTTP path failed for {username}: {e}. Falling back to browser.")
+        return self.scrape_fallback(link)
+
+    def scrape_fallback(self, link: str) -> int:
+        """The headless-browser tier, failing fast while its circuit is open."""
+        username = extract_username(link)
+        if not username:
+            raise ValueError(f"Invalid link or username: '{link}'")
+        return self.breaker("browser").call(self._scrape_with_headless_browser, username)
+
+    def _scrape_with_headless_browser(self, username: str) -> int:
+        """
+        Opens the X (formerly Twitter) profile for the given username using undetected-chromedriver
+        and extracts the follower count. It first tries to wait for the element that normally displays
+        the follower count. If that fails (as may be the case with small accounts), it scans the entire
+        page text for a pattern matching the number of followers.
+        The browser is leased from the scraper's pool (or its batch session) and returned afterwards.
+        """
+        url = f"https://x.com/{username}"
+        print(f"XTwitterScraper: Starting scrape for {username} at {url}")
+
+        pool = self.browser_pool()
+        driver = None # Initialize driver to None for proper cleanup in finally block
+        broken = False # Set when the browser session itself failed and must be recycled
+        try:
+            driver = pool.acquire(ACQUIRE_TIMEOUT_SECONDS)
+
+            print(f"XTwitterScraper: Navigating to {url}")
+            driver.get(url)
+
+            # Continue as soon as any of the three methods below has something to read.
+            # Small accounts may never render the header element, so the page text counts too.
+            try:
+                waits.wait_for(driver, self.platform, "followers", waits.any_of(
+                    waits.element_present(By.CSS_SELECTOR, FOLLOWERS_SELECTOR),
+                    waits.element_present(By.CSS_SELECTOR, FOLLOWERS_LINK_SELECTOR),
+                    waits.body_text_matches(FOLLOWERS_TEXT),
+                ))
+            except TimeoutException:
+                print(f"XTwitterScraper: No follower count rendered for {username} in time. Trying all methods anyway.")
+            record_page(driver, self.platform)
+
+            # The header span, the general followers link and a regex over the page text
+            # (useful for smaller accounts), tried in whichever order currently works best
+            method, followers = self.run_strategies("browser", [
+                ("header", lambda: _count_from_selector(driver, FOLLOWERS_SELECTOR)),
+                ("link", lambda: _count_from_selector(driver, FOLLOWERS_LINK_SELECTOR)),
+                ("text", lambda: _count_from_body_text(driver)),
+            ])
+            if followers is None:
+                raise Exception("Could not locate follower count via CSS selectors or regex fallback.")
+            print(f"XTwitterScraper: Found follower count via {method} for {username}: {followers}")
+            return followers
+
+        except WebDriverException as we:
+            print(f"XTwitterScraper: WebDriver error during scrape for {username}: {we}", file=sys.stderr)
+            broken = not isinstance(we, TimeoutException) # A crashed session must not be reused
+            # Screenshot (sampled, written in the background); skipped if the driver never started
+            artifacts.capture(driver, DEBUG_DIR, username, "failure", we)
+            raise # Re-raise the original exception
+        except Exception as e:
+            print(f"XTwitterScraper: An unexpected error occurred during scrape for {username}: {e}", file=sys.stderr)
+            # Screenshot (sampled, written in the background); skipped if the driver never started
+            artifacts.capture(driver, DEBUG_DIR, username, "failure", e)
+            raise # Re-raise the original exception
+        finally:
+            # Hand the browser back for the next account instead of quitting it
+            pool.release(driver, broken=broken)
 
 # Standalone testing:
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+# singleflight.py
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+# Hosts that serve the same profiles, mapped to one name
+HOST_ALIASES = {
+    "twitter.com": "x.com",
+}
+# Subdomains that point at the same profile as the bare domain
+HOST_PREFIXES = ("www.", "m.", "mobile.")
+
+
+def canonical_link(link):
+    """
+    Normalize a profile link so different spellings of the same account compare equal:
+    scheme, www./m. prefixes, query string, fragment and trailing slash are dropped,
+    twitter.com becomes x.com, and the (case-insensitive) handle is lowercased.
+
+        "https://www.TikTok.com/@Someone/?lang=en" -> "tiktok.com/@someone"
+        "http://twitter.com/Someone"               -> "x.com/someone"
+    """
+    link = link.strip()
+    parts = urlsplit(link if "://" in link else "https://" + link)
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    host = HOST_ALIASES.get(host, host)
+    return host + parts.path.rstrip("/").lower()
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. A caller asking for a key that is already
+    in flight does not start its own call; it waits for the running one and gets the
+    same result, or the same exception. Once a call finishes the key is free again, so
+    later callers start a fresh call.
+    """
+
+    def __init__(self, key_func=canonical_link):
+        """
+        Args:
+            key_func (callable): Maps the key passed to do() to the dedup key.
+        """
+        self.key_func = key_func
+        self._calls = {}               # dedup key -> Future of the running call
+        self._lock = threading.Lock()  # Guards _calls
+        self.counts = {"started": 0, "joined": 0}
+
+    def do(self, key, func, *args, on_join=None, **kwargs):
+        """
+        Call func(*args, **kwargs) unless a call for key is already running; return its result.
+        on_join, if given, is called before waiting for a running call, e.g. to give
+        back resources (a pinned browser) that the running call may be waiting for.
+        """
+        future, leader = self.begin(key)
+        if not leader:
+            print(f"SingleFlight: {key} is already in flight; waiting for its result.")
+            if on_join is not None:
+                on_join()
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+    def begin(self, key):
+        """
+        Claim key for a call run by the caller (e.g. a coroutine that cannot block in
+        do()). Returns (future, leader): a leader must run the call and report it with
+        finish(); anyone else waits on the future of the call already running.
+        """
+        dedup_key = self.key_func(key)
+        with self._lock:
+            future = self._calls.get(dedup_key)
+            if future is not None:
+                self.counts["joined"] += 1
+                return future, False
+            future = self._calls[dedup_key] = Future()
+            self.counts["started"] += 1
+            return future, True
+
+    def finish(self, key, future, result=None, error=None):
+        """Publish the leader's result (or error) to the joined callers and free key."""
+        # Free the key before publishing the result, so nobody joins a finished call
+        with self._lock:
+            self._calls.pop(self.key_func(key), None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self):
+        """Dedup keys of the calls currently running."""
+        with self._lock:
+            return list(self._calls)
@@ -0,0 +1,69 @@
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+# The application modules (database.py, scraper/, ...) live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Third-party modules imported at module level by the application but never exercised by
+# these tests (browsers, Instaloader, the background scheduler, Pillow). When one is not
+# installed it is replaced by a stand-in whose attributes are placeholder classes, so the
+# HTTP, database and pooling code can be tested without a browser toolchain.
+STUB_MODULES = (
+    "selenium",
+    "selenium.webdriver",
+    "selenium.webdriver.chrome.service",
+    "selenium.webdriver.common.by",
+    "selenium.webdriver.support.ui",
+    "selenium.common.exceptions",
+    "webdriver_manager.chrome",
+    "undetected_chromedriver",
+    "undetected_chromedriver.options",
+    "instaloader",
+    "instaloader.exceptions",
+    "apscheduler.schedulers.background",
+    "apscheduler.events",
+    "PIL",
+)
+
+
+def _stub_attribute(module, name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    # An Exception subclass works both as a placeholder class and in except clauses
+    value = type(name, (Exception,), {"__module__": module.__name__})
+    setattr(module, name, value)
+    return value
+
+
+def _stub_module(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    module = types.ModuleType(name)
+    module.__path__ = []  # Lets submodules be registered below it
+    module.__getattr__ = lambda attr: _stub_attribute(module, attr)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(_stub_module(parent), child, module)
+    return module
+
+
+_missing = {name.split(".")[0] for name in STUB_MODULES if importlib.util.find_spec(name.split(".")[0]) is None}
+for _name in STUB_MODULES:
+    if _name.split(".")[0] in _missing:
+        _stub_module(_name)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """The database module pointed at a fresh database file in a temporary directory."""
+    import database
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "accounts.db"))
+    database.init_db()
+    yield database
+    database.close_db()
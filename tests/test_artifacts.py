@@ -0,0 +1,102 @@
+"""Failure screenshots: sampling, the non-blocking writer queue and the directory quota."""
+import os
+import queue
+import time
+
+import pytest
+
+from scraper import artifacts
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeDriver:
+    def get_screenshot_as_png(self):
+        return b"\x89PNG"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(artifacts, "_samples", {})
+    monkeypatch.setattr(artifacts, "_counts", dict.fromkeys(artifacts._counts, 0))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(artifacts.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_first_shots_are_kept_then_one_in_sample_every(clock):
+    key = ("dir", "load_error", "TimeoutException")
+    kept = [n for n in range(1, 200) if artifacts._should_capture(key)]
+    first, every = artifacts.SAMPLE_FIRST, artifacts.SAMPLE_EVERY
+    assert kept == list(range(1, first + 1)) + list(range(first + every, 200, every))
+
+
+def test_error_classes_are_sampled_separately(clock):
+    for _ in range(artifacts.SAMPLE_FIRST):
+        artifacts._should_capture(("dir", "load_error", "TimeoutException"))
+    assert not artifacts._should_capture(("dir", "load_error", "TimeoutException"))
+    assert artifacts._should_capture(("dir", "load_error", "WebDriverException"))
+
+
+def test_sampling_restarts_after_the_window(clock):
+    key = ("dir", "scrape_fail", None)
+    for _ in range(artifacts.SAMPLE_FIRST):
+        artifacts._should_capture(key)
+    assert not artifacts._should_capture(key)
+    clock.now += artifacts.SAMPLE_WINDOW_SECONDS + 1
+    assert artifacts._should_capture(key)
+
+
+def test_full_queue_drops_the_shot_instead_of_blocking(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_queue", queue.Queue(maxsize=1))
+    monkeypatch.setattr(artifacts, "_start_writer", lambda: None) # Nothing drains the queue
+    start = time.monotonic()
+    assert artifacts.capture(FakeDriver(), str(tmp_path), "a", "load_error") is not None
+    assert artifacts.capture(FakeDriver(), str(tmp_path), "b", "load_error") is None
+    assert time.monotonic() - start < 1.0
+    assert artifacts.artifact_stats()["dropped"] == 1
+
+
+def test_captured_shot_is_written(tmp_path):
+    path = artifacts.capture(FakeDriver(), str(tmp_path), "a", "load_error", TimeoutError())
+    artifacts.flush()
+    with open(path, "rb") as f:
+        assert f.read() == b"\x89PNG"
+
+
+def _shot(directory, name, size, age_days=0.0):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_quota_removes_shots_past_the_age_limit(tmp_path):
+    _shot(tmp_path, "old.png", 10, age_days=8)
+    _shot(tmp_path, "new.png", 10, age_days=1)
+    _shot(tmp_path, "notes.txt", 10, age_days=30) # Only screenshots are managed
+    assert artifacts.enforce_quota(str(tmp_path), max_bytes=1000, max_age_days=7) == 1
+    assert sorted(os.listdir(tmp_path)) == ["new.png", "notes.txt"]
+
+
+def test_quota_removes_the_oldest_shots_until_the_directory_fits(tmp_path):
+    for i, age in enumerate([3, 2, 1, 0]):
+        _shot(tmp_path, f"shot{i}.png", 100, age_days=age)
+    assert artifacts.enforce_quota(str(tmp_path), max_bytes=250, max_age_days=7) == 2
+    assert sorted(os.listdir(tmp_path)) == ["shot2.png", "shot3.png"]
+
+
+def test_quota_on_a_missing_directory(tmp_path):
+    assert artifacts.enforce_quota(str(tmp_path / "missing")) == 0
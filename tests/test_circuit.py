@@ -0,0 +1,64 @@
+"""Circuit breakers: which errors open a tier's circuit."""
+import pytest
+
+from scraper import circuit
+from scraper.circuit import CircuitBreaker, CircuitOpenError, classify
+
+
+class ProfileNotExistsException(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def state_file(tmp_path, monkeypatch):
+    # Keep breaker state out of the working directory
+    monkeypatch.setattr(circuit, "_state_path", str(tmp_path / circuit.STATE_FILE))
+
+
+def _fail(breaker, exc):
+    with pytest.raises(type(exc)):
+        breaker.call(lambda: (_ for _ in ()).throw(exc))
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (ProfileNotExistsException("Profile someone does not exist."), "account"),
+    (Exception("HTTP 404 from https://x.com/someone"), "account"),
+    (ValueError("Invalid link or username: ''"), "account"),
+    (TimeoutError("DriverPool[twitter]: no driver available after 90 seconds."), "local"),
+    (TimeoutError("InstaloaderPool: no context available after 120 seconds."), "local"),
+    (ValueError("No follower count in meta description for someone (likely a login wall)."), "error"),
+    (Exception("TikTok: Could not locate follower count."), "error"),
+    (Exception("HTTP 429 Too Many Requests"), "throttle"),
+    (Exception("HTTP 503 from https://x.com"), "network"),
+])
+def test_classify(exc, expected):
+    assert classify(exc) == expected
+
+
+def test_login_wall_on_every_account_opens_the_circuit():
+    breaker = CircuitBreaker("fake.http")
+    threshold = circuit.ERROR_CLASSES["error"][0]
+    for i in range(threshold):
+        _fail(breaker, ValueError(f"No follower count in meta description for user{i} (likely a login wall)."))
+    assert breaker.state == "open" and breaker.reason == "error"
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 1)
+
+
+def test_missing_accounts_do_not_open_the_circuit():
+    breaker = CircuitBreaker("fake.http")
+    for i in range(3 * circuit.ERROR_CLASSES["error"][0]):
+        _fail(breaker, ProfileNotExistsException(f"Profile user{i} does not exist."))
+        _fail(breaker, Exception(f"HTTP 404 from https://fake/user{i}"))
+    assert breaker.state == "closed"
+    assert breaker.call(lambda: 1) == 1
+
+
+def test_success_resets_the_count():
+    breaker = CircuitBreaker("fake.http")
+    threshold = circuit.ERROR_CLASSES["error"][0]
+    for _ in range(2):
+        for i in range(threshold - 1):
+            _fail(breaker, Exception("Could not locate follower count."))
+        breaker.call(lambda: 1)
+    assert breaker.state == "closed"
@@ -0,0 +1,211 @@
+"""The database layer: connections, follower history snapshots and their tiered compaction, change tracking and freshness."""
+import threading
+
+DAY = 86400
+HOUR = 3600
+NOW = 200 * DAY  # A fixed "now", aligned to a day boundary
+
+
+def test_only_real_results_are_snapshotted(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "failed")
+    assert db.fetch_snapshots("https://x.com/a") == []
+    db.bulk_upsert_accounts([("a", "https://x.com/a", "twitter", 1234, "micro")])
+    assert [followers for _, followers, _ in db.fetch_snapshots("https://x.com/a")] == [1234]
+
+
+def test_raw_rows_past_retention_become_one_row_per_hour(db):
+    old_hour = NOW - 10 * DAY
+    recent = NOW - DAY
+    db.record_snapshots([
+        ("link", 100, old_hour + 60),
+        ("link", 110, old_hour + 1800),
+        ("link", 120, old_hour + HOUR - 1),  # Latest observation of the hour wins
+        ("link", 130, old_hour + HOUR + 5),  # Next hour
+        ("link", 140, recent),               # Still within raw retention
+    ])
+    removed = db.compact_snapshots(now=NOW)
+    assert removed == 4
+    assert db.fetch_snapshots("link") == [
+        (old_hour, 120, "hour"),
+        (old_hour + HOUR, 130, "hour"),
+        (recent, 140, "raw"),
+    ]
+
+
+def test_hourly_rows_past_retention_become_one_row_per_day(db):
+    old_day = NOW - 100 * DAY
+    db.record_snapshots([
+        ("link", 100, old_day + HOUR),
+        ("link", 150, old_day + 20 * HOUR),
+        ("link", 160, old_day + DAY + HOUR),
+    ])
+    db.compact_snapshots(now=NOW) # raw -> hour
+    db.compact_snapshots(now=NOW) # hour -> day
+    assert db.fetch_snapshots("link") == [
+        (old_day, 150, "day"),
+        (old_day + DAY, 160, "day"),
+    ]
+
+
+def test_compaction_keeps_accounts_apart(db):
+    ts = NOW - 10 * DAY
+    db.record_snapshots([("a", 1, ts), ("b", 2, ts + 10)])
+    db.compact_snapshots(now=NOW)
+    assert db.fetch_snapshots("a") == [(ts // HOUR * HOUR, 1, "hour")]
+    assert db.fetch_snapshots("b") == [(ts // HOUR * HOUR, 2, "hour")]
+
+
+def test_deleting_an_account_drops_its_history(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 10, "micro")
+    db.delete_account("https://x.com/a")
+    assert db.fetch_snapshots("https://x.com/a") == []
+
+
+def test_connections_use_wal_and_a_busy_timeout(db):
+    conn = db.get_connection_manager().reader()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+
+
+def test_failed_write_block_is_rolled_back(db):
+    try:
+        with db.get_connection_manager().write() as conn:
+            conn.execute(db.UPSERT_ACCOUNT_SQL, ("a", "https://x.com/a", "twitter", 5, "micro"))
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert db.fetch_account("https://x.com/a") is None
+
+
+def test_each_thread_gets_its_own_reader(db):
+    manager = db.get_connection_manager()
+    readers = []
+    thread = threading.Thread(target=lambda: readers.append(manager.reader()))
+    thread.start()
+    thread.join()
+    assert readers[0] is not manager.reader()
+    assert manager.reader() is manager.reader()
+    # Readers of threads that have exited are closed when the next reader opens
+    other = threading.Thread(target=manager.reader)
+    other.start()
+    other.join()
+    assert thread not in manager._readers
+
+
+def test_fetch_account_uses_the_link(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 1, "micro")
+    assert db.fetch_account("https://x.com/a") == ("a", "https://x.com/a", "twitter", 1, "micro")
+    assert db.fetch_account("https://x.com/missing") is None
+
+
+def test_fetch_accounts_batches_past_the_parameter_limit(db):
+    links = [f"https://x.com/user{i}" for i in range(db.MAX_IN_PARAMS * 2 + 7)]
+    db.bulk_upsert_accounts([(f"user{i}", link, "twitter", i, "micro") for i, link in enumerate(links)])
+    rows = db.fetch_accounts(links + ["https://x.com/missing", links[0]])
+    assert sorted(row[1] for row in rows) == sorted(links)
+    assert db.fetch_accounts(["https://x.com/missing"]) == []
+    assert db.fetch_accounts([]) == []
+
+
+def test_fetch_changes_returns_changed_rows_and_tombstones(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 1, "micro")
+    db.upsert_account("b", "https://x.com/b", "twitter", 2, "micro")
+    rows, deleted, version = db.fetch_changes()
+    assert len(rows) == 2 and deleted is None
+
+    db.upsert_account("a", "https://x.com/a", "twitter", 5, "micro")
+    db.delete_account("https://x.com/b")
+    rows, deleted, version = db.fetch_changes(version)
+    assert rows == [("a", "https://x.com/a", "twitter", 5, "micro")]
+    assert deleted == ["https://x.com/b"]
+
+    assert db.fetch_changes(version)[:2] == ([], [])
+
+
+def test_re_adding_a_deleted_account_clears_its_tombstone(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 1, "micro")
+    _, _, version = db.fetch_changes()
+    db.delete_account("https://x.com/a")
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    rows, deleted, _ = db.fetch_changes(version)
+    assert [row[1] for row in rows] == ["https://x.com/a"]
+    assert deleted == []
+
+
+def _last_scraped_at(db, link):
+    return db.get_connection_manager().reader().execute(
+        "SELECT last_scraped_at FROM accounts WHERE link = ?", (link,)).fetchone()[0]
+
+
+def test_failed_scrape_keeps_the_last_success_time(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    assert _last_scraped_at(db, "https://x.com/a") is None
+    db.upsert_account("a", "https://x.com/a", "twitter", 10, "micro")
+    scraped_at = _last_scraped_at(db, "https://x.com/a")
+    assert scraped_at is not None
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "failed")
+    assert _last_scraped_at(db, "https://x.com/a") == scraped_at
+    # The failed row itself is not served as fresh
+    assert db.fetch_last_scraped(["https://x.com/a"]) == {}
+
+
+def test_fetch_last_scraped_returns_only_the_requested_links(db):
+    db.bulk_upsert_accounts([("a", "https://x.com/a", "twitter", 1, "micro"),
+                             ("b", "https://x.com/b", "twitter", 2, "micro"),
+                             ("c", "https://x.com/c", "twitter", 0, "pending")])
+    result = db.fetch_last_scraped(["https://x.com/a", "https://x.com/c", "https://x.com/missing"])
+    assert list(result) == ["https://x.com/a"]
+    assert result["https://x.com/a"][0] == "twitter"
+
+
+class _Root:
+    def after(self, delay, func, *args):
+        pass
+
+
+class _UI:
+    root = _Root()
+
+    def refresh(self):
+        pass
+
+
+class _Buffer:
+    def discard(self, link):
+        return False
+
+
+def _freshness_controller():
+    """A Controller without Tk or browsers; scrapes are recorded instead of run."""
+    import main
+    ctrl = main.Controller.__new__(main.Controller)
+    ctrl.freshness_ttl = {"twitter": 600}
+    ctrl.scrapers = {"twitter": None}
+    ctrl.ui = _UI()
+    ctrl.write_buffer = _Buffer()
+    ctrl.scrapes = []
+    ctrl.submit_scrape = ctrl.scrapes.append
+    return ctrl
+
+
+def test_skip_fresh_drops_recent_results_unless_forced(db):
+    db.bulk_upsert_accounts([("a", "https://x.com/a", "twitter", 1, "micro"),
+                             ("b", "https://x.com/b", "twitter", 2, "micro"),
+                             ("c", "https://x.com/c", "twitter", 0, "pending")])
+    with db.get_connection_manager().write() as conn: # b was scraped long ago
+        conn.execute("UPDATE accounts SET last_scraped_at = last_scraped_at - 3600 WHERE link = 'https://x.com/b'")
+    accounts = db.fetch_all_accounts()
+    ctrl = _freshness_controller()
+    assert [acc[1] for acc in ctrl._skip_fresh(accounts)] == ["https://x.com/b", "https://x.com/c"]
+    assert ctrl._skip_fresh(accounts, force=True) == accounts
+
+
+def test_adding_a_fresh_account_serves_the_stored_row_unless_forced(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 42, "micro")
+    ctrl = _freshness_controller()
+    assert ctrl.add_account("a", "https://x.com/a", "twitter").result() == ("a", "https://x.com/a", "twitter", 42, "micro")
+    assert ctrl.scrapes == []
+    ctrl.add_account("a", "https://x.com/a", "twitter", force=True)
+    assert ctrl.scrapes == ["https://x.com/a"]
+    assert db.fetch_account("https://x.com/a")[4] == "pending"
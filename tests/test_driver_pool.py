@@ -0,0 +1,154 @@
+"""
+DriverPool bookkeeping with stand-in drivers: reuse, recycling, and that browser
+calls (health checks, quit) never run while the pool lock is held.
+"""
+import threading
+import time
+
+import pytest
+
+from scraper.driver_pool import DriverPool, PinnedSession
+
+
+def _lock_is_free(pool):
+    """True if another thread can take the pool lock right now."""
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (pool.stats(), done.set()))
+    thread.start()
+    thread.join(1)
+    return done.is_set()
+
+
+class FakeDriver:
+    def __init__(self, pool_ref):
+        self.pool_ref = pool_ref
+        self.healthy = True
+        self.quit_called = False
+        self.lock_free_on_quit = None
+        self.lock_free_on_check = None
+
+    @property
+    def current_url(self):
+        self.lock_free_on_check = _lock_is_free(self.pool_ref[0])
+        if not self.healthy:
+            raise RuntimeError("session deleted")
+        return "about:blank"
+
+    @property
+    def window_handles(self):
+        return ["main"]
+
+    def quit(self):
+        self.quit_called = True
+        self.lock_free_on_quit = _lock_is_free(self.pool_ref[0])
+
+
+@pytest.fixture
+def pool():
+    ref = []
+    created = []
+
+    def factory():
+        driver = FakeDriver(ref)
+        created.append(driver)
+        return driver
+
+    ref.append(DriverPool(factory, max_size=2, max_pages=3, name="test"))
+    ref[0].created = created
+    return ref[0]
+
+
+def test_released_driver_is_reused(pool):
+    driver = pool.acquire()
+    pool.release(driver)
+    assert pool.acquire() is driver
+    assert len(pool.created) == 1
+
+
+def test_health_check_runs_outside_the_lock(pool):
+    driver = pool.acquire()
+    pool.release(driver)
+    assert pool.acquire() is driver
+    assert driver.lock_free_on_check is True
+
+
+def test_unhealthy_idle_driver_is_quit_outside_the_lock_and_replaced(pool):
+    driver = pool.acquire()
+    pool.release(driver)
+    driver.healthy = False
+    replacement = pool.acquire()
+    assert replacement is not driver
+    assert driver.quit_called and driver.lock_free_on_quit
+    assert pool.stats()["live"] == 1
+
+
+def test_broken_and_worn_out_drivers_are_quit_outside_the_lock(pool):
+    broken = pool.acquire()
+    pool.release(broken, broken=True)
+    assert broken.quit_called and broken.lock_free_on_quit
+
+    worn = pool.acquire()
+    pool.release(worn, uses=3)
+    assert worn.quit_called and worn.lock_free_on_quit
+    assert pool.stats()["live"] == 0
+
+
+def test_close_quits_idle_drivers_outside_the_lock(pool):
+    driver = pool.acquire()
+    pool.release(driver)
+    pool.close()
+    assert driver.quit_called and driver.lock_free_on_quit
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_timeout_bounds_the_total_wait(pool):
+    pool.acquire()
+    pool.acquire()
+    stop = threading.Event()
+
+    def nudge():
+        # Wake-ups that free nothing must not restart the caller's timeout
+        while not stop.wait(0.02):
+            with pool._cond:
+                pool._cond.notify_all()
+
+    thread = threading.Thread(target=nudge)
+    thread.start()
+    start = time.monotonic()
+    try:
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.3)
+    finally:
+        stop.set()
+        thread.join()
+    assert time.monotonic() - start < 1.0
+
+
+def test_waiter_gets_the_driver_released_by_another_thread(pool):
+    first, second = pool.acquire(), pool.acquire()
+    threading.Timer(0.1, pool.release, args=(first,)).start()
+    assert pool.acquire(timeout=2) is first
+    pool.release(second)
+
+
+def test_pinned_session_keeps_one_driver_across_scrapes(pool):
+    session = PinnedSession(pool)
+    driver = session.acquire()
+    session.release(driver)
+    assert session.acquire() is driver
+    assert pool.stats()["idle"] == 0
+    session.close()
+    assert pool.stats()["idle"] == 1
+
+
+def test_pinned_driver_that_died_is_replaced(pool):
+    session = PinnedSession(pool)
+    driver = session.acquire()
+    session.release(driver)
+    driver.healthy = False
+    replacement = session.acquire()
+    assert replacement is not driver
+    assert driver.quit_called
+    assert pool.stats()["live"] == 1
+    session.close()
@@ -0,0 +1,96 @@
+"""
+AsyncScrapeEngine with stand-in scrapers: rate-limit slots around the tiers and
+single-flight joining of duplicate links.
+"""
+import threading
+import time
+
+from engine import AsyncScrapeEngine
+from scraper.base import Scraper
+from scraper.ratelimit import RateLimiterRegistry
+from singleflight import SingleFlight
+
+LIMITS = {"fake": {"rate": 1000.0, "burst": 1000, "initial": 1, "min_limit": 1, "max_limit": 1, "latency_target": 60.0}}
+
+
+class FakeScraper(Scraper):
+    platform = "fake"
+
+    def __init__(self, rate_limiter=None, http_result=None, http_delay=0.0):
+        self.rate_limiter = rate_limiter
+        self.http_result = http_result
+        self.http_delay = http_delay
+        self.http_calls = []
+        self.in_flight_while_pinning = []
+        self._lock = threading.Lock()
+
+    def scrape(self, link):
+        return self.scrape_fallback(link)
+
+    def extract_from_html(self, html, link):
+        raise ValueError(f"No follower count for {link}.")
+
+    def scrape_http(self, link):
+        with self._lock:
+            self.http_calls.append(link)
+        time.sleep(self.http_delay)
+        if self.http_result is None:
+            raise ValueError(f"No follower count for {link}.")
+        return self.http_result
+
+    def pin_browser(self, timeout=None):
+        window = self.rate_limiter.get(self.platform).window
+        self.in_flight_while_pinning.append(window.snapshot()["in_flight"])
+
+    def scrape_fallback(self, link):
+        return 7
+
+
+def _run(engine, accounts):
+    results = []
+    engine.run(accounts, lambda account, data: results.append(data))
+    return results
+
+
+def test_fast_path_slot_is_released_before_the_browser_fallback():
+    limiter = RateLimiterRegistry(LIMITS)
+    scraper = FakeScraper(limiter)
+    engine = AsyncScrapeEngine({"fake": scraper}, str, rate_limiter=limiter)
+    results = _run(engine, [("a", "https://fake/a", "fake", 0, "pending")])
+    assert results == [("a", "https://fake/a", "fake", 7, "7")]
+    assert scraper.in_flight_while_pinning == [0]
+    assert limiter.get("fake").window.snapshot()["in_flight"] == 0
+
+
+def test_duplicate_links_share_one_fast_path_request():
+    scraper = FakeScraper(http_result=42, http_delay=0.2)
+    engine = AsyncScrapeEngine({"fake": scraper}, str, single_flight=SingleFlight())
+    accounts = [("a", "https://fake.com/someone", "fake", 0, "pending"),
+                ("b", "https://www.fake.com/Someone/", "fake", 0, "pending")]
+    results = _run(engine, accounts)
+    assert len(scraper.http_calls) == 1
+    assert sorted(r[3] for r in results) == [42, 42]
+    assert engine.single_flight.counts == {"started": 1, "joined": 1}
+    assert engine.single_flight.in_flight() == []
+
+
+def test_failed_leader_fails_its_joiners_too():
+    class Failing(FakeScraper):
+        def scrape_fallback(self, link):
+            raise RuntimeError("browser crashed")
+
+    scraper = Failing(http_delay=0.2)
+    engine = AsyncScrapeEngine({"fake": scraper}, str, single_flight=SingleFlight())
+    accounts = [("a", "https://fake.com/x", "fake", 0, "pending"), ("b", "https://fake.com/x", "fake", 0, "pending")]
+    results = _run(engine, accounts)
+    assert [r[4] for r in results] == ["failed", "failed"]
+    assert engine.single_flight.in_flight() == []
+
+
+def test_no_free_browser_is_not_a_failed_scrape():
+    class Contended(FakeScraper):
+        def scrape_fallback(self, link):
+            raise TimeoutError("DriverPool[fake]: no driver available after 90 seconds.")
+
+    engine = AsyncScrapeEngine({"fake": Contended()}, str)
+    assert _run(engine, [("a", "https://fake/a", "fake", 0, "pending")]) == [None]
@@ -0,0 +1,53 @@
+"""Streaming exports to CSV and NDJSON, optionally zstd-compressed."""
+import csv
+import io
+import json
+
+import pytest
+
+ROWS = [("Zoë", "https://x.com/zoe", "twitter", 1200, "micro"),
+        ("a, b", "https://www.tiktok.com/@ab", "tiktok", 0, "failed")]
+
+
+@pytest.fixture
+def accounts(db):
+    db.bulk_upsert_accounts(ROWS)
+    return db
+
+
+def test_csv_export(accounts, tmp_path):
+    path = tmp_path / "out.csv"
+    assert accounts.export_csv_to_file(str(path)) == 2
+    with open(path, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [["Name", "Link", "Platform", "Followers", "Category"]] + \
+            [[str(value) for value in row] for row in ROWS]
+
+
+def test_ndjson_export(accounts, tmp_path):
+    path = tmp_path / "out.ndjson"
+    accounts.export_csv_to_file(str(path))
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [dict(zip(accounts.EXPORT_FIELDS, row)) for row in ROWS]
+
+
+def test_progress_is_reported_per_batch(db, tmp_path):
+    total = db.EXPORT_BATCH_ROWS + 5
+    db.bulk_upsert_accounts([(f"n{i}", f"https://x.com/n{i}", "twitter", i, "micro") for i in range(total)])
+    calls = []
+    db.export_csv_to_file(str(tmp_path / "out.csv"), progress=lambda written, of: calls.append((written, of)))
+    assert calls == [(db.EXPORT_BATCH_ROWS, total), (total, total)]
+
+
+def test_compressed_export(accounts, tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "out.csv.zst"
+    accounts.export_csv_to_file(str(path))
+    with open(path, "rb") as f:
+        text = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(f), encoding="utf-8").read()
+    assert text.splitlines()[1] == "Zoë,https://x.com/zoe,twitter,1200,micro"
+
+
+def test_compressed_export_without_zstandard(accounts, tmp_path, monkeypatch):
+    monkeypatch.setattr(accounts, "zstandard", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        accounts.export_csv_to_file(str(tmp_path / "out.ndjson.zst"))
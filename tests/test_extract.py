@@ -0,0 +1,51 @@
+"""Regex extraction of follower counts from profile HTML."""
+import pytest
+
+from scraper import extract
+
+
+@pytest.mark.parametrize("html, expected", [
+    ("<span>1234 followers</span>", "1234"),
+    ("<span>15678 Followers</span>", "15678"),
+    ("<span>1.25M Followers</span>", "1.25M"),
+    ("<span>1,234 followers</span>", "1,234"),
+    ("<strong>12.5K</strong><span> Followers</span>", None),
+    ("<div>Followed by 3 people · 98.1K followers</div>", "98.1K"),
+    ("<span>1 follower</span>", "1"),
+    ("<span>No followers yet</span>", None),
+])
+def test_followers_in_text(html, expected):
+    assert extract.followers_in_text(html) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1234", 1234),
+    ("12,345", 12345),
+    ("1,234,567", 1234567),
+    ("1.234.567", 1234567),
+    ("1.234", 1234),
+    ("1,234.5K", 1234500),
+    ("1.234,5K", 1234500),
+    ("12.5K", 12500),
+    ("12,5K", 12500),
+    ("1.25M", 1250000),
+    ("1.234M", 1234000),
+    ("2m", 2000000),
+    ("987 Followers", 987),
+    ("1,234,", 1234),
+])
+def test_parse_count(text, expected):
+    assert extract.parse_count(text) == expected
+
+
+def test_parse_count_needs_a_number():
+    with pytest.raises(ValueError):
+        extract.parse_count("Followers")
+
+
+def test_script_and_meta_lookup():
+    html = ('<meta content="10K Followers, 5 Following" property="og:description">'
+            '<script type="application/json" id="__DATA__">{"a": 1}</script>')
+    assert extract.meta_content(html, "og:description") == "10K Followers, 5 Following"
+    assert extract.script_text(html, "__DATA__") == '{"a": 1}'
+    assert extract.script_text(html, "missing") is None
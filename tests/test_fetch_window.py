@@ -0,0 +1,29 @@
+"""Sorted paging for the windowed account table."""
+import pytest
+
+
+@pytest.fixture
+def accounts(db):
+    db.bulk_upsert_accounts([
+        ("bob", "https://x.com/bob", "twitter", 300, "micro"),
+        ("Alice", "https://www.tiktok.com/@alice", "tiktok", 100, "micro"),
+        ("carol", "https://www.instagram.com/carol/", "instagram", 200_000, "macro"),
+    ])
+    return db
+
+
+def test_pages_follow_the_sort_column(accounts):
+    assert [row[0] for row in accounts.fetch_window(0, 10, "name")] == ["Alice", "bob", "carol"]
+    assert [row[0] for row in accounts.fetch_window(1, 1, "name", descending=True)] == ["bob"]
+    assert [row[3] for row in accounts.fetch_window(0, 2, "followers", descending=True)] == [200_000, 300]
+
+
+@pytest.mark.parametrize("order_by", sorted(__import__("database").SORTABLE_COLUMNS))
+@pytest.mark.parametrize("descending", [False, True])
+def test_sorted_pages_are_read_from_an_index(accounts, order_by, descending):
+    direction = "DESC" if descending else "ASC"
+    order = f"{accounts.SORTABLE_COLUMNS[order_by]} {direction}, id {direction}"
+    plan = accounts.get_connection_manager().reader().execute(
+        f"EXPLAIN QUERY PLAN {accounts.SELECT_ACCOUNTS_SQL} ORDER BY {order} LIMIT 10 OFFSET 100").fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "TEMP B-TREE" not in details, details
@@ -0,0 +1,125 @@
+# tests/test_http_fast_path.py
+"""
+The browserless HTTP fast path of each scraper, run against a local stand-in server
+(http_client.set_base_url) that serves canned profile pages.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The fast path itself needs requests; the browser modules are stubbed in conftest.py
+pytest.importorskip("requests")
+
+from scraper import InstagramScraper, TikTokScraper, XTwitterScraper, circuit, http_client
+
+TIKTOK_REHYDRATION = """<html><head>
+<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">
+{"__DEFAULT_SCOPE__": {"webapp.user-detail": {"userInfo": {"user": {"uniqueId": "nasa"},
+ "stats": {"followerCount": 97000000, "followingCount": 70}}}}}
+</script></head><body></body></html>"""
+
+TIKTOK_SIGI_STATE = """<html><head>
+<script id="SIGI_STATE" type="application/json">
+{"UserModule": {"users": {"someone": {"uniqueId": "someone", "stats": {"followerCount": 5}},
+ "natgeo": {"uniqueId": "natgeo", "stats": {"followerCount": 12345}}}}}
+</script></head><body></body></html>"""
+
+INSTAGRAM_PROFILE = """<html><head>
+<meta property="og:title" content="NASA (@nasa)">
+<meta name="description" content="97M Followers, 81 Following, 4,321 Posts - See Instagram photos and videos from NASA (@nasa)">
+</head><body></body></html>"""
+
+INSTAGRAM_EXACT = """<html><head>
+<meta content="12,345 Followers, 10 Following, 7 Posts - See Instagram photos and videos" name="description">
+</head></html>"""
+
+X_PAYLOAD = """<html><body><script id="__NEXT_DATA__" type="application/json">
+{"props": {"pageProps": {"timeline": {"entries": [
+ {"tweet": {"user": {"screen_name": "NASA", "followers_count": 85000000}}},
+ {"tweet": {"retweeted_status": {"user": {"screen_name": "esa", "followers_count": 1500000}}}}
+]}}}}</script></body></html>"""
+
+LOGIN_WALL = "<html><head><title>Login</title></head><body>Log in to continue</body></html>"
+
+# Path on the stand-in server (original host first, see http_client.resolve_url) -> body
+PAGES = {
+    "/www.tiktok.com/@nasa": TIKTOK_REHYDRATION,
+    "/www.tiktok.com/@natgeo": TIKTOK_SIGI_STATE,
+    "/www.tiktok.com/@nomarkup": LOGIN_WALL,
+    "/www.instagram.com/nasa/": INSTAGRAM_PROFILE,
+    "/www.instagram.com/exact/": INSTAGRAM_EXACT,
+    "/www.instagram.com/nomarkup/": LOGIN_WALL,
+    "/syndication.twitter.com/srv/timeline-profile/screen-name/nasa": X_PAYLOAD,
+    "/syndication.twitter.com/srv/timeline-profile/screen-name/nomarkup": LOGIN_WALL,
+}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES.get(self.path.split("?")[0])
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write((body or "Not found").encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stand_in_server(tmp_path_factory):
+    """Serve PAGES on a local port and point every fast-path request at it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_client.set_base_url(f"http://127.0.0.1:{server.server_port}")
+    circuit.set_state_dir(str(tmp_path_factory.mktemp("circuit"))) # Keep breaker state out of the working directory
+    try:
+        yield server
+    finally:
+        http_client.set_base_url(None)
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("scraper_class, link, expected", [
+    (TikTokScraper, "https://www.tiktok.com/@nasa", 97_000_000),
+    (TikTokScraper, "https://www.tiktok.com/@natgeo", 12_345),
+    (InstagramScraper, "https://www.instagram.com/nasa/", 97_000_000),
+    (InstagramScraper, "https://www.instagram.com/exact", 12_345),
+    (XTwitterScraper, "https://x.com/nasa", 85_000_000),
+])
+def test_scrape_http_parses_count(stand_in_server, scraper_class, link, expected):
+    assert scraper_class().scrape_http(link) == expected
+
+
+@pytest.mark.parametrize("scraper_class, link", [
+    (TikTokScraper, "https://www.tiktok.com/@nomarkup"),
+    (InstagramScraper, "https://www.instagram.com/nomarkup/"),
+    (XTwitterScraper, "https://x.com/nomarkup"),
+])
+def test_scrape_http_raises_without_markup(stand_in_server, scraper_class, link):
+    with pytest.raises(ValueError):
+        scraper_class().scrape_http(link)
+
+
+@pytest.mark.parametrize("scraper_class, link", [
+    (TikTokScraper, "https://www.tiktok.com/@nomarkup"),
+    (TikTokScraper, "https://www.tiktok.com/@missing"),
+    (InstagramScraper, "https://www.instagram.com/nomarkup/"),
+    (XTwitterScraper, "https://x.com/nomarkup"),
+    (XTwitterScraper, "https://x.com/missing"),
+])
+def test_scrape_falls_back_when_fast_path_fails(stand_in_server, monkeypatch, scraper_class, link):
+    scraper = scraper_class()
+    fallback_links = []
+    monkeypatch.setattr(scraper, "scrape_fallback", lambda l: fallback_links.append(l) or 42)
+    assert scraper.scrape(link) == 42
+    assert fallback_links == [link]
+
+
+def test_scrape_skips_fallback_when_fast_path_succeeds(stand_in_server, monkeypatch):
+    scraper = TikTokScraper()
+    monkeypatch.setattr(scraper, "scrape_fallback", lambda l: pytest.fail("browser tier must not run"))
+    assert scraper.scrape("https://www.tiktok.com/@nasa") == 97_000_000
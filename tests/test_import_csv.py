@@ -0,0 +1,107 @@
+"""Streaming CSV import: chunking, staging against the database and the scrape runner."""
+import csv
+import threading
+
+import pytest
+
+import main
+from write_buffer import WriteBehindBuffer
+
+
+class FakeRoot:
+    def after(self, delay, func, *args):
+        pass
+
+
+class FakeUI:
+    root = FakeRoot()
+
+    def refresh(self):
+        pass
+
+
+@pytest.fixture
+def controller(db, monkeypatch):
+    """A Controller without Tk, browsers or schedulers; scrapes report 1000 followers."""
+    monkeypatch.setattr(main, "IMPORT_CHUNK_ROWS", 2)
+    messages = []
+    for kind in ("showinfo", "showwarning", "showerror"):
+        monkeypatch.setattr(main.tk.messagebox, kind, lambda title, text, _k=kind: messages.append((_k, text)))
+    ctrl = main.Controller.__new__(main.Controller)
+    ctrl.scrapers = {"instagram": None, "tiktok": None, "twitter": None}
+    ctrl.ui = FakeUI()
+    ctrl.write_buffer = WriteBehindBuffer(max_rows=1000, max_delay_ms=60_000)
+    ctrl.runs = []
+    ctrl.runner_threads = set()
+
+    def run_scrapes(accounts, on_result, engine=None):
+        ctrl.runs.append([acc[1] for acc in accounts])
+        ctrl.runner_threads.add(threading.current_thread().name)
+        for acc in accounts:
+            on_result(acc, (acc[0], acc[1], acc[2], 1000, "micro"))
+
+    ctrl._run_scrapes = run_scrapes
+    ctrl.messages = messages
+    yield ctrl
+    ctrl.write_buffer.close()
+
+
+def _write_csv(path, rows, header=("Name", "Link", "Platform")):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_rows_are_read_in_chunks(controller):
+    rows = [["a", "https://x.com/a", "twitter"], ["", "https://x.com/empty", "twitter"],
+            ["b", "https://x.com/b", ""], ["short"], ["c", "https://example.com/c", "myspace"]]
+    chunks = list(controller._read_import_chunks(iter(rows), 0, 1, 2))
+    assert chunks == [
+        [("a", "https://x.com/a", "twitter"), ("b", "https://x.com/b", "twitter")],
+        [("c", "https://example.com/c", None)],
+    ]
+
+
+def test_staging_skips_tracked_and_repeated_links(controller, db):
+    db.upsert_account("old", "https://x.com/old", "twitter", 5, "micro")
+    chunk = [("old", "https://x.com/old", "twitter"), ("a", "https://x.com/a", "twitter"),
+             ("a again", "https://x.com/a", "twitter"), ("u", "https://example.com/u", None)]
+    pending, skipped = controller._stage_import_chunk(chunk)
+    assert pending == [("a again", "https://x.com/a", "twitter", 0, "pending")]
+    assert skipped == 2
+    assert db.fetch_account("https://example.com/u")[2:] == ("unknown", 0, "failed_platform")
+    assert db.fetch_account("https://x.com/old")[3] == 5
+
+
+def test_import_scrapes_every_chunk_on_one_runner(controller, db, tmp_path):
+    db.upsert_account("tracked", "https://x.com/tracked", "twitter", 5, "micro")
+    path = _write_csv(tmp_path / "in.csv", [
+        ["a", "https://x.com/a", "twitter"],
+        ["b", "https://www.tiktok.com/@b", ""],
+        ["tracked", "https://x.com/tracked", "twitter"],
+        ["c", "https://www.instagram.com/c/", "instagram"],
+    ])
+    controller.import_csv(path)
+    assert controller.runs == [["https://x.com/a", "https://www.tiktok.com/@b"], ["https://www.instagram.com/c/"]]
+    assert controller.runner_threads == {"import"}
+    for link in ("https://x.com/a", "https://www.tiktok.com/@b", "https://www.instagram.com/c/"):
+        assert db.fetch_account(link)[3:] == (1000, "micro")
+    assert db.fetch_account("https://x.com/tracked")[3] == 5
+    assert controller.messages[-1][0] == "showinfo"
+
+
+def test_failed_chunk_marks_its_accounts_failed(controller, db, tmp_path):
+    def broken_run(accounts, on_result, engine=None):
+        raise RuntimeError("pool closed")
+
+    controller._run_scrapes = broken_run
+    controller.import_csv(_write_csv(tmp_path / "in.csv", [["a", "https://x.com/a", "twitter"]]))
+    assert db.fetch_account("https://x.com/a")[3:] == (0, "failed")
+
+
+def test_import_requires_name_and_link_columns(controller, db, tmp_path):
+    controller.import_csv(_write_csv(tmp_path / "in.csv", [["https://x.com/a"]], header=("Link",)))
+    assert controller.messages == [("showerror", "CSV must contain 'Name' and 'Link' columns.")]
+    assert controller.runs == []
@@ -0,0 +1,96 @@
+"""InstaloaderPool: context reuse, rotation and pacing, with stand-in loaders."""
+import threading
+import time
+
+import pytest
+
+from scraper.instaloader_pool import InstaloaderPool
+
+
+class Loader:
+    pass
+
+
+def _pool(**kwargs):
+    options = dict(max_size=2, rate=1000.0, burst=1000, context_rate=1000.0, context_burst=1000)
+    options.update(kwargs)
+    return InstaloaderPool(Loader, **options)
+
+
+def test_released_context_is_reused():
+    pool = _pool()
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        assert second is first
+    assert pool.stats()["created"] == 1
+
+
+def test_rate_limited_context_is_rotated_out():
+    pool = _pool()
+    with pytest.raises(Exception, match="Please wait a few minutes"):
+        with pool.lease() as throttled:
+            raise Exception("Please wait a few minutes before you try again.")
+    with pool.lease() as fresh:
+        assert fresh is not throttled
+    stats = pool.stats()
+    assert (stats["throttled"], stats["rotated"], stats["created"], stats["live"]) == (1, 1, 2, 1)
+
+
+def test_other_errors_keep_the_context():
+    pool = _pool()
+    with pytest.raises(ValueError):
+        with pool.lease() as loader:
+            raise ValueError("Profile someone does not exist.")
+    with pool.lease() as again:
+        assert again is loader
+    assert pool.stats()["rotated"] == 0
+
+
+def test_context_is_rotated_after_max_requests():
+    pool = _pool(max_requests=3)
+    loaders = []
+    for _ in range(4):
+        with pool.lease() as loader:
+            loaders.append(loader)
+    assert loaders[:3] == [loaders[0]] * 3
+    assert loaders[3] is not loaders[0]
+    assert pool.stats()["rotated"] == 1
+
+
+def test_full_pool_blocks_until_a_context_is_released():
+    pool = _pool(max_size=1)
+    loader = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    threading.Timer(0.05, pool.release, args=(loader,)).start()
+    assert pool.acquire(timeout=2) is loader
+
+
+def test_each_context_is_paced_by_its_own_bucket():
+    pool = _pool(max_size=1, context_rate=10.0, context_burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        with pool.lease():
+            pass
+    # One burst token, then a lookup every 1 / context_rate seconds
+    assert time.monotonic() - start >= 0.18
+
+
+def test_wakeups_do_not_extend_the_timeout():
+    pool = _pool(max_size=1)
+    held = pool.acquire()
+
+    def nudge():
+        # Wake the waiter without freeing a context, several times within its timeout
+        for _ in range(5):
+            time.sleep(0.04)
+            with pool._cond:
+                pool._cond.notify_all()
+
+    threading.Thread(target=nudge, daemon=True).start()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
+    assert time.monotonic() - start < 0.18
+    pool.release(held)
@@ -0,0 +1,53 @@
+"""The durable scrape job queue: leases, expiry and retries."""
+import time
+
+import job_queue
+
+NOW = time.time() + 3600  # Later than any enqueue in these tests, so every job is available
+
+
+def test_expired_lease_is_claimed_by_another_worker(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    job_id = job_queue.enqueue(["https://x.com/a"])["https://x.com/a"]
+    assert job_queue.claim("worker-a", lease_seconds=60, now=NOW) == [(job_id, "https://x.com/a", 1)]
+    # Still leased: nothing for a second worker
+    assert job_queue.claim("worker-b", lease_seconds=60, now=NOW + 59) == []
+
+    # worker-a stops heartbeating; once its lease runs out worker-b takes the job over
+    assert job_queue.claim("worker-b", lease_seconds=60, now=NOW + 61) == [(job_id, "https://x.com/a", 2)]
+    assert not job_queue.ack(job_id, "worker-a", ("a", "https://x.com/a", "twitter", 1, "micro"))
+    assert job_queue.ack(job_id, "worker-b", ("a", "https://x.com/a", "twitter", 2, "micro"))
+    assert db.fetch_account("https://x.com/a")[3] == 2
+
+
+def test_lease_expiring_on_the_last_attempt_kills_the_job(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    job_id = job_queue.enqueue(["https://x.com/a"], max_attempts=1)["https://x.com/a"]
+    job_queue.claim("worker-a", lease_seconds=60, now=NOW)
+    assert job_queue.claim("worker-b", lease_seconds=60, now=NOW + 61) == []
+    assert job_queue.job_states([job_id]) == {job_id: "dead"}
+    assert db.fetch_account("https://x.com/a")[4] == "failed"
+
+
+def test_failed_attempt_is_retried_with_backoff(db):
+    job_id = job_queue.enqueue(["https://x.com/a"])["https://x.com/a"]
+    job_queue.claim("worker-a", now=NOW)
+    assert job_queue.fail(job_id, "worker-a", "timeout", now=NOW) == "queued"
+    assert job_queue.claim("worker-b", now=NOW + job_queue.RETRY_BASE_SECONDS - 1) == []
+    assert job_queue.claim("worker-b", now=NOW + job_queue.RETRY_BASE_SECONDS) == [(job_id, "https://x.com/a", 2)]
+
+
+def test_live_workers_follow_check_ins_and_leases(db):
+    assert job_queue.live_workers(now=NOW) == []
+    job_queue.worker_alive("worker-a", ttl=60, now=NOW)
+    assert job_queue.live_workers(now=NOW + 60) == ["worker-a"]
+    assert job_queue.live_workers(now=NOW + 61) == [] # Stopped checking in
+
+    # A worker busy on a job counts while its lease runs
+    job_queue.enqueue(["https://x.com/a"])
+    job_queue.claim("worker-b", lease_seconds=120, now=NOW)
+    assert job_queue.live_workers(now=NOW + 61) == ["worker-b"]
+
+    job_queue.worker_alive("worker-a", ttl=60, now=NOW + 100)
+    job_queue.worker_stopped("worker-a")
+    assert job_queue.live_workers(now=NOW + 121) == []
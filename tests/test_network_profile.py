@@ -0,0 +1,87 @@
+"""Network blocking profiles and page weight, with a stand-in driver that records CDP calls."""
+import pytest
+
+from scraper import network_profile
+from scraper.network_profile import RESOURCE_PATTERNS
+
+
+class FakeDriver:
+    def __init__(self, fail_cdp=False, weight=(0, 0)):
+        self.fail_cdp = fail_cdp
+        self.weight = weight
+        self.cdp_calls = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        if self.fail_cdp:
+            raise Exception("unknown command: Network.setBlockedURLs")
+        self.cdp_calls.append((cmd, params))
+
+    def execute_script(self, script):
+        if isinstance(self.weight, Exception):
+            raise self.weight
+        return list(self.weight)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    profiles = {platform: dict(profile) for platform, profile in network_profile.PLATFORM_PROFILES.items()}
+    monkeypatch.setattr(network_profile, "PLATFORM_PROFILES", profiles)
+    monkeypatch.setattr(network_profile, "_stats", {})
+
+
+def test_blocked_urls_cover_the_classes_and_extras():
+    urls = network_profile.blocked_urls("twitter")
+    for cls in ("image", "media", "font", "tracker"):
+        assert set(RESOURCE_PATTERNS[cls]) <= set(urls)
+    assert "*video.twimg.com*" in urls
+    assert len(urls) == len(set(urls))
+
+
+def test_unknown_platform_blocks_every_class():
+    assert network_profile.blocked_urls("mastodon") == [p for patterns in RESOURCE_PATTERNS.values() for p in patterns]
+
+
+def test_allow_list_puts_patterns_back():
+    network_profile.set_profile("tiktok", allow=("*.woff2", "*mon.tiktokv.com*"))
+    urls = network_profile.blocked_urls("tiktok")
+    assert "*.woff2" not in urls and "*mon.tiktokv.com*" not in urls
+    assert "*.woff" in urls
+
+
+def test_set_profile_replaces_only_the_given_parts():
+    network_profile.set_profile("instagram", block=("tracker",))
+    urls = network_profile.blocked_urls("instagram")
+    assert "*.png" not in urls
+    assert "*doubleclick.net*" in urls and "*scontent*.cdninstagram.com*" in urls
+
+
+def test_set_profile_rejects_unknown_classes():
+    with pytest.raises(ValueError, match="stylesheet"):
+        network_profile.set_profile("instagram", block=("image", "stylesheet"))
+    assert network_profile.PLATFORM_PROFILES["instagram"]["block"] == ("image", "media", "font", "tracker")
+
+
+def test_apply_profile_installs_the_block_list():
+    driver = FakeDriver()
+    count = network_profile.apply_profile(driver, "twitter", enabled=True)
+    assert driver.cdp_calls == [("Network.enable", {}),
+                                ("Network.setBlockedURLs", {"urls": network_profile.blocked_urls("twitter")})]
+    assert count == len(network_profile.blocked_urls("twitter"))
+
+
+def test_disabled_profile_clears_the_block_list():
+    driver = FakeDriver()
+    assert network_profile.apply_profile(driver, "twitter", enabled=False) == 0
+    assert driver.cdp_calls[-1] == ("Network.setBlockedURLs", {"urls": []})
+
+
+def test_apply_profile_survives_a_cdp_failure(capsys):
+    assert network_profile.apply_profile(FakeDriver(fail_cdp=True), "tiktok", enabled=True) == 0
+    assert "Could not apply blocking profile" in capsys.readouterr().err
+
+
+def test_page_weight_is_averaged_per_platform():
+    network_profile.record_page(FakeDriver(weight=(2048, 10)), "tiktok")
+    network_profile.record_page(FakeDriver(weight=(4096, 30)), "tiktok")
+    network_profile.record_page(FakeDriver(weight=Exception("no page loaded")), "tiktok") # Best effort
+    assert network_profile.page_weight_stats() == {"tiktok": {"pages": 2, "avg_kb": 3.0, "avg_resources": 20.0}}
@@ -0,0 +1,31 @@
+"""PriorityScheduler: due-time bookkeeping and inspection while a tick runs."""
+import threading
+
+from priority_scheduler import FAILED_RETRY, PriorityScheduler
+
+NOW = 1_000_000.0
+
+
+def test_tick_scrapes_due_accounts_and_gives_them_a_provisional_slot(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    scraped = []
+    scheduler = PriorityScheduler(scraped.extend, max_per_tick=10)
+    assert scheduler.tick(now=NOW) == ["https://x.com/a"]
+    assert scraped == ["https://x.com/a"]
+    assert scheduler.snapshot() == [(NOW + FAILED_RETRY, "https://x.com/a")]
+    assert scheduler.tick(now=NOW + 1) == []
+
+
+def test_snapshot_from_another_thread_does_not_wait_for_the_scrape(db):
+    db.upsert_account("a", "https://x.com/a", "twitter", 0, "pending")
+    seen = []
+
+    def scrape(links):
+        # The heap is only locked while it changes, not for the whole scrape
+        reader = threading.Thread(target=lambda: seen.append(scheduler.snapshot()))
+        reader.start()
+        reader.join(2)
+
+    scheduler = PriorityScheduler(scrape, max_per_tick=10)
+    scheduler.tick(now=NOW)
+    assert seen == [[(NOW + FAILED_RETRY, "https://x.com/a")]]
@@ -0,0 +1,110 @@
+"""Token buckets and AIMD concurrency windows."""
+import asyncio
+import threading
+
+import pytest
+
+from scraper.ratelimit import AIMDLimiter, RateLimiterRegistry, TokenBucket, is_throttle_error
+
+
+def _window(initial=4, minimum=1, maximum=8, latency_target=10.0, cooldown=0.0):
+    return AIMDLimiter(initial, minimum, maximum, latency_target, decrease_cooldown=cooldown)
+
+
+def test_success_grows_the_window_additively():
+    window = _window(initial=4)
+    for _ in range(4):
+        window.acquire()
+        window.release(latency=1.0)
+    # +1/limit per fast success: about one slot per full window of work
+    assert 4.9 < window._limit <= 5.0
+    window.acquire()
+    window.release(latency=1.0)
+    assert window.limit == 5
+
+
+def test_growth_stops_at_the_maximum():
+    window = _window(initial=7, maximum=8)
+    for _ in range(50):
+        window.acquire()
+        window.release(latency=1.0)
+    assert window.limit == 8
+
+
+def test_error_halves_the_window():
+    window = _window(initial=8)
+    window.acquire()
+    window.release(latency=1.0, failed=True)
+    assert window.limit == 4
+
+
+@pytest.mark.parametrize("outcome", [{"throttled": True}, {"latency": 30.0}])
+def test_throttling_and_slow_responses_shrink_the_window(outcome):
+    window = _window(initial=8)
+    window.acquire()
+    window.release(latency=outcome.get("latency", 1.0), throttled=outcome.get("throttled", False))
+    assert window.limit == 4
+
+
+def test_burst_of_errors_within_the_cooldown_is_one_decrease():
+    window = _window(initial=8, cooldown=60.0)
+    for _ in range(3):
+        window.acquire()
+        window.release(latency=1.0, failed=True)
+    assert window.limit == 4
+
+
+def test_window_never_drops_below_the_minimum():
+    window = _window(initial=2, minimum=1)
+    for _ in range(5):
+        window.acquire()
+        window.release(latency=1.0, failed=True)
+    assert window.limit == 1
+
+
+def test_acquire_blocks_while_the_window_is_full():
+    window = _window(initial=1, maximum=1)
+    window.acquire()
+    assert not window.try_acquire()
+    with pytest.raises(TimeoutError):
+        window.acquire(timeout=0.05)
+    threading.Timer(0.05, window.release, args=(1.0,)).start()
+    window.acquire(timeout=2)
+    assert window.snapshot()["in_flight"] == 1
+
+
+def test_async_waiter_is_woken_by_a_release_from_another_thread():
+    window = _window(initial=1, maximum=1)
+    window.acquire()
+
+    async def wait_for_slot():
+        threading.Timer(0.05, window.release, args=(1.0,)).start()
+        await asyncio.wait_for(window.acquire_async(), timeout=2)
+
+    asyncio.run(wait_for_slot())
+    assert window.snapshot()["in_flight"] == 1
+
+
+def test_token_bucket_makes_callers_wait_once_the_burst_is_spent():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def test_registry_slot_feeds_errors_back_into_the_window():
+    registry = RateLimiterRegistry({"fake": {"rate": 100.0, "burst": 10, "initial": 8, "min_limit": 1,
+                                             "max_limit": 8, "latency_target": 10.0}})
+    with pytest.raises(RuntimeError):
+        with registry.slot("fake"):
+            raise RuntimeError("HTTP 429 Too Many Requests")
+    snapshot = registry.snapshot()["fake"]
+    assert snapshot["limit"] == 4
+    assert snapshot["in_flight"] == 0
+    assert snapshot["error_rate"] > 0
+
+
+def test_throttle_errors_are_recognized():
+    assert is_throttle_error(Exception("Please wait a few minutes before you try again."))
+    assert not is_throttle_error(Exception("HTTP 404"))
+    assert not is_throttle_error(None)
@@ -0,0 +1,177 @@
+"""
+Controller batch scraping with a stand-in scraper and a one-driver pool: pinned
+drivers, single-flight joins and results for every account.
+"""
+import queue
+import threading
+
+import pytest
+
+import job_queue
+import main
+from scraper.base import Scraper
+from scraper.driver_pool import DriverPool
+from scraper.ratelimit import RateLimiterRegistry
+from singleflight import SingleFlight
+
+LIMITS = {"fake": {"rate": 1000.0, "burst": 1000, "initial": 4, "min_limit": 1, "max_limit": 4, "latency_target": 60.0}}
+
+
+class FakeDriver:
+    current_url = "about:blank"
+    window_handles = ["main"]
+
+    def quit(self):
+        pass
+
+
+class FakeScraper(Scraper):
+    """Every scrape needs the browser: the HTTP tier always fails."""
+    platform = "fake"
+
+    def __init__(self, pool, acquire_timeout=2.0):
+        self.driver_pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.before_browser = {}  # link -> callable run before the browser is leased
+
+    def scrape(self, link):
+        return self.scrape_fallback(link)
+
+    def extract_from_html(self, html, link):
+        raise ValueError(f"No follower count for {link}.")
+
+    def scrape_http(self, link):
+        raise ValueError(f"No follower count for {link}.")
+
+    def pin_browser(self, timeout=None):
+        super().pin_browser(self.acquire_timeout)
+
+    def scrape_fallback(self, link):
+        hook = self.before_browser.get(link)
+        if hook:
+            hook()
+        pool = self.browser_pool()
+        driver = pool.acquire(self.acquire_timeout)
+        pool.release(driver)
+        return 7
+
+
+@pytest.fixture
+def controller():
+    ctrl = main.Controller.__new__(main.Controller)
+    ctrl.pool = DriverPool(FakeDriver, max_size=1, name="fake")
+    ctrl.scrapers = {"fake": FakeScraper(ctrl.pool)}
+    ctrl.rate_limiter = RateLimiterRegistry(LIMITS)
+    ctrl.single_flight = SingleFlight()
+    yield ctrl
+    ctrl.pool.close()
+
+
+def _account(link):
+    return ("name", link, "fake", 0, "pending")
+
+
+def test_batch_joining_a_scrape_gives_its_pinned_driver_back(controller):
+    scraper = controller.scrapers["fake"]
+    leader_waiting = threading.Event()
+    leader_result = []
+
+    def leader():
+        # A scrape of the shared link outside the batch, waiting for the only driver
+        scraper.before_browser["https://fake/shared"] = leader_waiting.set
+        leader_result.append(controller._scrape_link(scraper, "fake", "https://fake/shared"))
+
+    def start_leader():
+        # The batch has just pinned the only driver for its first link
+        threading.Thread(target=leader, daemon=True).start()
+        assert leader_waiting.wait(2)
+
+    scraper.before_browser["https://fake/first"] = start_leader
+    results = queue.Queue()
+    controller._scrape_batch("fake", [_account("https://fake/first"), _account("https://fake/shared")], results)
+    scraped = [results.get_nowait() for _ in range(2)]
+    assert [data[3:] for _, data in scraped] == [(7, "micro"), (7, "micro")]
+    assert leader_result == [7]
+    assert controller.single_flight.counts == {"started": 2, "joined": 1}
+    assert controller.pool.stats()["idle"] == 1
+
+
+def test_batches_follow_the_rate_limit_window_not_the_browser_pool(controller):
+    accounts = [_account(f"https://fake/{i}") for i in range(6)]
+    assert controller.pool.max_size == 1
+    assert len(controller._platform_batches(accounts)) == LIMITS["fake"]["initial"]
+
+
+def test_fast_path_errors_reach_the_rate_limiter(controller):
+    scraper = controller.scrapers["fake"]
+    scraper.scrape_http = lambda link: (_ for _ in ()).throw(Exception("HTTP 429 Too Many Requests"))
+    window = controller.rate_limiter.get("fake").window
+    assert controller._scrape_link(scraper, "fake", "https://fake/a", in_batch=True) == 7
+    assert window.limit == LIMITS["fake"]["initial"] // 2
+
+
+def test_browserless_fallback_leases_no_browser(controller):
+    class Instaloaderish(FakeScraper):
+        fallback_needs_browser = False
+
+        def scrape_fallback(self, link):
+            return 11 # Answered without a browser
+
+    scraper = Instaloaderish(controller.pool)
+    controller.scrapers["fake"] = scraper
+    results = queue.Queue()
+    controller._scrape_batch("fake", [_account("https://fake/a")], results)
+    assert results.get_nowait()[1][3] == 11
+    assert controller.pool.stats()["live"] == 0
+
+
+def test_no_free_driver_keeps_the_previous_result(controller):
+    controller.scrapers["fake"].acquire_timeout = 0.05
+    held = controller.pool.acquire() # Another run holds the only driver
+    results = queue.Queue()
+    controller._scrape_batch("fake", [_account("https://fake/a")], results)
+    assert results.get_nowait() == (_account("https://fake/a"), None)
+    controller.pool.release(held)
+
+
+class Contended(FakeScraper):
+    """Runs out of local browsers for the first ``busy_attempts`` scrapes."""
+
+    def __init__(self, pool, busy_attempts):
+        super().__init__(pool)
+        self.busy_attempts = busy_attempts
+        self.attempts = 0
+
+    def scrape_fallback(self, link):
+        self.attempts += 1
+        if self.attempts <= self.busy_attempts:
+            raise TimeoutError("DriverPool[fake]: no driver available after 90 seconds.")
+        return super().scrape_fallback(link)
+
+
+@pytest.mark.parametrize("busy_attempts, expected", [
+    (main.DEFERRED_RETRY_ROUNDS, (7, "micro")),  # Free again by the last round
+    (main.DEFERRED_RETRY_ROUNDS + 1, None),      # Never free: the caller keeps the row
+])
+def test_accounts_without_a_browser_are_scraped_again(controller, busy_attempts, expected):
+    controller.scrapers["fake"] = Contended(controller.pool, busy_attempts)
+    results = []
+    controller._run_scrapes([_account("https://fake/a")], lambda account, data: results.append(data), "threads")
+    assert len(results) == 1
+    assert (results[0][3:] if results[0] else None) == expected
+
+
+def test_queue_engine_without_a_worker_scrapes_in_process(controller, db):
+    results = []
+    controller._run_scrapes([_account("https://fake/a")], lambda account, data: results.append(data), "queue")
+    assert [data[3:] for data in results] == [(7, "micro")]
+    assert db.get_connection_manager().reader().execute("SELECT COUNT(*) FROM scrape_jobs").fetchone()[0] == 0
+
+
+def test_queue_engine_with_a_live_worker_queues_jobs(controller, db, monkeypatch):
+    monkeypatch.setattr(main, "QUEUE_WAIT_SECONDS", 0)
+    job_queue.worker_alive("worker-a")
+    results = []
+    controller._run_scrapes([_account("https://fake/a")], lambda account, data: results.append(data), "queue")
+    assert results == []
+    assert job_queue.queue_stats() == {"queued": 1}
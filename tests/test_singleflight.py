@@ -0,0 +1,36 @@
+"""Link canonicalization: the key single-flight scrapes are shared under."""
+import pytest
+
+from singleflight import canonical_link
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://x.com/someone", "http://x.com/someone"),                      # Scheme
+    ("https://x.com/someone", "x.com/someone"),                             # No scheme
+    ("https://www.instagram.com/someone", "https://instagram.com/someone"),  # www.
+    ("https://m.tiktok.com/@someone", "https://tiktok.com/@someone"),       # Mobile host
+    ("https://x.com/someone/", "https://x.com/someone"),                    # Trailing slash
+    ("https://x.com/SomeOne", "https://X.com/someone"),                     # Case
+    ("https://www.TikTok.com/@Someone/?lang=en", "tiktok.com/@someone"),    # Query string
+    ("https://x.com/someone#top", "https://x.com/someone"),                 # Fragment
+    ("http://twitter.com/someone", "https://x.com/someone"),                # Host alias
+    ("  https://x.com/someone\n", "https://x.com/someone"),                 # Whitespace
+])
+def test_equivalent_links_share_a_key(a, b):
+    assert canonical_link(a) == canonical_link(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://tiktok.com/@someone", "https://tiktok.com/someone"),     # @ is part of the path
+    ("https://x.com/someone", "https://x.com/someone2"),               # Other handle
+    ("https://x.com/someone", "https://instagram.com/someone"),        # Other platform
+    ("https://x.com/someone", "https://x.com/someone/followers"),      # Other page
+    ("https://api.x.com/someone", "https://x.com/someone"),            # Other subdomain
+])
+def test_different_links_keep_apart(a, b):
+    assert canonical_link(a) != canonical_link(b)
+
+
+def test_canonical_form():
+    assert canonical_link("https://www.TikTok.com/@Someone/?lang=en") == "tiktok.com/@someone"
+    assert canonical_link("http://twitter.com/Someone") == "x.com/someone"
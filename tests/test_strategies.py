@@ -0,0 +1,88 @@
+"""Adaptive ordering of extraction methods."""
+import pytest
+
+from scraper import strategies
+from scraper.strategies import MIN_TRIALS, PROBE_EVERY, StrategyRanker
+
+NAMES = ["header", "link", "text"]
+
+
+@pytest.fixture
+def ranker(monkeypatch):
+    ranker = StrategyRanker()
+    monkeypatch.setattr(strategies, "_ranker", ranker)
+    return ranker
+
+
+def _record(ranker, name, success, times=1, seconds=0.1):
+    for _ in range(times):
+        ranker.record("fake.browser", name, success, seconds)
+
+
+def test_declared_order_holds_without_evidence(ranker):
+    assert ranker.order("fake.browser", NAMES) == NAMES
+
+
+def test_failing_method_moves_behind_working_ones(ranker):
+    _record(ranker, "header", False, times=3)
+    _record(ranker, "link", True)
+    assert ranker.order("fake.browser", NAMES) == ["link", "text", "header"]
+
+
+def test_faster_method_wins_among_equally_reliable_ones(ranker):
+    _record(ranker, "header", True, seconds=2.0)
+    _record(ranker, "link", True, seconds=0.5)
+    _record(ranker, "text", True, seconds=1.0)
+    assert ranker.order("fake.browser", NAMES) == ["link", "text", "header"]
+
+
+def test_dead_method_is_skipped_but_probed(ranker):
+    _record(ranker, "header", False, times=MIN_TRIALS)
+    orders = [ranker.order("fake.browser", NAMES) for _ in range(PROBE_EVERY)]
+    assert orders[0] == ["link", "text"]
+    assert orders[-1] == ["link", "text", "header"] # Every PROBE_EVERY-th run tries it last
+    assert sum("header" in order for order in orders) == 1
+
+
+def test_all_methods_dead_still_tries_them(ranker):
+    for name in NAMES:
+        _record(ranker, name, False, times=MIN_TRIALS)
+    assert sorted(ranker.order("fake.browser", NAMES)) == sorted(NAMES)
+
+
+def test_run_reorders_after_a_layout_change(ranker):
+    calls = []
+
+    def method(name, value):
+        def call():
+            calls.append(name)
+            return value
+        return call
+
+    broken = [("header", method("header", None)), ("link", method("link", 42)), ("text", method("text", 7))]
+    assert strategies.run("fake.browser", broken) == ("link", 42)
+    calls.clear()
+    assert strategies.run("fake.browser", broken) == ("link", 42)
+    assert calls == ["link"]
+    assert strategies.strategy_stats()["fake.browser"]["header"]["success"] == 0.0
+
+
+def test_run_treats_exceptions_as_misses(ranker):
+    def boom():
+        raise RuntimeError("element went stale")
+
+    assert strategies.run("fake.browser", [("header", boom), ("text", lambda: 5)]) == ("text", 5)
+    assert strategies.run("fake.browser", [("header", boom)]) == (None, None)
+
+
+class WebDriverException(Exception):
+    pass
+
+
+def test_browser_crash_is_raised_and_not_recorded(ranker):
+    def crashed():
+        raise WebDriverException("invalid session id")
+
+    with pytest.raises(WebDriverException):
+        strategies.run("fake.browser", [("header", crashed), ("text", lambda: 5)])
+    assert strategies.strategy_stats() == {}
@@ -0,0 +1,103 @@
+"""Learned wait timeouts, wait conditions and retry backoff."""
+import types
+
+import pytest
+
+from scraper import waits
+from scraper.waits import LatencyTracker
+
+
+class FakeElement:
+    def __init__(self, text=""):
+        self.text = text
+
+
+class FakeDriver:
+    def __init__(self, elements=None):
+        self.elements = elements or {}  # selector -> [FakeElement]
+
+    def find_elements(self, by, selector):
+        return self.elements.get(selector, [])
+
+
+def test_percentile_uses_the_nearest_rank():
+    tracker = LatencyTracker()
+    assert tracker.percentile("fake", "ready", 95) is None
+    for seconds in range(1, 101):
+        tracker.record("fake", "ready", float(seconds))
+    assert tracker.percentile("fake", "ready", 50) == 50.0
+    assert tracker.percentile("fake", "ready", 95) == 95.0
+    assert tracker.percentile("fake", "ready", 100) == 100.0
+    assert tracker.percentile("fake", "ready", 0) == 1.0
+
+
+def test_window_keeps_only_recent_latencies():
+    tracker = LatencyTracker(window=3)
+    for seconds in (50.0, 1.0, 2.0, 3.0):
+        tracker.record("fake", "ready", seconds)
+    assert tracker.percentile("fake", "ready", 100) == 3.0
+
+
+def test_default_timeout_until_enough_samples():
+    tracker = LatencyTracker()
+    for _ in range(waits.MIN_SAMPLES - 1):
+        tracker.record("fake", "ready", 1.0)
+    assert tracker.timeout("fake", "ready", default=12.0) == 12.0
+    tracker.record("fake", "ready", 1.0)
+    assert tracker.timeout("fake", "ready", default=12.0) == max(waits.MIN_TIMEOUT, 1.0 * waits.TIMEOUT_FACTOR)
+
+
+@pytest.mark.parametrize("latency, expected", [
+    (0.1, waits.MIN_TIMEOUT),
+    (5.0, 5.0 * waits.TIMEOUT_FACTOR),
+    (60.0, waits.MAX_TIMEOUT),
+])
+def test_learned_timeout_is_clamped(latency, expected):
+    tracker = LatencyTracker()
+    for _ in range(waits.MIN_SAMPLES):
+        tracker.record("fake", "ready", latency)
+    assert tracker.timeout("fake", "ready") == expected
+
+
+def test_stages_are_tracked_separately():
+    tracker = LatencyTracker()
+    for _ in range(waits.MIN_SAMPLES):
+        tracker.record("fake", "ready", 5.0)
+    assert tracker.timeout("fake", "followers") == waits.DEFAULT_TIMEOUT
+    assert tracker.timeout("other", "ready") == waits.DEFAULT_TIMEOUT
+
+
+def test_any_of_returns_the_first_condition_met():
+    calls = []
+
+    def cond(name, value):
+        def check(driver):
+            calls.append(name)
+            return value
+        return check
+
+    condition = waits.any_of(cond("a", False), cond("b", "found"), cond("c", "also"))
+    assert condition(None) == (1, "found")
+    assert calls == ["a", "b"]
+    assert waits.any_of(cond("a", None), cond("b", ""))(None) is False
+
+
+def test_element_and_text_conditions(monkeypatch):
+    monkeypatch.setattr(waits, "By", types.SimpleNamespace(TAG_NAME="tag name")) # Selenium may be a stand-in
+    driver = FakeDriver({"span.count": [FakeElement("1,234")]})
+    assert waits.element_present("css", "span.count")(driver).text == "1,234"
+    assert waits.element_present("css", "div.missing")(driver) is False
+    driver.elements["body"] = [FakeElement("Posts 12 · 98.1K Followers")]
+    assert waits.body_text_matches(r"([\d.]+K)\s*followers")(driver).group(1) == "98.1K"
+    assert waits.body_text_matches("following")(driver) is False
+
+
+@pytest.mark.parametrize("attempt, expected_max", [(0, 0.5), (1, 1.0), (2, 2.0), (10, waits.RETRY_MAX_SECONDS)])
+def test_retry_delay_backs_off_with_jitter(monkeypatch, attempt, expected_max):
+    slept = []
+    monkeypatch.setattr(waits.time, "sleep", slept.append)
+    monkeypatch.setattr(waits.random, "uniform", lambda low, high: high)
+    waits.retry_delay(attempt)
+    monkeypatch.setattr(waits.random, "uniform", lambda low, high: low)
+    waits.retry_delay(attempt)
+    assert slept == [expected_max, expected_max / 2]
@@ -0,0 +1,129 @@
+"""WriteBehindBuffer batching, retries and shutdown."""
+import threading
+import time
+
+import pytest
+
+import write_buffer
+from write_buffer import WriteBehindBuffer
+
+
+class Recorder:
+    """flush_func stand-in that records every batch and can be told to fail."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.flushed = threading.Event()
+
+    def __call__(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        self.batches.append(batch)
+        self.flushed.set()
+
+
+def _row(link, followers=1):
+    return ("name", link, "twitter", followers, "micro")
+
+
+@pytest.fixture(autouse=True)
+def no_close_delay(monkeypatch):
+    monkeypatch.setattr(write_buffer, "CLOSE_RETRY_SECONDS", 0.0)
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_timer():
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(recorder, max_rows=3, max_delay_ms=60_000)
+    for i in range(3):
+        buffer.add(_row(f"link{i}"))
+    assert recorder.flushed.wait(2)
+    assert [row[1] for row in recorder.batches[0]] == ["link0", "link1", "link2"]
+    buffer.close()
+
+
+def test_small_batch_is_flushed_after_the_delay():
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(recorder, max_rows=100, max_delay_ms=50)
+    buffer.add(_row("link"))
+    assert recorder.flushed.wait(2)
+    assert recorder.batches == [[_row("link")]]
+    buffer.close()
+
+
+def test_rows_for_the_same_link_are_coalesced():
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(recorder, max_rows=100, max_delay_ms=60_000)
+    buffer.add(_row("link", 1))
+    buffer.add(_row("link", 2))
+    assert buffer.flush() == 1
+    assert recorder.batches == [[_row("link", 2)]]
+    buffer.close()
+
+
+def test_failed_flush_keeps_the_rows_for_the_next_one():
+    recorder = Recorder(failures=1)
+    buffer = WriteBehindBuffer(recorder, max_rows=100, max_delay_ms=60_000)
+    buffer.add(_row("link", 1))
+    assert buffer.flush() == 0
+    buffer.add(_row("other"))
+    assert buffer.flush() == 2
+    buffer.close()
+
+
+def test_close_retries_a_busy_database():
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(recorder, max_rows=100, max_delay_ms=60_000)
+    buffer.add(_row("link"))
+    recorder.failures = 2
+    buffer.close()
+    assert recorder.batches == [[_row("link")]]
+
+
+def test_close_raises_when_rows_cannot_be_written():
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(recorder, max_rows=100, max_delay_ms=60_000)
+    buffer.add(_row("link"))
+    recorder.failures = 100
+    with pytest.raises(RuntimeError, match="1 scrape results"):
+        buffer.close()
+
+
+def test_discard_drops_the_pending_row():
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(recorder, max_rows=100, max_delay_ms=60_000)
+    buffer.add(_row("link"))
+    buffer.add(_row("other"))
+    assert buffer.discard("link")
+    assert not buffer.discard("link")
+    buffer.close()
+    assert recorder.batches == [[_row("other")]]
+
+
+def test_discard_waits_for_a_flush_in_progress():
+    release = threading.Event()
+    written = []
+
+    def slow_flush(batch):
+        release.wait(2)
+        written.extend(batch)
+
+    buffer = WriteBehindBuffer(slow_flush, max_rows=100, max_delay_ms=60_000)
+    buffer.add(_row("link"))
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    time.sleep(0.05)
+    threading.Timer(0.1, release.set).start()
+    buffer.discard("link")
+    # The in-flight batch landed before discard() returned, so a direct write after it wins
+    assert written == [_row("link")]
+    flusher.join()
+    buffer.close()
+
+
+def test_rows_reach_the_database(db):
+    buffer = WriteBehindBuffer(max_rows=100, max_delay_ms=60_000)
+    buffer.add(("a", "https://x.com/a", "twitter", 10, "micro"))
+    buffer.close()
+    assert db.fetch_account("https://x.com/a") == ("a", "https://x.com/a", "twitter", 10, "micro")
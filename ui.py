@@ -10,7 +10,12 @@ import csv # Ensure csv is imported for DummyController
 import time # Import time for sleep in dummy controller
 
 # For concurrent processing of the queue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from virtual_table import VirtualTable
+
+# Above this many accounts the table switches to windowed (virtual) rendering
+VIRTUAL_TABLE_THRESHOLD = 5000
 
 # ------------------ Helper Functions ------------------
 def resource_path(relative_path):
@@ -63,20 +68,34 @@ class AppUI:
       - Secondary buttons: "Update Selected Data", "Import CSV", and "Export CSV".
 
     RIGHT PANEL:
-      - Contains a Treeview table for displaying data.
+      - Contains a Treeview table for displaying data. With many accounts it is a
+        VirtualTable that only holds the rows currently on screen.
 
     OVERLAY:
       - Displayed during long operations (includes a logo and a spinner).
     """
-    def __init__(self, root, controller):
+    def __init__(self, root, controller, virtual=None):
+        """
+        Args:
+            root: The Tk root window.
+            controller: Controller (or DummyController) backing the UI.
+            virtual (bool): Force the windowed table on or off; by default it is used
+                once more than VIRTUAL_TABLE_THRESHOLD accounts are tracked, including
+                when a later refresh crosses the threshold.
+        """
         self.root = root
         self.ctrl = controller
         self.overlay = None
+        self.overlay_label = None
         self.spinner_canvas = None
         self.spinner_arc = None
         self.spinner_angle = 0
         self.icon_img = None    # Window icon image reference
         self.logo_img = None    # Overlay logo image reference (kept as instance var to prevent GC)
+        self._items = {}        # link -> Treeview item id, so refresh() can update rows in place
+        self._version = None    # Change watermark of the last refresh (None forces a full load)
+        self.table = None       # VirtualTable in windowed mode, None for the plain Treeview
+        self._sort_col = None   # Column the plain Treeview was last sorted by, re-applied on refresh
 
         root.title("Social Media Tracker")
         root.configure(bg="white")
@@ -122,8 +141,9 @@ class AppUI:
         lf.grid_rowconfigure(4, weight=0) # Delete
         lf.grid_rowconfigure(5, weight=1) # Spacer
         lf.grid_rowconfigure(6, weight=0) # Update Data
-        lf.grid_rowconfigure(7, weight=0) # Import CSV
-        lf.grid_rowconfigure(8, weight=0) # Export CSV
+        lf.grid_rowconfigure(7, weight=0) # Force Update
+        lf.grid_rowconfigure(8, weight=0) # Import CSV
+        lf.grid_rowconfigure(9, weight=0) # Export CSV
 
         ttk.Label(lf, text="Name:").grid(row=0, column=0, sticky="w", pady=5)
         ttk.Label(lf, text="Link:").grid(row=1, column=0, sticky="w", pady=5)
@@ -147,31 +167,61 @@ class AppUI:
 
         # Renamed button and updated command to handle selected data only
         ttk.Button(lf, text="Update Data", command=self.on_update_selected).grid(row=6, column=0, columnspan=2, sticky="ew", pady=5)
-        ttk.Button(lf, text="Import CSV", command=self.on_import_csv).grid(row=7, column=0, columnspan=2, sticky="ew", pady=5)
-        ttk.Button(lf, text="Export CSV", command=self.ctrl.export_csv).grid(row=8, column=0, columnspan=2, sticky="ew", pady=5)
+        # Scrapes the selection even if it was scraped within its freshness TTL
+        ttk.Button(lf, text="Force Update", command=lambda: self.on_update_selected(force=True)).grid(row=7, column=0, columnspan=2, sticky="ew", pady=5)
+        ttk.Button(lf, text="Import CSV", command=self.on_import_csv).grid(row=8, column=0, columnspan=2, sticky="ew", pady=5)
+        ttk.Button(lf, text="Export CSV", command=self.ctrl.export_csv).grid(row=9, column=0, columnspan=2, sticky="ew", pady=5)
 
         # RIGHT PANEL (Treeview)
         rf = ttk.Frame(root, padding=10)
         rf.grid(row=0, column=1, sticky="nsew")
         rf.grid_columnconfigure(0, weight=1)
         rf.grid_rowconfigure(0, weight=1)
-        cols = ("Name", "Link", "Platform", "Followers", "Category")
-        self.tree = ttk.Treeview(rf, columns=cols, show="headings", selectmode="extended")
-        for c in cols:
-            self.tree.heading(c, text=c, command=lambda _c=c: self.ctrl.sort_by(self.tree, _c))
-            self.tree.column(c, width=120, anchor="w")
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        ttk.Scrollbar(rf, orient="vertical", command=self.tree.yview).grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=lambda f, s: None) # Disable default scrollbar behavior
-
-        # --- Configure the "failed" tag on the Treeview itself ---
-        self.tree.tag_configure("failed", background="#FFCCCC")
-
-        # Bind right-click to show context menu
-        self.tree.bind("<Button-3>", self._show_context_menu)
+        self._table_frame = rf
+        self._auto_virtual = virtual is None # Only an automatic choice may change later
+        if virtual is None:
+            virtual = self.ctrl.count_accounts() > VIRTUAL_TABLE_THRESHOLD
+        if virtual:
+            self._build_virtual_table()
+        else:
+            cols = ("Name", "Link", "Platform", "Followers", "Category")
+            self.tree = ttk.Treeview(rf, columns=cols, show="headings", selectmode="extended")
+            for c in cols:
+                self.tree.heading(c, text=c, command=lambda _c=c: self._sort_by(_c))
+                self.tree.column(c, width=120, anchor="w")
+            self.tree.grid(row=0, column=0, sticky="nsew")
+            ttk.Scrollbar(rf, orient="vertical", command=self.tree.yview).grid(row=0, column=1, sticky="ns")
+            self.tree.configure(yscrollcommand=lambda f, s: None) # Disable default scrollbar behavior
+
+            # --- Configure the "failed" tag on the Treeview itself ---
+            self.tree.tag_configure("failed", background="#FFCCCC")
+
+            # Bind right-click to show context menu
+            self.tree.bind("<Button-3>", self._show_context_menu)
 
         self.refresh()
 
+    def _build_virtual_table(self):
+        """Creates the windowed table in the right panel."""
+        self.table = VirtualTable(self._table_frame, self.ctrl)
+        self.tree = self.table.tree
+        self.tree.bind("<Button-3>", self._show_context_menu)
+
+    def _switch_to_virtual_table(self):
+        """
+        Replaces the plain Treeview with the windowed table once the account count grows
+        past VIRTUAL_TABLE_THRESHOLD, keeping the selection and the sort column.
+        """
+        selected = self._selected_links() or []
+        for child in self._table_frame.winfo_children():
+            child.destroy()
+        self._items = {}
+        self._version = None
+        self._build_virtual_table()
+        self.table.selected = set(selected)
+        if self._sort_col:
+            self.table.sort(self._sort_col)
+
     def _spin(self):
         """Animates the spinner on the overlay."""
         self.spinner_angle = (self.spinner_angle + 5) % 360
@@ -200,6 +250,7 @@ class AppUI:
 
         lbl = tk.Label(container, text=text, fg="#333", bg="#D3D3D3", font=("Helvetica", 16))
         lbl.pack(pady=(0, 10))
+        self.overlay_label = lbl
 
         # Load and display the overlay logo
         try:
@@ -228,12 +279,18 @@ class AppUI:
         )
         self._spin() # Start the spinner animation
 
+    def set_overlay_text(self, text):
+        """Updates the overlay message (e.g. with progress) while it is visible."""
+        if self.overlay:
+            self.overlay_label.config(text=text)
+
     def hide_overlay(self):
         """Hides the full-screen overlay."""
         if not self.overlay:
             return
         self.overlay.destroy()
         self.overlay = None
+        self.overlay_label = None
         self.spinner_canvas = None
         self.spinner_arc = None
 
@@ -247,7 +304,9 @@ class AppUI:
         """
         Handles the 'Add Account' button click.
         The overlay will remain visible until the newly added account's data
-        has been fully scraped and is no longer in a "pending" state.
+        has been fully scraped and is no longer in a "pending" state. The controller
+        returns a future for the scrape, so the UI is notified when the result lands
+        instead of polling the database.
         """
         name = self.name_var.get().strip()
         link = self.link_var.get().strip()
@@ -258,62 +317,54 @@ class AppUI:
             return
 
         self.show_overlay("Adding and Scraping...") # More descriptive message
-
         def task():
             try:
                 # Add the account to the controller. It will be initially "pending".
-                self.ctrl.add_account(name, link, plat)
-
-                # Now, wait for this specific account to be scraped
-                scraped_status = "pending"
-                while scraped_status == "pending":
-                    found = False
-                    for rec_name, rec_link, rec_platform, rec_followers, rec_category in self.ctrl.fetch_all():
-                        if rec_link == link: # Found the account we just added
-                            scraped_status = rec_category
-                            found = True
-                            break
-                    if not found: # Should not happen if add_account worked, but a safeguard
-                        print(f"Warning: Added account with link {link} not found in data after add.")
-                        break # Exit loop if account somehow disappears
-                    if scraped_status == "pending":
-                        time.sleep(0.1) # Wait a bit before checking again
-
+                future = self.ctrl.add_account(name, link, plat)
             except Exception as ex:
                 error_msg = str(ex)
                 self.root.after(0, lambda msg=error_msg: messagebox.showerror("Add Error", msg))
-            finally:
+                future = None
+
+            if future is None: # Rejected (the controller has already reported why)
                 self.root.after(0, self.hide_overlay)
-                self.root.after(0, self.refresh)
-                self.root.after(0, self.clear_inputs)
+                return
 
+            # The callback runs on a background thread, so hop back to the Tk thread
+            future.add_done_callback(lambda f: self.root.after(0, self._on_add_finished, f))
+        # The database write and freshness lookup must not freeze the UI on a busy database
         threading.Thread(target=task, daemon=True).start()
 
-    def on_update_selected(self):
-        """Handles the 'Update Selected Data' button click or context menu option."""
-        selections = list(self.tree.selection())
-        if not selections:
+    def _on_add_finished(self, future):
+        """Completion callback for on_add, run on the Tk thread."""
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Add Error", str(error))
+        elif future.result() is None:
+            print("Warning: Added account not found in data after scrape.")
+        self.hide_overlay()
+        self.refresh()
+        self.clear_inputs()
+
+    def on_update_selected(self, force=False):
+        """
+        Handles the 'Update Data' and 'Force Update' button clicks. Without force the
+        controller skips accounts whose last result is still fresh.
+        """
+        links_to_update = self._selected_links()
+        if links_to_update is None:
             messagebox.showerror("Selection Error", "Select one or more items to update.")
             return
 
-        links_to_update = []
-        for sel in selections:
-            try:
-                values = self.tree.item(sel).get("values", [])
-                if len(values) >= 2: # Ensure link column exists (link is at index 1)
-                    links_to_update.append(values[1])
-            except Exception as ex:
-                print("Error retrieving tree item for update:", ex) # Log error but continue
-
         if not links_to_update:
             messagebox.showwarning("Update Warning", "No valid items selected for update.")
             return
 
-        self.show_overlay("Updating Selected...")
+        self.show_overlay("Force Updating Selected..." if force else "Updating Selected...")
         def task():
             try:
                 # Call the new controller method to update only selected links
-                self.ctrl.update_selected(links_to_update)
+                self.ctrl.update_selected(links_to_update, force=force)
             except Exception as ex:
                 error_msg = str(ex)
                 self.root.after(0, lambda msg=error_msg: messagebox.showerror("Update Error", msg))
@@ -324,18 +375,10 @@ class AppUI:
 
     def on_delete(self):
         """Handles the 'Delete' button click."""
-        selections = list(self.tree.selection())
-        if not selections:
+        links_to_delete = self._selected_links()
+        if links_to_delete is None:
             messagebox.showerror("Selection Error", "Select one or more items.")
             return
-        links_to_delete = []
-        for sel in selections:
-            try:
-                values = self.tree.item(sel).get("values", [])
-                if len(values) >= 2: # Ensure link column exists
-                    links_to_delete.append(values[1])
-            except Exception as ex:
-                print("Error retrieving tree item:", ex) # Log error but continue
 
         if not links_to_delete: # If no valid links were found to delete
             messagebox.showwarning("Delete Warning", "No valid items selected for deletion.")
@@ -346,8 +389,30 @@ class AppUI:
                 self.ctrl.delete_account(link)
             except Exception as e:
                 messagebox.showerror("Delete Error", f"Error deleting {link}: {e}")
+        if self.table:
+            self.table.selected.difference_update(links_to_delete)
         self.refresh() # Refresh UI after deletion
 
+    def _selected_links(self):
+        """
+        Returns the links of the selected rows, or None if nothing is selected.
+        In windowed mode this includes selected rows that are scrolled off screen.
+        """
+        if self.table:
+            return self.table.selected_links() or None
+        selections = list(self.tree.selection())
+        if not selections:
+            return None
+        links = []
+        for sel in selections:
+            try:
+                values = self.tree.item(sel).get("values", [])
+                if len(values) >= 2: # Ensure link column exists (link is at index 1)
+                    links.append(values[1])
+            except Exception as ex:
+                print("Error retrieving tree item:", ex) # Log error but continue
+        return links
+
     def on_import_csv(self):
         """Handles the 'Import CSV' button click."""
         path = filedialog.askopenfilename(title="Select CSV", filetypes=[("CSV files", "*.csv")])
@@ -367,19 +432,54 @@ class AppUI:
             self.refresh() # Refresh even if no file selected, to clear any previous state
 
     def refresh(self):
-        """Refreshes the data displayed in the Treeview."""
-        # Clear existing entries
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        # Fetch and insert new data
-        for row in self.ctrl.fetch_all():
+        """
+        Refreshes the Treeview incrementally: only rows changed since the last refresh are
+        read, and only their items are updated, inserted or removed. Item ids are kept,
+        so the selection and scroll position survive the refresh. If the user sorted
+        the table, the sort is re-applied so new rows land in their sorted position.
+        """
+        if self.table:
+            self.table.refresh() # Windowed mode only re-reads the rows on screen
+            return
+        if self._auto_virtual and self.ctrl.count_accounts() > VIRTUAL_TABLE_THRESHOLD:
+            # Imports can grow the table well past what the plain Treeview handles
+            self._switch_to_virtual_table()
+            self.table.refresh()
+            return
+        rows, deleted, version = self.ctrl.fetch_changes(self._version)
+        if deleted is None:
+            # Full snapshot: anything we show that is not in it was deleted
+            current = {row[1] for row in rows}
+            deleted = [link for link in self._items if link not in current]
+
+        top = self.tree.yview()[0]
+        for link in deleted:
+            item = self._items.pop(link, None)
+            if item is not None and self.tree.exists(item):
+                self.tree.delete(item)
+
+        for row in rows:
             tags = ()
             # Apply 'failed' tag for red background, including for platform errors
             if len(row) > 4 and (str(row[4]).lower() == "failed" or str(row[4]).lower() == "failed_platform"):
                 tags = ("failed",)
-            self.tree.insert("", "end", values=row, tags=tags)
-        # The tag configuration is done once in __init__ now, but can be here too for dynamic changes.
-        # self.tree.tag_configure("failed", background="#FFCCCC")
+            item = self._items.get(row[1])
+            if item is not None and self.tree.exists(item):
+                self.tree.item(item, values=row, tags=tags)
+            else:
+                self._items[row[1]] = self.tree.insert("", "end", values=row, tags=tags)
+
+        self._version = version
+        if rows and self._sort_col:
+            # New rows were appended and changed ones may have moved; put them in order
+            self.ctrl.sort_by(self.tree, self._sort_col)
+        if deleted or rows and self._sort_col:
+            self.tree.yview_moveto(top) # Keep the viewport where the user left it
+
+    def _sort_by(self, col):
+        """Sorts the plain Treeview by a column and keeps it sorted across refreshes."""
+        self._sort_col = col
+        self.ctrl.sort_by(self.tree, col)
 
     def _show_context_menu(self, event):
         """Displays a context menu on right-click for the Treeview."""
@@ -393,6 +493,9 @@ class AppUI:
 
     def _select_all_items(self):
         """Selects all items in the Treeview."""
+        if self.table:
+            self.table.select_all()
+            return
         for item in self.tree.get_children():
             self.tree.selection_add(item)
 
@@ -405,16 +508,19 @@ class DummyController:
         self.data = []  # Each record: (name, link, platform, followers, category)
         self.scrape_queue = []
         self.scrape_thread_started = False
+        self.pending_futures = {} # link -> Future returned by add_account
         self.on_data_update = lambda: None # Callback for UI refresh
 
     def add_account(self, name, link, platform):
         # Simulate adding an account with initial dummy data
         self.data.append((name, link, platform, 0, "pending"))
         self.scrape_queue.append((name, link, platform)) # Add to scrape queue immediately
+        future = self.pending_futures[link] = Future()
         print(f"Dummy: Added account {name} ({platform})")
         if not self.scrape_thread_started:
             threading.Thread(target=self.continuous_scraping, daemon=True).start()
             self.scrape_thread_started = True
+        return future
 
     def delete_account(self, link):
         # Simulate deleting an account
@@ -422,8 +528,8 @@ class DummyController:
         self.data = [r for r in self.data if r[1] != link]
         print(f"Dummy: Deleted account with link {link}. {original_len - len(self.data)} items removed.")
 
-    def update_selected(self, links_to_update):
-        """Simulates updating only selected accounts."""
+    def update_selected(self, links_to_update, force=False):
+        """Simulates updating only selected accounts (the dummy has no freshness cache)."""
         print(f"Dummy: Updating selected accounts: {links_to_update}...")
         updated_data = []
         # Create a set for faster lookup of links to update
@@ -543,6 +649,9 @@ class DummyController:
                 if not updated: # Add as new if not found
                     self.data.append(result)
 
+                future = self.pending_futures.pop(result[1], None)
+                if future is not None:
+                    future.set_result(result)
                 self.on_data_update() # Notify UI to refresh
             else:
                 time.sleep(1) # Wait if queue is empty
@@ -565,6 +674,30 @@ class DummyController:
         """Returns all currently stored dummy accounts."""
         return self.data
 
+    def fetch_account(self, link):
+        """Returns the dummy account with the given link, or None."""
+        return next((rec for rec in self.data if rec[1] == link), None)
+
+    def fetch_changes(self, since_version=None):
+        """Dummy data has no change tracking, so always return a full snapshot."""
+        return list(self.data), None, 0
+
+    def count_accounts(self):
+        return len(self.data)
+
+    def fetch_all_links(self):
+        return [rec[1] for rec in self.data]
+
+    def fetch_window(self, offset, limit, order_by=None, descending=False):
+        """Returns one page of dummy accounts, sorted like database.fetch_window."""
+        rows = list(self.data)
+        if order_by:
+            index = ("name", "link", "platform", "followers", "category").index(order_by)
+            rows.sort(key=lambda r: str(r[index]).lower() if index != 3 else r[index])
+        if descending:
+            rows.reverse()
+        return rows[offset:offset + limit]
+
     def sort_by(self, tree, col):
         """Dummy sort function for the Treeview."""
         print(f"Dummy: Sorting by column: {col}")
@@ -0,0 +1,176 @@
+# virtual_table.py
+from tkinter import ttk
+
+COLUMNS = ("Name", "Link", "Platform", "Followers", "Category")
+
+# Rows fetched beyond each edge of the visible window, so small scrolls are served from memory
+BUFFER_ROWS = 100
+
+
+class VirtualTable:
+    """
+    Windowed replacement for a Treeview that holds one item per account.
+
+    The Treeview only ever contains as many items as fit on screen. They are reused
+    as the user scrolls: the rows for the current offset are read from a cached page
+    (the visible window plus BUFFER_ROWS on either side) and a new page is fetched
+    from the database only when the offset leaves it. Scrolling, sorting and
+    selection are tracked here by offset and link rather than by Treeview items, so
+    memory and redraw cost stay the same whether 100 or 100,000 accounts are tracked.
+
+    The data source needs three methods: ``count_accounts()``, ``fetch_all_links()``
+    and ``fetch_window(offset, limit, order_by, descending)``.
+    """
+
+    def __init__(self, parent, source, row_height=None):
+        """
+        Args:
+            parent: Frame the Treeview and scrollbar are gridded into (row 0, columns 0-1).
+            source: Object providing count_accounts(), fetch_all_links() and fetch_window().
+            row_height (int): Pixel height of one row; read from the ttk style if omitted.
+        """
+        self.source = source
+        self.total = 0
+        self.offset = 0             # Index of the first visible row
+        self.visible_rows = 20      # Recomputed from the widget height on <Configure>
+        self.order_by = None        # SORTABLE_COLUMNS key, None for insertion order
+        self.descending = False
+        self.selected = set()       # Links selected anywhere in the table, not only on screen
+        self._page_start = 0
+        self._page = []             # Cached rows starting at _page_start
+        self._items = []            # Treeview item ids currently on screen, top to bottom
+
+        self.tree = ttk.Treeview(parent, columns=COLUMNS, show="headings", selectmode="extended")
+        for c in COLUMNS:
+            self.tree.heading(c, text=c, command=lambda _c=c: self.sort(_c))
+            self.tree.column(c, width=120, anchor="w")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.tag_configure("failed", background="#FFCCCC")
+
+        style_height = ttk.Style(parent).lookup("Treeview", "rowheight")
+        self.row_height = row_height or int(style_height or 20)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)               # Windows / macOS
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3) or "break")  # X11 wheel up
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3) or "break")   # X11 wheel down
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible_rows) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible_rows) or "break")
+
+    # ------------------ Data ------------------
+    def refresh(self):
+        """Re-read the row count and the visible window (e.g. after a scrape or delete)."""
+        self.total = self.source.count_accounts()
+        self._page = []  # Rows may have changed anywhere, so drop the cached page
+        self._render()
+
+    def selected_links(self):
+        return list(self.selected)
+
+    def select_all(self):
+        self.selected = set(self.source.fetch_all_links())
+        self._render()
+
+    def sort(self, col):
+        """Sort by a column in SQL; clicking the same heading again reverses the order."""
+        key = col.lower()
+        self.descending = not self.descending if self.order_by == key else False
+        self.order_by = key
+        self.offset = 0
+        self._page = []
+        self._render()
+
+    def scroll(self, rows):
+        self._move_to(self.offset + rows)
+
+    def _move_to(self, offset):
+        offset = max(0, min(offset, self.total - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _window(self):
+        """Rows for the visible window, fetching a new buffered page only when needed."""
+        end = min(self.offset + self.visible_rows, self.total)
+        page_end = self._page_start + len(self._page)
+        if not self._page or self.offset < self._page_start or end > page_end:
+            self._page_start = max(0, self.offset - BUFFER_ROWS)
+            self._page = self.source.fetch_window(self._page_start, self.visible_rows + 2 * BUFFER_ROWS,
+                                                  self.order_by, self.descending)
+        start = self.offset - self._page_start
+        return self._page[start:start + self.visible_rows]
+
+    # ------------------ Rendering ------------------
+    def _render(self):
+        self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        rows = self._window()
+
+        # Grow or shrink the pool of reusable items to the number of rows on screen
+        while len(self._items) < len(rows):
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > len(rows):
+            self.tree.delete(self._items.pop())
+
+        selection = []
+        for item, row in zip(self._items, rows):
+            tags = ()
+            # Apply 'failed' tag for red background, including for platform errors
+            if str(row[4]).lower() in ("failed", "failed_platform"):
+                tags = ("failed",)
+            self.tree.item(item, values=row, tags=tags)
+            if row[1] in self.selected:
+                selection.append(item)
+        self.tree.selection_set(selection)
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + len(rows)) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ------------------ Events ------------------
+    def _on_resize(self, event):
+        # One row's worth of height is taken by the headings
+        rows = max(1, event.height // self.row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self._render()
+
+    def _on_select(self, event):
+        """Mirror the on-screen selection into the link set."""
+        chosen = set(self.tree.selection())
+        for item in self._items:
+            link = self.tree.set(item, "Link")
+            if item in chosen:
+                self.selected.add(link)
+            else:
+                self.selected.discard(link)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._move_to(int(float(amount) * self.total))
+        elif unit == "pages":
+            self.scroll(int(amount) * self.visible_rows)
+        else:
+            self.scroll(int(amount))
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_arrow(self, step):
+        """Let the Treeview move the focus within the window; scroll at its edges."""
+        if not self._items:
+            return None
+        edge = self._items[0] if step < 0 else self._items[-1]
+        if self.tree.focus() != edge:
+            return None
+        self.scroll(step)
+        # Like a plain Treeview, the row the cursor moves onto becomes the selection
+        self.selected = {self.tree.set(edge, "Link")}
+        self._render()
+        return "break"
@@ -0,0 +1,183 @@
+# worker.py
+"""
+Standalone scrape worker. Claims jobs from the scrape_jobs queue in the database and
+runs them with the regular platform scrapers, writing results back to the accounts
+table. Any number of workers can run at once as separate processes on the machine
+that holds the database file (e.g. one per core); a crashed worker's jobs are retried
+by the others once their lease expires. The database runs in WAL mode, which needs
+shared memory between its clients, so workers on other machines sharing the file
+over a network filesystem are not supported.
+
+    python worker.py --db accounts.db --concurrency 4
+    python worker.py --db accounts.db --base-url http://127.0.0.1:8080 --enqueue-all --once
+"""
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+import job_queue
+from database import init_db, close_db, determine_category, fetch_account, fetch_all_accounts
+from scraper import InstagramScraper, TikTokScraper, XTwitterScraper
+from scraper.circuit import set_state_dir
+from scraper.driver_pool import shutdown_all_pools
+from scraper.http_client import set_base_url
+from scraper.ratelimit import RateLimiterRegistry
+
+
+class Worker:
+    """Claims, scrapes and acknowledges queued jobs until stopped."""
+
+    def __init__(self, worker_id=None, concurrency=4, lease_seconds=job_queue.LEASE_SECONDS, poll_interval=2.0):
+        """
+        Args:
+            worker_id (str): Lease owner name; defaults to host:pid.
+            concurrency (int): Jobs scraped at the same time by this worker.
+            lease_seconds (int): Lease length; heartbeats renew it every third of that.
+            poll_interval (float): Seconds to wait before polling an empty queue again.
+        """
+        self.worker_id = worker_id or job_queue.default_worker_id()
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.scrapers = {
+            "instagram": InstagramScraper(),
+            "tiktok":    TikTokScraper(),
+            "twitter":   XTwitterScraper()
+        }
+        self.rate_limiter = RateLimiterRegistry()
+        self._held = set()              # Job ids currently leased by this worker
+        self._held_lock = threading.Lock()
+        self._slot_freed = threading.Event()
+        self._stop = threading.Event()
+        self.counts = {"done": 0, "failed": 0}
+
+    def stop(self):
+        self._stop.set()
+        self._slot_freed.set()
+
+    def run(self, once=False):
+        """
+        Process jobs until stop() is called. With once=True, return as soon as the
+        queue has nothing runnable and no job is in flight.
+        """
+        print(f"Worker[{self.worker_id}]: Started with concurrency {self.concurrency}.")
+        job_queue.worker_alive(self.worker_id, self.lease_seconds)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True)
+        heartbeat.start()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job") as pool:
+            while not self._stop.is_set():
+                with self._held_lock:
+                    free = self.concurrency - len(self._held)
+                jobs = job_queue.claim(self.worker_id, free, self.lease_seconds)
+                for job_id, link, attempt in jobs:
+                    with self._held_lock:
+                        self._held.add(job_id)
+                    pool.submit(self._process, job_id, link, attempt)
+                if not jobs:
+                    with self._held_lock:
+                        idle = not self._held
+                    if once and idle:
+                        break
+                    # Wake early when a job finishes and frees a slot
+                    self._slot_freed.wait(self.poll_interval)
+                    self._slot_freed.clear()
+        self._stop.set()
+        job_queue.worker_stopped(self.worker_id)
+        print(f"Worker[{self.worker_id}]: Stopped. Done: {self.counts['done']}, Failed: {self.counts['failed']}.")
+
+    def _process(self, job_id, link, attempt):
+        try:
+            account = fetch_account(link)
+            if account is None:
+                print(f"Worker[{self.worker_id}]: Account {link} no longer exists; dropping job {job_id}.")
+                job_queue.ack(job_id, self.worker_id)
+                return
+            name, link, platform, _, _ = account
+            scraper = self.scrapers.get(platform)
+            if scraper is None:
+                job_queue.fail(job_id, self.worker_id, f"Unsupported platform '{platform}'", retry=False)
+                self._count("failed")
+                return
+            try:
+                with self.rate_limiter.slot(platform):
+                    followers = scraper.scrape(link)
+            except Exception as e:
+                state = job_queue.fail(job_id, self.worker_id, e)
+                self._count("failed")
+                print(f"Worker[{self.worker_id}]: Attempt {attempt} for {link} failed ({state}): {e}", file=sys.stderr)
+                return
+            row = (name, link, platform, followers, determine_category(followers))
+            if job_queue.ack(job_id, self.worker_id, row):
+                self._count("done")
+                print(f"Worker[{self.worker_id}]: {name} ({platform}): {followers} followers.")
+            else:
+                print(f"Worker[{self.worker_id}]: Lease on job {job_id} was lost; result for {link} discarded.", file=sys.stderr)
+        except Exception as e:
+            print(f"Worker[{self.worker_id}]: Unexpected error on job {job_id} ({link}): {e}", file=sys.stderr)
+        finally:
+            with self._held_lock:
+                self._held.discard(job_id)
+            self._slot_freed.set()
+
+    def _count(self, outcome):
+        with self._held_lock:
+            self.counts[outcome] += 1
+
+    def _heartbeat_loop(self):
+        """
+        Check in as a live worker and renew the leases of in-flight jobs every third
+        of the lease length.
+        """
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._held_lock:
+                held = list(self._held)
+            try:
+                job_queue.worker_alive(self.worker_id, self.lease_seconds)
+                if not held:
+                    continue
+                kept = set(job_queue.heartbeat(self.worker_id, held, self.lease_seconds))
+            except Exception as e:
+                print(f"Worker[{self.worker_id}]: Heartbeat failed: {e}", file=sys.stderr)
+                continue
+            lost = set(held) - kept
+            if lost:
+                print(f"Worker[{self.worker_id}]: Lost leases on jobs {sorted(lost)}.", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape worker for the shared job queue.")
+    parser.add_argument("--db", default=database.DB_PATH, help="Path of the shared SQLite database.")
+    parser.add_argument("--base-url", help="Send HTTP fast-path requests to this stand-in server.")
+    parser.add_argument("--worker-id", help="Lease owner name (default: host:pid).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs scraped at the same time.")
+    parser.add_argument("--lease", type=int, default=job_queue.LEASE_SECONDS, help="Lease length in seconds.")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between polls of an empty queue.")
+    parser.add_argument("--enqueue-all", action="store_true", help="Queue a job for every account before starting.")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is drained.")
+    args = parser.parse_args(argv)
+
+    database.DB_PATH = args.db
+    set_state_dir(os.path.dirname(os.path.abspath(args.db))) # Share circuit state with the app using this database
+    if args.base_url:
+        set_base_url(args.base_url)
+    init_db()
+    if args.enqueue_all:
+        jobs = job_queue.enqueue(account[1] for account in fetch_all_accounts())
+        print(f"Worker: Queued {len(jobs)} jobs.")
+
+    worker = Worker(args.worker_id, args.concurrency, args.lease, args.poll)
+    try:
+        worker.run(once=args.once)
+    except KeyboardInterrupt:
+        print("Worker: Interrupted.")
+        worker.stop()
+    finally:
+        shutdown_all_pools()
+        close_db()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# write_buffer.py
+import atexit
+import sys
+import threading
+import time
+
+from database import bulk_upsert_accounts
+
+# close() retries a failing final flush this many times, waiting CLOSE_RETRY_SECONDS
+# (doubling after each attempt) in between, before giving up on the pending rows
+CLOSE_RETRIES = 3
+CLOSE_RETRY_SECONDS = 1.0
+
+
+class WriteBehindBuffer:
+    """
+    Collects scrape results from worker threads and writes them in batches.
+
+    Rows are (name, link, platform, followers, category) tuples, as taken by
+    bulk_upsert_accounts. Pending rows are flushed in one executemany transaction as
+    soon as ``max_rows`` are waiting, and otherwise every ``max_delay_ms``. Rows for
+    the same link within one batch are coalesced (last write wins). close() flushes
+    whatever is left, retrying a busy database, and is also registered with atexit so
+    results are not lost on shutdown.
+    """
+
+    def __init__(self, flush_func=bulk_upsert_accounts, max_rows=200, max_delay_ms=500):
+        """
+        Args:
+            flush_func (callable): Writes a list of rows in one transaction.
+            max_rows (int): Flush as soon as this many distinct links are pending.
+            max_delay_ms (int): Flush rows that have waited this long, even if the batch is small.
+        """
+        self.flush_func = flush_func
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self._pending = {}                   # link -> row, insertion ordered
+        self._lock = threading.Lock()        # Guards _pending
+        self._flush_lock = threading.Lock()  # Serializes flushes so batches land in order
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, row):
+        """Queue one result row. Never blocks on the database."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBehindBuffer: buffer is closed.")
+            self._pending[row[1]] = row
+            full = len(self._pending) >= self.max_rows
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every pending row now, in the calling thread. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = list(self._pending.values()), {}
+            if not batch:
+                return 0
+            try:
+                self.flush_func(batch)
+            except Exception as e:
+                print(f"WriteBehindBuffer: Flush of {len(batch)} rows failed, will retry: {e}", file=sys.stderr)
+                with self._lock:
+                    # Put the batch back without overwriting rows that arrived since
+                    retry = {row[1]: row for row in batch}
+                    retry.update(self._pending)
+                    self._pending = retry
+                return 0
+            return len(batch)
+
+    def discard(self, link):
+        """
+        Drop the pending row for link, e.g. before writing that account directly, so an
+        older buffered result cannot land on top of it. Waits for a flush in progress.
+        Returns True if a row was dropped.
+        """
+        with self._flush_lock:
+            with self._lock:
+                return self._pending.pop(link, None) is not None
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """
+        Stop the background flusher and write everything still pending. Raises
+        RuntimeError if rows are still unwritten after CLOSE_RETRIES retries.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        delay = CLOSE_RETRY_SECONDS
+        for attempt in range(CLOSE_RETRIES + 1):
+            self.flush()
+            if not self.pending():
+                return
+            if attempt < CLOSE_RETRIES:
+                time.sleep(delay)
+                delay *= 2
+        raise RuntimeError(f"WriteBehindBuffer: {self.pending()} scrape results could not be written and are lost.")
+
+    def _run(self):
+        """Background flusher: wakes on a full batch or after max_delay."""
+        while not self._closed:
+            self._wakeup.wait(self.max_delay)
+            self._wakeup.clear()
+            if self.pending():
+                self.flush()